@@ -6,10 +6,9 @@ from scenes.SPECIAL.Effects.Effect import Effect
 from scenes.SPECIAL.Effects.default.texture_calculator import TextureCalculator
 from scenes.scene_behaviour import SceneBehaviour
 from scripts.AssetClasses.Tilemap.tilemap import Tilemap
-from scripts.GameTypes import WorldPosition, CommandType, ColorNormalized, PrisonShape, OperationType, FloatDoubleFBO
+from scripts.GameTypes import WorldPosition, CommandType, ColorNormalized, PrisonShape, OperationType
 from scripts.Utilities.Camera.screen_loop import ScreenLoop
 from scripts.Utilities.Flow.timeline import Timeline
-from scripts.Utilities.Graphics.double_framebuffer import DoubleFramebuffer
 from scripts.Utilities.Graphics.effect_area import EffectArea
 from scripts.Utilities.Graphics.graphics_command import GraphicsCommand
 from scripts.Utilities.Graphics.kernel import Kernel
@@ -57,11 +56,6 @@ class Effectorander(SceneBehaviour):
         self.pe3_command: GraphicsCommand = None
         self.lighting_command: GraphicsCommand = None
 
-        self.haze_bloom_fbo: DoubleFramebuffer = None
-        self.sobel_edge_fbo: FloatDoubleFBO = None
-        self.positioning_fbo: DoubleFramebuffer = None
-        self.lighting_fbo: FloatDoubleFBO = None
-
         self.big_effect_edges: EffectArea = None
 
     def init(self):
@@ -96,8 +90,7 @@ class Effectorander(SceneBehaviour):
         kernel.make_blue = True
         kernel.make_red = True
         kernel.become_sobel_v(False)
-        self.convolution.kernel = kernel.texture
-        self.convolution.kernel_color_range = kernel.color_range
+        self.convolution.set_kernel(kernel)
         self.convolution.pixel_scale = 1
         self.convolution.pixel_scaling.y = 1
         self.conv_command = GraphicsCommand(self.game, 8, CommandType.EFFECT, effect=self.convolution)
@@ -109,9 +102,7 @@ class Effectorander(SceneBehaviour):
         kernel2.make_red = False
         kernel2.become_gauss(5, 3)
         kernel3 = kernel2 @ kernel
-        kernel3.save()
-        self.convolution2.kernel = kernel3.texture
-        self.convolution2.kernel_color_range = kernel3.color_range
+        self.convolution2.set_kernel(kernel3)
         self.conv2_command = GraphicsCommand(self.game, 9, CommandType.EFFECT, effect=self.convolution2)
 
         self.wavy = self.game.graphics.effects["wavy"].clone
@@ -155,18 +146,14 @@ class Effectorander(SceneBehaviour):
         #self.prison.obscure_last = False
         self.prison_command = GraphicsCommand(self.game, 1, CommandType.EFFECT, effect=self.prison)
 
-        self.haze_bloom_fbo = self.game.graphics.get_display_double_framebuffer()
         self.haze_bloom = self.game.graphics.effects["haze_bloom"].clone
-        self.haze_bloom.calculation_target = self.haze_bloom_fbo
         self.haze_bloom.threshold = 0.7
         self.haze_bloom.blur_size = 50
         self.haze_bloom.bloom_color = (1.2, 0.5, 0.1)
         self.haze_bloom.bloom_strength = 1
         self.haze_bloom_command = GraphicsCommand(self.game, 16, CommandType.EFFECT, effect=self.haze_bloom)
 
-        self.sobel_edge_fbo = self.game.graphics.get_display_double_framebuffer(use_floats=True)
         self.sobel_edges = self.game.graphics.effects["sobel_edges"].clone
-        self.sobel_edges.calculation_target = self.sobel_edge_fbo
         #self.sobel_edges.grayscale_edges = 0.4
         #self.sobel_edges.edge_operation = OperationType.SUBTRACT
         self.sobel_edges.preblur_pass_size = 3
@@ -174,9 +161,7 @@ class Effectorander(SceneBehaviour):
         #self.sobel_edges.edge_color = (1, 0.5, 0.2)
         self.sobel_command = GraphicsCommand(self.game, 17, CommandType.EFFECT, effect=self.sobel_edges)
 
-        self.positioning_fbo = self.game.graphics.get_display_double_framebuffer()
         self.positioned_effect = self.game.graphics.effects["positioned_effect"].clone
-        self.positioned_effect.calculation_target = self.positioning_fbo
         self.positioned_effect.effect = self.pixel_transform
         self.big_effect_edges = EffectArea(
             self.game, Vector2(600, 400), Vector2(400, 100), 0.1, 0.2, 0, True, False)
@@ -201,9 +186,7 @@ class Effectorander(SceneBehaviour):
         }
         self.pe3_command = GraphicsCommand(self.game, 19, CommandType.EFFECT, effect=self.pe3)
 
-        self.lighting_fbo = self.game.graphics.get_display_double_framebuffer(True)
         self.lighting = self.game.graphics.effects["lighting"].clone
-        self.lighting.calculation_target = self.lighting_fbo
         lights = {
             LightGPU(EffectArea(self.game, Vector2(-292.0, -231.0),Vector2(669.0, 377.0),0, 0.16181818181818183, 1.2363636363636363,True, False),
                      (255, 255, 255), 0.8),
@@ -7,7 +7,6 @@ from scenes.scene_behaviour import SceneBehaviour
 from scripts.AssetClasses.UI.slider import Slider
 from scripts.AssetClasses.UI.text import Text
 from scripts.GameTypes import CommandType, DisplayPosition
-from scripts.Utilities.Graphics.double_framebuffer import DoubleFramebuffer
 from scripts.Utilities.Graphics.effect_area import EffectArea
 from scripts.Utilities.Graphics.graphics_command import GraphicsCommand
 
@@ -32,7 +31,6 @@ class EffectEditor(SceneBehaviour):
 
         self.inv_effect: PixelTransform = None
         self.inv_positioned: PositionedEffect = None
-        self.positioning_fbo: DoubleFramebuffer = None
 
         self.inv_command: GraphicsCommand = None
 
@@ -79,9 +77,7 @@ class EffectEditor(SceneBehaviour):
         self.inv_effect = self.game.graphics.effects["pixel_transform"].clone
         self.inv_effect.invert_color = 1
 
-        self.positioning_fbo = self.game.graphics.get_display_double_framebuffer()
         self.inv_positioned = self.game.graphics.effects["positioned_effect"].clone
-        self.inv_positioned.calculation_target = self.positioning_fbo
         self.inv_positioned.effect = self.inv_effect
 
         for area in self.area_effects:
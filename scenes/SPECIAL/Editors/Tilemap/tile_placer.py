@@ -192,16 +192,13 @@ class TilePlacer:
         if tile is None:
             raise Exception("tile is none in _place_tile_on_grid, should not happen")
 
-        grid.tiles[position] = tile
+        grid.add_tile(tile, overwrite=True)
 
     def _delete_tile_on_grid(self) -> None:
         grid: Grid = self.editor.get_selected_grid()
         position: TilePosition = self.mouse_tile_pos
 
-        if position not in grid.tiles:
-            return
-
-        del grid.tiles[position]
+        grid.remove_ongrid_at(position)
 
     def _place_tile_off_grid(self) -> None:
         grid: Grid = self.editor.get_selected_grid()
@@ -218,16 +215,7 @@ class TilePlacer:
 
         tile.position = (position.x, position.y)
 
-        if self.focus_offgrid_background:
-            if tile in grid.offgrid_background:
-                return
-
-            grid.offgrid_background.add(tile)
-        else:
-            if tile in grid.offgrid_foreground:
-                return
-
-            grid.offgrid_foreground.add(tile)
+        grid.add_tile(tile, offgrid_background=self.focus_offgrid_background)
 
     def _delete_tile_off_grid(self) -> None:
         grid: Grid = self.editor.get_selected_grid()
@@ -247,10 +235,7 @@ class TilePlacer:
             tiles_to_remove.append(tile)
 
         for tile in tiles_to_remove:
-            if self.focus_offgrid_background:
-                grid.offgrid_background.remove(tile)
-            else:
-                grid.offgrid_foreground.remove(tile)
+            grid.remove_tile(tile)
 
     def _blit_hint(self) -> None:
         if not self.can_place:
@@ -3,6 +3,10 @@ from scripts.Utilities.Graphics.frag import Frag
 
 
 class Effect:
+    # effects compositing through a calculation_target borrow one from the render graph when none is assigned
+    NEEDS_CALCULATION_TARGET: bool = False
+    FLOAT_CALCULATION_TARGET: bool = False
+
     def __init__(self, frag: Frag, warning: bool=True) -> None:
         self.game: 'Game' = frag.game
         self.graphics: 'Graphics' = frag.graphics
@@ -32,6 +36,14 @@ class Effect:
         self.frag.execute()
 
     def execute(self) -> None:
+        borrowed: bool = self.NEEDS_CALCULATION_TARGET and self.calculation_target is None
+        if borrowed:
+            self.calculation_target = self.graphics.render_graph.acquire_target(self.FLOAT_CALCULATION_TARGET)
+
         self._update_frag()
         self._configure_frag()
         self._execute_frag()
+
+        if borrowed:
+            self.graphics.render_graph.release_target(self.calculation_target)
+            self.calculation_target = None
@@ -1,5 +1,7 @@
 import math
 
+import moderngl
+import numpy as np
 from moderngl import Texture
 from pygame import Vector2, Vector3
 
@@ -7,10 +9,12 @@ from scenes.SPECIAL.Effects.Effect import Effect
 from scripts.GameTypes import Scaling, Resolution
 from scripts.Utilities.Graphics.double_framebuffer import DoubleFramebuffer
 from scripts.Utilities.Graphics.frag import Frag
-from scripts.Utilities.Graphics.kernel import Kernel
+from scripts.Utilities.Graphics.kernel import Kernel, KernelDecomposition
 
 
 class Convolution(Effect):
+    SEPARABLE_MIN_SIZE: int = 5  # smaller kernels are cheaper in one pass than in two
+
     def __init__(self, frag: Frag, kernel: Texture=None, pixel_scale: float=1, pixel_scaling: Scaling=None,
                  kernel_color_range: float=255, release_kernel_on_del: bool=True):
         super().__init__(frag)
@@ -23,14 +27,82 @@ class Convolution(Effect):
 
         self.release_kernel_on_del: bool = release_kernel_on_del
 
+        # set by set_kernel when the kernel runs as 1d passes, one x and one y pass per rank
+        # x_kernel and y_kernel are made from decomposition and always owned by this convolution
+        self.decomposition: KernelDecomposition | None = None
+        self.x_kernel: Texture | None = None
+        self.y_kernel: Texture | None = None
+
+        self._pixel_size: Scaling = Vector2()
+        self._kernel_x_range: Resolution = (0, 0)
+        self._kernel_y_range: Resolution = (0, 0)
+
     def __del__(self) -> None:
         if self.release_kernel_on_del:
             self.kernel.release()
 
+        self._release_separable()
+
     @property
     def clone(self) -> 'Convolution':
-        return Convolution(self.frag, self.kernel, self.pixel_scale, self.pixel_scaling,
-                           self.kernel_color_range, self.release_kernel_on_del)
+        convolution = Convolution(self.frag, self.kernel, self.pixel_scale, self.pixel_scaling,
+                                  self.kernel_color_range, self.release_kernel_on_del)
+        if self.decomposition is not None:
+            convolution.decomposition = self.decomposition
+            convolution.x_kernel = convolution._weights_to_texture(self.decomposition.x_weights)
+            convolution.y_kernel = convolution._weights_to_texture(self.decomposition.y_weights)
+
+        return convolution
+
+    @property
+    def separable(self) -> bool:
+        return self.decomposition is not None
+
+    @property
+    def precision_loss(self) -> float:
+        return self.decomposition.error if self.decomposition is not None else 0
+
+    # kernels close enough to a low rank get decomposed and run as 1d passes, N^2 fetches per pixel become 2 * rank * N
+    def set_kernel(self, kernel: Kernel, tolerance: float=Kernel.DECOMPOSITION_TOLERANCE, max_rank: int=3) -> None:
+        self.kernel = kernel.texture
+        self.kernel_color_range = kernel.color_range
+
+        self._release_separable()
+
+        width, height = kernel.size
+        if min(width, height) < self.SEPARABLE_MIN_SIZE:
+            return
+
+        decomposition: KernelDecomposition | None = kernel.decompose(tolerance, max_rank)
+        if decomposition is None or decomposition.rank * (width + height) >= width * height:
+            return
+
+        if decomposition.error > 0:
+            print(f"[LOG] kernel decomposed to rank {decomposition.rank}, precision loss: {decomposition.error}")
+
+        self.decomposition = decomposition
+        self.x_kernel = self._weights_to_texture(decomposition.x_weights)
+        self.y_kernel = self._weights_to_texture(decomposition.y_weights)
+
+    def _release_separable(self) -> None:
+        if self.x_kernel is not None:
+            self.x_kernel.release()
+            self.y_kernel.release()
+
+        self.decomposition = None
+        self.x_kernel = None
+        self.y_kernel = None
+
+    # (rank, length, 3) weights as a length x rank float texture
+    def _weights_to_texture(self, weights: np.ndarray) -> Texture:
+        rank, length, _ = weights.shape
+
+        data: np.ndarray = np.zeros((rank, length, 4), dtype='f4')
+        data[:, :, :3] = weights
+
+        texture: Texture = self.ctx.texture((length, rank), 4, data=data.tobytes(), dtype='f4')
+        texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+        return texture
 
     @property
     def color_range_zero(self) -> Vector3:
@@ -53,6 +125,10 @@ class Convolution(Effect):
         kernel_x_range: Resolution = (-x_shift, self.kernel.width - x_shift)
         kernel_y_range: Resolution = (-y_shift, self.kernel.height - y_shift)
 
+        self._pixel_size = pixel_size
+        self._kernel_x_range = kernel_x_range
+        self._kernel_y_range = kernel_y_range
+
         self.frag.attributes = {
             "tex": self.tex,
             "kernel": self.kernel,
@@ -64,3 +140,63 @@ class Convolution(Effect):
             "color_range": self.kernel_color_range,
             "color_range_zero": self.color_range_zero
         }
+
+    def _execute_frag(self) -> None:
+        if not self.separable:
+            self.frag.execute()
+            return
+
+        rank: int = self.decomposition.rank
+        pass_frag: Frag = self.graphics.frags["convolution_1d"]
+        scratch: DoubleFramebuffer = self.graphics.render_graph.acquire_target(True)
+        target: DoubleFramebuffer = self.frag.target
+
+        # terms can be negative, so with more than one they are summed in floats before landing in target
+        accumulation: DoubleFramebuffer | None = self.graphics.render_graph.acquire_target(True) if rank > 1 else None
+
+        # target may be tex as well, so the source is fixed before the first write flips it
+        source: Texture = self.tex.front if isinstance(self.tex, DoubleFramebuffer) else self.tex
+
+        for row in range(rank):
+            pass_frag.attributes = {
+                "tex": source,
+                "kernel": self.x_kernel,
+                "kernel_row": row,
+                "kernel_range": self._kernel_x_range,
+                "pixel_step": (self._pixel_size.x, 0.)
+            }
+            pass_frag.target = scratch
+            pass_frag.flip_fbo = False
+            pass_frag.blend = False
+            pass_frag.execute()
+
+            pass_frag.attributes = {
+                "tex": scratch,
+                "kernel": self.y_kernel,
+                "kernel_row": row,
+                "kernel_range": self._kernel_y_range,
+                "pixel_step": (0., self._pixel_size.y)
+            }
+
+            if accumulation is None:
+                pass_frag.target = target
+                pass_frag.flip_fbo = self.frag.flip_fbo
+                pass_frag.blend = self.frag.blend
+            else:
+                pass_frag.target = accumulation
+                pass_frag.flip_fbo = False
+                pass_frag.blend = row > 0
+                pass_frag.blend_funcs = (moderngl.ONE, moderngl.ONE, moderngl.ZERO, moderngl.ONE)
+
+            pass_frag.execute()
+
+        if accumulation is not None:
+            if self.frag.flip_fbo:
+                target.flip()
+
+            target.use()
+            self.graphics.blit_texture(Vector2(), accumulation.front)
+            self.graphics.render_graph.release_target(accumulation)
+
+        self.graphics.render_graph.release_target(scratch)
+        self.frag.reset_attributes()
@@ -9,6 +9,8 @@ from scripts.DataStructures.matrices import Matrix2D
 
 
 class HazeBloom(Effect):
+    NEEDS_CALCULATION_TARGET: bool = True
+
     def __init__(self, frag: Frag, blur_size: int=0, threshold: Percentage=0,
                  bloom_color: ColorNormalized=(1, 1, 1), bloom_strength: float=1):
         super().__init__(frag)
@@ -32,15 +34,12 @@ class HazeBloom(Effect):
     @property
     def clone(self) -> 'HazeBloom':
         haze_bloom = HazeBloom(self.frag, self.blur_size, self.threshold, self.bloom_color, self.bloom_strength)
-        haze_bloom.target = self.calculation_target
+        haze_bloom.calculation_target = self.calculation_target
         haze_bloom.init()
 
         return haze_bloom
 
     def _update_frag(self) -> None:
-        if self.calculation_target is None:
-            raise Exception("target of HazeBloom not assigned")
-
         self.frag.attributes = {
             "tex": self.tex,
             "threshold": self.threshold
@@ -1,3 +1,8 @@
+from array import array
+
+import moderngl
+from moderngl import Program, Buffer, VertexArray
+
 from scenes.SPECIAL.Effects.Effect import Effect
 from scenes.SPECIAL.Effects.default.texture_calculator import TextureCalculator
 from scripts.GameTypes import ColorNormalized, Percentage, OperationType, FloatDoubleFBO
@@ -9,6 +14,13 @@ from scripts.Utilities.Graphics.light_gpu import LightGPU
 
 
 class Lighting(Effect):
+    NEEDS_CALCULATION_TARGET: bool = True
+    FLOAT_CALCULATION_TARGET: bool = True
+
+    # rect (x, y, w, h), center, size, area (radius, falloff, falloff inv, falloff speed), hill of peace, color
+    INSTANCE_FLOATS: int = 16
+    INITIAL_CAPACITY: int = 64
+
     def __init__(self, frag: Frag, ambient_color: ColorNormalized=(0., 0., 0.),
                  calculation_target: FloatDoubleFBO=None):
         super().__init__(frag)
@@ -20,9 +32,34 @@ class Lighting(Effect):
         self.ambient_color: ColorNormalized = ambient_color
         self.lights: set[LightGPU] = set()
 
+        self.program: Program = self.graphics.programs["lighting"]
+        self.capacity: int = 0
+        self.instance_buffer: Buffer = None
+        self.vao: VertexArray = None
+
+    def __del__(self) -> None:
+        self._release_instances()
+
     def init(self) -> None:
         self.texture_calculator = self.graphics.effects["texture_calculator"].clone
 
+        self._release_instances()
+        self.capacity = self.INITIAL_CAPACITY
+        self.instance_buffer = self.ctx.buffer(reserve=self.capacity * self.INSTANCE_FLOATS * 4, dynamic=True)
+        self.vao = self.ctx.vertex_array(self.program, [
+            (self.graphics.blit_uvs, '2f', 'corner'),
+            (self.instance_buffer, '4f 2f 2f 4f 1f 3f/i',
+             'rect', 'center', 'size', 'area', 'hill_of_peace', 'light_color')
+        ])
+
+    def _release_instances(self) -> None:
+        if self.vao is not None:
+            self.vao.release()
+            self.instance_buffer.release()
+
+        self.vao = None
+        self.instance_buffer = None
+
     @property
     def clone(self) -> 'Lighting':
         lighting = Lighting(self.frag, self.ambient_color, self.calculation_target)
@@ -61,30 +98,62 @@ class Lighting(Effect):
         self.texture_calculator.target = self.frag.target
         self.texture_calculator.operation = OperationType.MULTIPLY
 
-    def _execute_frag(self) -> None:
-        light_is_present, light_presences = self.get_light_presences()
-
-        if not light_is_present:
-            self.texture_calculator.execute()
-            self.frag.reset_attributes()
-            return
+    def get_light_instances(self, light_presences: list[tuple[LightGPU, bool]]) -> array:
+        instances: array = array('f')
+        display_rect: tuple[float, float, float, float] = (0, 0, *self.game.window.display_size)
 
         for light, presence in light_presences:
             if not presence:
                 continue
 
             effect_area: EffectArea = light.effect_area
-
             attributes: dict = effect_area.shader_attributes
-            attributes["aspect_ratio"] = self.game.window.aspect_ratio
 
-            attributes["tex_light"] = self.calculation_target.front
-            attributes["light_color"] = (*light.shader_light_color, 1.0)
+            # hill of peace lights everything outside the area, so it covers the whole display
+            rect: tuple[float, float, float, float] = display_rect if effect_area.hill_of_peace \
+                else tuple(effect_area.display_rect)
+
+            instances.extend((
+                *rect,
+                *attributes["center"],
+                *attributes["size"],
+                attributes["radius"], attributes["falloff"], attributes["falloff_inv"], attributes["falloff_speed"],
+                attributes["hill_of_peace"],
+                *light.shader_light_color
+            ))
+
+        return instances
+
+    def _reserve(self, instance_count: int) -> None:
+        if instance_count <= self.capacity:
+            return
+
+        while self.capacity < instance_count:
+            self.capacity *= 2
+
+        self.instance_buffer.orphan(self.capacity * self.INSTANCE_FLOATS * 4)
+
+    # every light in one instanced draw, each only covering its own area, blended additively
+    def _execute_frag(self) -> None:
+        light_is_present, light_presences = self.get_light_presences()
+
+        if light_is_present:
+            instances: array = self.get_light_instances(light_presences)
+            instance_count: int = len(instances) // self.INSTANCE_FLOATS
+
+            self._reserve(instance_count)
+            self.instance_buffer.orphan()
+            self.instance_buffer.write(instances)
+
+            gl_state: 'GLState' = self.graphics.gl_state
+            gl_state.set_uniform(self.program, "display_size", tuple(self.game.window.display_size))
+            gl_state.set_uniform(self.program, "aspect_ratio", self.game.window.aspect_ratio)
+            gl_state.set_blend(True, moderngl.FUNC_ADD, (moderngl.ONE, moderngl.ONE))
 
-            self.frag.attributes = attributes
+            self.calculation_target.use()
+            self.vao.render(moderngl.TRIANGLE_STRIP, vertices=4, instances=instance_count)
 
-            self.frag.target = self.calculation_target
-            self.frag.flip_fbo = False
-            self.frag.execute()
+            gl_state.set_blend(False)
 
         self.texture_calculator.execute()
+        self.frag.reset_attributes()
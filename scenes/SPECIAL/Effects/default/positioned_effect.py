@@ -1,5 +1,3 @@
-from pygame import Vector2
-
 from scenes.SPECIAL.Effects.Effect import Effect
 from scripts.Utilities.Graphics.double_framebuffer import DoubleFramebuffer
 from scripts.Utilities.Graphics.effect_area import EffectArea
@@ -7,6 +5,8 @@ from scripts.Utilities.Graphics.frag import Frag
 
 
 class PositionedEffect(Effect):
+    NEEDS_CALCULATION_TARGET: bool = True
+
     def __init__(self, frag: Frag, effect: Effect=None, effect_areas: set[EffectArea]=None,
                  calculation_target: DoubleFramebuffer=None):
         super().__init__(frag)
@@ -57,8 +57,8 @@ class PositionedEffect(Effect):
             self.frag.reset_attributes()
             return
 
-        self.calculation_target.use()
-        self.graphics.blit_texture(Vector2(), self._persistent_target.front)
+        # plain copy, no need for a shader pass
+        self.ctx.copy_framebuffer(self.calculation_target.fbo, self._persistent_target.fbo)
 
         self.effect.execute()
 
@@ -7,6 +7,9 @@ from scripts.Utilities.Graphics.kernel import Kernel
 
 
 class SobelEdges(Effect):
+    NEEDS_CALCULATION_TARGET: bool = True
+    FLOAT_CALCULATION_TARGET: bool = True
+
     def __init__(self, frag: Frag, preblur_pass_size: int=2,
                  edge_color: ColorNormalized=(1, 1, 1), edge_strength: float=1,
                  grayscale_edges: Percentage=1, edge_operation: OperationType=OperationType.EUCLID):
@@ -37,12 +40,10 @@ class SobelEdges(Effect):
 
         kernel: Kernel = Kernel(self.game)
         kernel.become_sobel_x()
-        self.convolution_x.kernel = kernel.texture
-        self.convolution_x.kernel_color_range = kernel.color_range
+        self.convolution_x.set_kernel(kernel)
 
         kernel.become_sobel_y()
-        self.convolution_y.kernel = kernel.texture
-        self.convolution_y.kernel_color_range = kernel.color_range
+        self.convolution_y.set_kernel(kernel)
 
     @property
     def clone(self) -> 'SobelEdges':
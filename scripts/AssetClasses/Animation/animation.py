@@ -1,5 +1,8 @@
+from bisect import bisect_left
+
 import pygame
-from scripts.GameTypes import Resolution
+from scripts.AssetClasses.Animation.animation_clock import AnimationClock
+from scripts.GameTypes import Resolution, TimelineTime
 from scripts.Utilities.Flow.timeline import Timeline
 
 
@@ -9,6 +12,16 @@ class Animation:
                  flipped_generated: bool=False, timeline: Timeline=None):
         self._reversed: bool = False
 
+        # set to read the frame off a shared clock instead of update_time / advance_frame, phase shifts it in time
+        self.clock: AnimationClock | None = None
+        self.phase: TimelineTime = 0
+
+        # frames in play order (loop, pong, reversed applied) and when each ends, for frame_at
+        self._frame_table_key: tuple | None = None
+        self._frame_sequence: list[int] = []
+        self._frame_ends: list[float] = []
+        self._current_frame: int = 0
+
         self.game: 'Game' = game
         self.frames: list[pygame.Surface] = frames
         # 0-flip_x 1-flip_y 2-flip_xy
@@ -36,6 +49,59 @@ class Animation:
         self.flip_y: bool = flip_y
         self.reversed = reversed_
 
+    @property
+    def current_frame(self) -> int:
+        if self.clock is not None:
+            return self.frame_at(self.clock.time + self.phase)
+
+        return self._current_frame
+
+    @current_frame.setter
+    def current_frame(self, current_frame: int) -> None:
+        self._current_frame = current_frame
+
+    # pong only bounces while looping, a single play stops at the end like update_time does
+    # assign frame_durations anew rather than changing it in place, the table is kept per list
+    def _build_frame_table(self) -> None:
+        key: tuple = (self.loop, self.pong, self._reversed, id(self.frame_durations), len(self.frame_durations))
+        if key == self._frame_table_key:
+            return
+
+        sequence: list[int] = list(range(len(self.frames)))
+        if self._reversed:
+            sequence.reverse()
+        if self.pong and self.loop:
+            sequence += sequence[::-1]
+
+        ends: list[float] = []
+        end: float = 0
+        for frame in sequence:
+            end += self.frame_durations[frame]
+            ends.append(end)
+
+        self._frame_table_key = key
+        self._frame_sequence = sequence
+        self._frame_ends = ends
+
+    # frame shown time into the animation, a frame lasts until the time its duration ends, inclusive
+    def frame_at(self, time: TimelineTime) -> int:
+        self._build_frame_table()
+        period: float = self._frame_ends[-1]
+
+        if period <= 0:
+            return self._frame_sequence[0]
+
+        if self.loop:
+            time %= period
+        elif time >= period:
+            return self._frame_sequence[-1]
+
+        return self._frame_sequence[min(bisect_left(self._frame_ends, time), len(self._frame_sequence) - 1)]
+
+    def use_clock(self, clock: AnimationClock | None) -> None:
+        self.clock = clock
+        self.phase = 0 if clock is None else -clock.time
+
     @property
     def reversed(self) -> bool:
         return self._reversed
@@ -90,6 +156,9 @@ class Animation:
         self._flipped_generated = True
 
     def reset(self) -> None:
+        if self.clock is not None:
+            self.phase = -self.clock.time
+
         self.animation_time: float = 0
         self.frame_time: float = 0
         self.current_frame: int = 0
@@ -104,7 +173,7 @@ class Animation:
         self.current_frame = len(self.frames) - 1 - self.current_frame
 
     def update_time(self) -> None:
-        if self.ended:
+        if self.ended or self.clock is not None:
             return
 
         self.animation_time += self.timeline.dt * self.frame_direction
@@ -121,7 +190,7 @@ class Animation:
             self._advance_current_frame()
 
     def advance_frame(self) -> None:
-        if self.ended:
+        if self.ended or self.clock is not None:
             return
 
         self.animation_time += self.frame_durations[self.current_frame] - self.frame_time
@@ -154,6 +223,9 @@ class Animation:
         if self.flipped_generated:
             animation.flipped_frames = self.flipped_frames
 
+        animation.clock = self.clock
+        animation.phase = self.phase
+
         return animation
 
     @property
@@ -196,12 +268,15 @@ class Animation:
 
     @property
     def image(self) -> pygame.Surface:
+        return self.frame_image(self.current_frame)
+
+    def frame_image(self, frame: int) -> pygame.Surface:
         flip_index = (1 if self.flip_x else 0) + (2 if self.flip_y else 0)
 
         if flip_index == 0:
-            return self.frames[self.current_frame]
+            return self.frames[frame]
         else:
-            return self.flipped_frames[flip_index-1][self.current_frame]
+            return self.flipped_frames[flip_index-1][frame]
 
     @property
     def size(self) -> Resolution:
@@ -0,0 +1,24 @@
+from scripts.GameTypes import TimelineTime
+from scripts.Utilities.Flow.timeline import Timeline
+
+
+# time many animations read their frame from instead of each being ticked, see Animation.clock
+# assets has one, advanced once per frame
+class AnimationClock:
+    def __init__(self, game: 'Game', timeline: Timeline=None):
+        self.game: 'Game' = game
+        self.timeline: Timeline = timeline if timeline is not None else Timeline.blank(game)
+        self.time: TimelineTime = 0
+
+    @property
+    def as_string(self) -> str:
+        return f"time: {round(self.time, 2)}, timeline: {self.timeline.name}"
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+    def update(self) -> None:
+        self.time += self.timeline.dt
@@ -1,53 +1,88 @@
-from scripts.AssetClasses.Tilemap.grid import Grid
 from scripts.AssetClasses.Tilemap.Tiles.tile import Tile
 import pygame
 
 from scripts.AssetClasses.Animation.animation import Animation
-from scripts.GameTypes import Percentage, TilePosition
+from scripts.GameTypes import Percentage, TilePosition, TimelineTime
 
 
 class AnimatedTile(Tile):
+    __slots__ = ("animation", "uncloned_animation", "animation_cloned", "phase", "_last_alpha_animation_frame")
+
     def __init__(self, grid: 'Grid', animation: Animation, position: TilePosition,
                  offgrid: bool, clone_animation: bool, alpha: Percentage, groups: set[str] | None=None):
         super().__init__(grid, None, position, offgrid, alpha, groups)
 
-        self.animation: Animation = animation
         self.uncloned_animation: Animation = animation
         self.animation_cloned: bool = clone_animation
-
-        if clone_animation:
-            self.animation = self.animation.clone
+        self.bind_animation()
 
         self._last_alpha_animation_frame: int = -1
 
+    # a tile with its own animation gets a clone of it, or only a phase on it when it runs on a clock,
+    # call after the uncloned animation starts or stops using a clock
+    def bind_animation(self) -> None:
+        self.animation: Animation = self.uncloned_animation
+        self.phase: TimelineTime | None = None
+
+        if not self.animation_cloned:
+            return
+
+        if self.uncloned_animation.clock is not None:
+            self.phase = -self.uncloned_animation.clock.time
+        else:
+            self.animation = self.uncloned_animation.clone
+
+    @property
+    def current_frame(self) -> int:
+        if self.phase is None:
+            return self.animation.current_frame
+
+        return self.animation.frame_at(self.animation.clock.time + self.phase)
+
     @property
     def alpha_image(self) -> pygame.Surface:
         if self._used_alpha == 255:
-            return self.animation.image
+            return self.image
 
-        frame_changed: bool = self._last_alpha_animation_frame != self.animation.current_frame
+        current_frame: int = self.current_frame
+        frame_changed: bool = self._last_alpha_animation_frame != current_frame
 
         if frame_changed:
-            self._last_alpha_animation_frame = self.animation.current_frame
+            self._last_alpha_animation_frame = current_frame
             self._redo_image = True
 
         if not self._redo_image and self._alpha_image is not None:
             return self._alpha_image
 
         if self._alpha_image is None or frame_changed:
-            self._alpha_image = self.animation.image.copy()
+            self._alpha_image = self.animation.frame_image(current_frame).copy()
 
         self._alpha_image.set_alpha(self.used_alpha)
         return self._alpha_image
 
     @property
     def image(self) -> pygame.Surface:
-        return self.animation.image
+        if self.phase is None:
+            return self.animation.image
+
+        return self.animation.frame_image(self.current_frame)
 
     @property
     def clone(self) -> 'AnimatedTile':
         return self.game.utilities.load_tile(self.as_json, self.grid, self.offgrid)
 
+    def _copy_state(self, tile: 'AnimatedTile', grid: 'Grid', animations: dict[Animation, Animation] | None) -> None:
+        super()._copy_state(tile, grid, animations)
+
+        uncloned: Animation = self.uncloned_animation
+        if animations is not None:
+            uncloned = animations.get(uncloned, uncloned)
+
+        tile.uncloned_animation = uncloned
+        tile.animation_cloned = self.animation_cloned
+        tile.bind_animation()
+        tile._last_alpha_animation_frame = -1
+
     @property
     def as_json(self) -> dict:
         as_json: dict = {
@@ -65,7 +100,7 @@ class AnimatedTile(Tile):
             as_json["groups"] = list(self.groups)
 
         if len(self.components) > 0:
-            as_json["components"] = [component.as_json for component in self.components.values()]
+            as_json["components"] = [component.as_json for component in self.components]
 
         return as_json
 
@@ -24,6 +24,11 @@ class ColorTileComponent(TileComponent):
         self._color = new_color
         self._colored_image.fill(self._color)
 
+        if self.tile.game.window.opengl:
+            self.tile.game.graphics.tile_renderer.forget_surface(self._colored_image)
+
+        self.tile.grid.invalidate_tile(self.tile)
+
     @property
     def as_json(self) -> dict:
         return {
@@ -2,29 +2,44 @@ import pygame
 
 from scripts.AssetClasses.Tilemap.Tiles.tile_component import TileComponent
 from scripts.GameTypes import TilePosition, WorldPosition, DisplayPosition, GridPosition, OffgridTilePosition, \
-    Percentage, Resolution, WorldRect, GridRect
+    Percentage, Resolution, WorldRect, GridRect, DisplayVector
 
 
+# maps hold a lot of tiles, so no __dict__ and nothing stored per tile that most tiles share
 class Tile:
+    # shared by tiles without any, assign a new set / list instead of adding to them
+    EMPTY_GROUPS: frozenset[str] = frozenset()
+    EMPTY_COMPONENTS: tuple[TileComponent, ...] = ()
+
+    __slots__ = ("grid", "_image", "position", "offgrid", "alpha", "groups", "components",
+                 "_used_alpha", "_alpha_image", "_redo_image",
+                 "_blit_position_function", "_blit_image_function", "_alpha_image_function", "_offgrid_size_function",
+                 "_geometry_key", "_grid_rect", "_rect")
+
     def __init__(self, grid: 'Grid', image: pygame.Surface, position: TilePosition,
                  offgrid: bool, alpha: Percentage, groups: set[str] | None=None):
-        self.game = grid.game
         self.grid: 'Grid' = grid
         self._image: pygame.Surface = image
         self.position: TilePosition | OffgridTilePosition = position
         self.offgrid: bool = offgrid
         self.alpha: Percentage = alpha
-        self.groups: set[str] = set() if groups is None else groups
-        self.components: list[TileComponent] = []
+        self.groups: set[str] | frozenset[str] = self.EMPTY_GROUPS if groups is None else groups
+        self.components: list[TileComponent] | tuple[TileComponent, ...] = self.EMPTY_COMPONENTS
 
         self._used_alpha: int = round(255 * self.alpha)
         self._alpha_image: pygame.Surface | None = None
         self._redo_image: bool = True
 
-        self.blit_position_function: callable = self.get_blit_position
-        self.blit_image_function: callable = self.get_blit_image
-        self.alpha_image_function: callable = self.get_alpha_image
-        self.offgrid_size_function: callable = self.get_offgrid_size
+        # None uses the get_ method of the class, set the matching _function property to override per tile
+        self._blit_position_function: callable = None
+        self._blit_image_function: callable = None
+        self._alpha_image_function: callable = None
+        self._offgrid_size_function: callable = None
+
+        # rects cached for (position, grid geometry version, tilemap position version), see _update_geometry
+        self._geometry_key: tuple | None = None
+        self._grid_rect: GridRect | None = None
+        self._rect: WorldRect | None = None
 
         # ongrid size is just tile_size
         # unite rects and images for ongrid?
@@ -37,10 +52,46 @@ class Tile:
         # on_need_basis when well need grass well see, for now leave, maybe just add blit rects
         # in particular blit_rect() and world_blit_rect()
 
+    @property
+    def game(self) -> 'Game':
+        return self.grid.game
+
     @property
     def image(self) -> pygame.Surface:
         return self._image
 
+    @property
+    def blit_position_function(self) -> callable:
+        return self._blit_position_function or self.get_blit_position
+
+    @blit_position_function.setter
+    def blit_position_function(self, function: callable) -> None:
+        self._blit_position_function = function
+
+    @property
+    def blit_image_function(self) -> callable:
+        return self._blit_image_function or self.get_blit_image
+
+    @blit_image_function.setter
+    def blit_image_function(self, function: callable) -> None:
+        self._blit_image_function = function
+
+    @property
+    def alpha_image_function(self) -> callable:
+        return self._alpha_image_function or self.get_alpha_image
+
+    @alpha_image_function.setter
+    def alpha_image_function(self, function: callable) -> None:
+        self._alpha_image_function = function
+
+    @property
+    def offgrid_size_function(self) -> callable:
+        return self._offgrid_size_function or self.get_offgrid_size
+
+    @offgrid_size_function.setter
+    def offgrid_size_function(self, function: callable) -> None:
+        self._offgrid_size_function = function
+
     @property
     def used_alpha(self) -> int:
         return self._used_alpha
@@ -79,6 +130,40 @@ class Tile:
     def clone(self) -> 'Tile':
         return self.game.utilities.load_tile(self.as_json, self.grid, self.offgrid)
 
+    # the same tile for another grid without going through json, animations maps animations of
+    # the source tilemap to the ones of grid's tilemap, components are loaded again for the copy
+    def copy_to(self, grid: 'Grid', animations: dict['Animation', 'Animation'] | None=None) -> 'Tile':
+        tile: Tile = object.__new__(type(self))
+        self._copy_state(tile, grid, animations)
+
+        if self.components:
+            tile.components = [type(component).load(component.as_json, tile) for component in self.components]
+
+        return tile
+
+    # everything but components, per tile overrides are left to the components that set them, like load_tile does
+    def _copy_state(self, tile: 'Tile', grid: 'Grid', animations: dict['Animation', 'Animation'] | None) -> None:
+        tile.grid = grid
+        tile._image = self._image
+        tile.position = self.position
+        tile.offgrid = self.offgrid
+        tile.alpha = self.alpha
+        tile.groups = set(self.groups) if self.groups else self.EMPTY_GROUPS
+        tile.components = self.EMPTY_COMPONENTS
+
+        tile._used_alpha = round(255 * self.alpha)
+        tile._alpha_image = None
+        tile._redo_image = True
+
+        tile._blit_position_function = None
+        tile._blit_image_function = None
+        tile._alpha_image_function = None
+        tile._offgrid_size_function = None
+
+        tile._geometry_key = None
+        tile._grid_rect = None
+        tile._rect = None
+
     @property
     def as_json(self) -> dict:
         as_json: dict =  {
@@ -112,20 +197,57 @@ class Tile:
     def __str__(self):
         return self.as_string
 
-    @property
-    def grid_position(self) -> GridPosition:
+    # cached rects are shared, copy them before changing them
+    def _update_geometry(self) -> None:
+        key: tuple = (self.position, self.grid.geometry_version, self.grid.tilemap.position_version)
+        if key == self._geometry_key:
+            return
+
         if self.offgrid:
-            return pygame.math.Vector2(*self.position)
+            self._grid_rect = pygame.FRect(*self.position, *self.offgrid_size_function(self))
         else:
-            return self.grid.position_tile_to_grid(self.position)
+            tile_size: int = self.grid.tile_size
+            self._grid_rect = pygame.FRect(self.position[0] * tile_size, self.position[1] * tile_size,
+                                           tile_size, tile_size)
+
+        # depth grids move in the world with the camera, their world rects are not cached
+        self._rect = None if self.grid.use_depth else self._grid_rect.move(self.grid.tilemap.position)
+        self._geometry_key = key
+
+    # call when the size of an offgrid tile changes, or position is changed in place
+    def forget_geometry(self) -> None:
+        self._geometry_key = None
+
+    @property
+    def grid_position(self) -> GridPosition:
+        self._update_geometry()
+        return pygame.math.Vector2(self._grid_rect.topleft)
 
     @property
     def world_position(self) -> WorldPosition:
-        return self.grid.position_grid_to_world(self.grid_position)
+        return self.grid_position + self.grid.world_offset
 
     @property
     def display_position(self) -> DisplayPosition:
-        return self.grid.position_grid_to_display(self.grid_position)
+        self._update_geometry()
+        offset: DisplayVector = self.grid.display_offset
+
+        return pygame.math.Vector2(self._grid_rect.x + offset.x, self._grid_rect.y + offset.y)
+
+    # offset is the grid display offset, grids blitting many tiles take it once and pass it
+    # a blit position function set on the tile is still used
+    def blit_position_at(self, offset: DisplayVector | None=None) -> DisplayPosition:
+        if self._blit_position_function is not None:
+            return self._blit_position_function(self)
+
+        if offset is None:
+            offset = self.grid.display_offset
+
+        self._update_geometry()
+        return self._grid_rect.x + offset[0], self._grid_rect.y + offset[1]
+
+    def blit_pair(self, offset: DisplayVector | None=None) -> tuple[pygame.Surface, DisplayPosition]:
+        return self.blit_image_function(self), self.blit_position_at(offset)
 
     def get_blit_position(self, _: 'Tile') -> DisplayPosition:
         return self.display_position
@@ -141,28 +263,34 @@ class Tile:
 
     @property
     def grid_rect(self) -> GridRect:
-        return pygame.FRect(*self.grid_position, *self.size)
+        self._update_geometry()
+        return self._grid_rect
 
     @property
     def rect(self) -> WorldRect:
-        return pygame.FRect(*self.world_position, *self.size)
+        self._update_geometry()
+
+        if self._rect is None:
+            return self._grid_rect.move(self.grid.world_offset)
+
+        return self._rect
 
     @property
     def renderable(self) -> bool:
         return self.alpha != 0
 
-    def blit(self) -> None:
+    def blit(self, offset: DisplayVector | None=None) -> None:
         if not self.renderable:
             return
 
         self.game.window.display.blit(self.blit_image_function(self),
-                                      self.blit_position_function(self))
+                                      self.blit_position_at(offset))
 
-    def blit_faded(self, alpha: Percentage) -> None:
+    def blit_faded(self, alpha: Percentage, offset: DisplayVector | None=None) -> None:
         if not self.renderable:
             return
 
         self.used_alpha = alpha * self.alpha
 
         self.game.window.display.blit(self.alpha_image_function(self),
-                                      self.blit_position_function(self))
+                                      self.blit_position_at(offset))
@@ -0,0 +1,268 @@
+import io
+import json
+import os
+import struct
+import sys
+import zlib
+from typing import BinaryIO
+
+import numpy as np
+
+Region = tuple[int, int]
+
+
+# versioned binary counterpart of the tilemap json (.mtm)
+#
+# version 2 file: MAGIC, version u16, flags u16, header length u32, header json, then region blocks
+# the header holds everything except tiles: tilemap and grid settings, the name table of [kind, name] pairs
+# tiles index into, and per grid its regions as [region x, region y, block offset, block length],
+# offsets counting from the end of the header
+#
+# a region is REGION_SIZE x REGION_SIZE tiles (offgrid tiles belong to the region their position is in),
+# its block is zlib compressed when FLAG_ZLIB is set and holds: block header length u32, block header json
+# with per section tile counts and extras, extras being whatever else a tile's json has (alpha, groups,
+# components...) keyed by row, then for every section in SECTIONS:
+#   positions (count x 2, int32 for ongrid, float64 for offgrid) and name indices (count, int32)
+#
+# regions decode on their own, so a map can be streamed in around the camera (TilemapStreamer)
+class BinaryTilemap:
+    EXTENSION: str = ".mtm"
+    MAGIC: bytes = b"MTM\0"
+    VERSION: int = 2
+    FLAG_ZLIB: int = 1
+    REGION_SIZE: int = 32
+
+    SECTIONS: tuple[str, ...] = ("tiles", "offgrid background", "offgrid foreground")
+    NAME_KINDS: tuple[str, ...] = ("image", "animation")
+
+    @staticmethod
+    def is_binary_path(path: str) -> bool:
+        return path.endswith(BinaryTilemap.EXTENSION)
+
+    @staticmethod
+    def position_dtype(section: str) -> type:
+        return np.int32 if section == "tiles" else np.float64
+
+    # region side in grid units, ongrid positions are in tiles, offgrid ones in grid units
+    @staticmethod
+    def region_of(position: list[float], section: str, tile_size: int) -> Region:
+        side: int = BinaryTilemap.REGION_SIZE if section == "tiles" else BinaryTilemap.REGION_SIZE * tile_size
+        return int(position[0] // side), int(position[1] // side)
+
+    # tilemap_data is what Tilemap.as_json gives
+    @staticmethod
+    def encode(tilemap_data: dict, compress: bool=True) -> bytes:
+        names: list[list[str]] = []
+        name_indices: dict[tuple[str, str], int] = {}
+
+        header: dict = {key: value for key, value in tilemap_data.items() if key != "grids"}
+        header["grids"] = []
+        grid_blocks: list[dict[Region, bytes]] = []
+
+        for grid_data in tilemap_data["grids"]:
+            header["grids"].append({key: value for key, value in grid_data.items()
+                                    if key not in BinaryTilemap.SECTIONS})
+            grid_blocks.append({
+                region: BinaryTilemap.encode_region(region_data, names, name_indices, compress)
+                for region, region_data in BinaryTilemap.group_by_region(grid_data).items()
+            })
+
+        return b"".join(BinaryTilemap.pack(header, grid_blocks, names, compress))
+
+    # tile jsons of grid_data per region and section
+    @staticmethod
+    def group_by_region(grid_data: dict) -> dict[Region, dict[str, list[dict]]]:
+        regions: dict[Region, dict[str, list[dict]]] = {}
+
+        for section in BinaryTilemap.SECTIONS:
+            for tile_data in grid_data[section]:
+                position: list[float] = [float(value) for value in tile_data["position"].split(";")]
+                region: Region = BinaryTilemap.region_of(position, section, grid_data["tile size"])
+
+                if region not in regions:
+                    regions[region] = {section: [] for section in BinaryTilemap.SECTIONS}
+
+                regions[region][section].append(tile_data)
+
+        return regions
+
+    # file contents in parts, header has the tilemap settings and "grids" with grid settings,
+    # grid_blocks the encoded regions of every grid in the same order, names is the name table they index into
+    @staticmethod
+    def pack(header: dict, grid_blocks: list[dict[Region, bytes]], names: list[list[str]],
+             compress: bool=True) -> list[bytes]:
+        grid_headers: list[dict] = []
+        blocks: list[bytes] = []
+        offset: int = 0
+
+        for grid_header, regions in zip(header["grids"], grid_blocks):
+            grid_header = dict(grid_header)
+            grid_header["regions"] = []
+
+            for region, block in regions.items():
+                grid_header["regions"].append([region[0], region[1], offset, len(block)])
+
+                blocks.append(block)
+                offset += len(block)
+
+            grid_headers.append(grid_header)
+
+        header = dict(header)
+        header["grids"] = grid_headers
+        header["names"] = names
+
+        header_bytes: bytes = json.dumps(header, separators=(',', ':')).encode("utf-8")
+        flags: int = BinaryTilemap.FLAG_ZLIB if compress else 0
+
+        return [BinaryTilemap.MAGIC + struct.pack("<HHI", BinaryTilemap.VERSION, flags, len(header_bytes)),
+                header_bytes] + blocks
+
+    # region_data has tile jsons per section, names and name_indices get extended with new names
+    @staticmethod
+    def encode_region(region_data: dict[str, list[dict]], names: list[list[str]],
+                      name_indices: dict[tuple[str, str], int], compress: bool=True) -> bytes:
+        block_header: dict = {"counts": [], "extras": {}}
+        arrays: list[bytes] = []
+
+        for section in BinaryTilemap.SECTIONS:
+            positions: list[list[float]] = []
+            tile_names: list[int] = []
+            extras: dict[str, dict] = {}
+
+            for row, tile_data in enumerate(region_data[section]):
+                kind: str = "image" if "image" in tile_data else "animation"
+                key: tuple[str, str] = (kind, tile_data[kind])
+
+                if key not in name_indices:
+                    name_indices[key] = len(names)
+                    names.append(list(key))
+
+                positions.append([float(value) for value in tile_data["position"].split(";")])
+                tile_names.append(name_indices[key])
+
+                extra: dict = {key: value for key, value in tile_data.items()
+                               if key not in ("position", *BinaryTilemap.NAME_KINDS)}
+                if extra:
+                    extras[str(row)] = extra
+
+            block_header["counts"].append(len(positions))
+            if extras:
+                block_header["extras"][section] = extras
+
+            arrays.append(np.array(positions, dtype=BinaryTilemap.position_dtype(section)).reshape(-1, 2).tobytes())
+            arrays.append(np.array(tile_names, dtype=np.int32).tobytes())
+
+        block_header_bytes: bytes = json.dumps(block_header, separators=(',', ':')).encode("utf-8")
+        block: bytes = struct.pack("<I", len(block_header_bytes)) + block_header_bytes + b"".join(arrays)
+
+        return zlib.compress(block, 6) if compress else block
+
+    # per section "count", "extras", "positions" and "name indices"
+    @staticmethod
+    def decode_region(block: bytes, flags: int) -> dict[str, dict]:
+        if flags & BinaryTilemap.FLAG_ZLIB:
+            block = zlib.decompress(block)
+
+        block_header_length: int = struct.unpack_from("<I", block, 0)[0]
+        block_header: dict = json.loads(block[4:4 + block_header_length].decode("utf-8"))
+        offset: int = 4 + block_header_length
+
+        sections: dict[str, dict] = {}
+        for section, count in zip(BinaryTilemap.SECTIONS, block_header["counts"]):
+            dtype: np.dtype = np.dtype(BinaryTilemap.position_dtype(section))
+
+            positions: np.ndarray = np.frombuffer(block, dtype, count * 2, offset).reshape(count, 2)
+            offset += count * 2 * dtype.itemsize
+
+            name_indices: np.ndarray = np.frombuffer(block, np.int32, count, offset)
+            offset += count * 4
+
+            sections[section] = {
+                "count": count,
+                "extras": block_header["extras"].get(section, {}),
+                "positions": positions,
+                "name indices": name_indices
+            }
+
+        return sections
+
+    # version and flags of any version
+    @staticmethod
+    def read_version(data: bytes) -> tuple[int, int]:
+        assert data[:len(BinaryTilemap.MAGIC)] == BinaryTilemap.MAGIC, "not a binary tilemap"
+        return struct.unpack_from("<HH", data, len(BinaryTilemap.MAGIC))
+
+    # header, flags and where region block offsets count from, only reads the header
+    @staticmethod
+    def read_header(file: BinaryIO) -> tuple[dict, int, int]:
+        start: bytes = file.read(len(BinaryTilemap.MAGIC) + 8)
+        assert start[:len(BinaryTilemap.MAGIC)] == BinaryTilemap.MAGIC, "not a binary tilemap"
+
+        version, flags, header_length = struct.unpack_from("<HHI", start, len(BinaryTilemap.MAGIC))
+        assert version == BinaryTilemap.VERSION, f"binary tilemap version {version} has no region header"
+
+        header: dict = json.loads(file.read(header_length).decode("utf-8"))
+        return header, flags, len(start) + header_length
+
+    # header dict with "names", every grid gets "sections" with "count", "extras",
+    # "positions" and "name indices" of all its regions together
+    @staticmethod
+    def decode(data: bytes) -> dict:
+        version: int = BinaryTilemap.read_version(data)[0]
+        assert version == BinaryTilemap.VERSION, f"binary tilemap version {version} is not supported"
+
+        header, flags, blocks_offset = BinaryTilemap.read_header(io.BytesIO(data))
+
+        for grid_header in header["grids"]:
+            regions: list[dict[str, dict]] = [
+                BinaryTilemap.decode_region(data[blocks_offset + offset:blocks_offset + offset + length], flags)
+                for _, _, offset, length in grid_header["regions"]
+            ]
+
+            grid_header["sections"] = {}
+            for section in BinaryTilemap.SECTIONS:
+                extras: dict[str, dict] = {}
+                row_offset: int = 0
+
+                for region in regions:
+                    for row, extra in region[section]["extras"].items():
+                        extras[str(int(row) + row_offset)] = extra
+
+                    row_offset += region[section]["count"]
+
+                dtype: type = BinaryTilemap.position_dtype(section)
+                grid_header["sections"][section] = {
+                    "count": row_offset,
+                    "extras": extras,
+                    "positions": np.concatenate([region[section]["positions"] for region in regions]
+                                                + [np.zeros((0, 2), dtype=dtype)]),
+                    "name indices": np.concatenate([region[section]["name indices"] for region in regions]
+                                                   + [np.zeros(0, dtype=np.int32)])
+                }
+
+        return header
+
+    # writes the .mtm next to a tilemap json, returns its path
+    @staticmethod
+    def convert(json_path: str, compress: bool=True) -> str:
+        with open(json_path, "r") as f:
+            tilemap_data: dict = json.load(f)
+
+        binary_path: str = os.path.splitext(json_path)[0] + BinaryTilemap.EXTENSION
+        with open(binary_path, "wb") as f:
+            f.write(BinaryTilemap.encode(tilemap_data, compress))
+
+        return binary_path
+
+
+# python -m scripts.AssetClasses.Tilemap.binary_tilemap [tilemap.json ...], every json in tilemaps when none given
+if __name__ == '__main__':
+    paths: list[str] = sys.argv[1:]
+
+    if not paths:
+        for directory, _, files in os.walk("tilemaps"):
+            paths += [os.path.join(directory, file) for file in files if file.endswith(".json")]
+
+    for path in paths:
+        converted: str = BinaryTilemap.convert(path)
+        print(f"[LOG] {path} ({os.path.getsize(path)} B) -> {converted} ({os.path.getsize(converted)} B)")
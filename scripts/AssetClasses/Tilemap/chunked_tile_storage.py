@@ -0,0 +1,343 @@
+import numpy as np
+
+from scripts.AssetClasses.Tilemap.Tiles.tile import Tile
+from scripts.GameTypes import TilePosition, IntRange
+
+ChunkPosition = tuple[int, int]
+
+
+# ongrid tiles of a grid, behaves like dict[TilePosition, Tile]
+# chunks are CHUNK_SIZE x CHUNK_SIZE arrays of indices into a tile table, 0 meaning empty,
+# so range queries slice arrays instead of probing every cell
+class ChunkedTileStorage:
+    CHUNK_SIZE: int = 16
+
+    def __init__(self):
+        self.chunks: dict[ChunkPosition, np.ndarray] = {}
+        self.chunk_counts: dict[ChunkPosition, int] = {}
+
+        # index 0 is reserved for empty cells
+        self.table: list[Tile | None] = [None]
+        self.positions: list[TilePosition | None] = [None]
+        self.free_indices: list[int] = []
+
+        self.count: int = 0
+
+        # chunk arrays another storage may hold too since copy, copied before the first write
+        self.shared_chunks: set[ChunkPosition] = set()
+
+        # bumped whenever a cell changes between empty and filled or gets another index
+        self.version: int = 0
+        self._stacked_version: int = -1
+        self._stacked_origin: ChunkPosition = (0, 0)
+        self._stacked_slots: np.ndarray = np.full((0, 0), -1, dtype=np.int32)
+        self._stacked_chunks: np.ndarray = np.zeros((0, self.CHUNK_SIZE, self.CHUNK_SIZE), dtype=np.int32)
+
+    @property
+    def as_string(self) -> str:
+        return (f"tiles: {self.count}, "
+                f"chunks: {len(self.chunks)}, "
+                f"chunk size: {self.CHUNK_SIZE}, "
+                f"table size: {len(self.table)}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+    # positions may come in as whole floats (gridcaster), like dict keys they address the same cell
+    def _locate(self, position: TilePosition) -> tuple[ChunkPosition, int, int]:
+        x, y = int(position[0]), int(position[1])
+        return (x // self.CHUNK_SIZE, y // self.CHUNK_SIZE), x % self.CHUNK_SIZE, y % self.CHUNK_SIZE
+
+    def _index_at(self, position: TilePosition) -> int:
+        chunk_position, x, y = self._locate(position)
+        chunk: np.ndarray | None = self.chunks.get(chunk_position)
+
+        if chunk is None:
+            return 0
+
+        return int(chunk[x, y])
+
+    def __len__(self) -> int:
+        return self.count
+
+    # storage with the same cells, copy_tile makes the tile for it out of each of ours,
+    # chunk arrays are shared between the two until either writes to one
+    def copy(self, copy_tile: callable) -> 'ChunkedTileStorage':
+        storage: ChunkedTileStorage = ChunkedTileStorage()
+
+        storage.chunks = dict(self.chunks)
+        storage.chunk_counts = dict(self.chunk_counts)
+        storage.table = [None if tile is None else copy_tile(tile) for tile in self.table]
+        storage.positions = list(self.positions)
+        storage.free_indices = list(self.free_indices)
+        storage.count = self.count
+
+        storage.shared_chunks = set(self.chunks)
+        self.shared_chunks.update(self.chunks)
+
+        return storage
+
+    def _writable_chunk(self, chunk_position: ChunkPosition) -> np.ndarray:
+        chunk: np.ndarray = self.chunks[chunk_position]
+
+        if chunk_position in self.shared_chunks:
+            chunk = chunk.copy()
+            self.chunks[chunk_position] = chunk
+            self.shared_chunks.discard(chunk_position)
+
+        return chunk
+
+    def __contains__(self, position: TilePosition) -> bool:
+        return self._index_at(position) != 0
+
+    def __getitem__(self, position: TilePosition) -> Tile:
+        index: int = self._index_at(position)
+        if index == 0:
+            raise KeyError(position)
+
+        return self.table[index]
+
+    def get(self, position: TilePosition, default: Tile | None=None) -> Tile | None:
+        index: int = self._index_at(position)
+        return self.table[index] if index != 0 else default
+
+    def __setitem__(self, position: TilePosition, tile: Tile) -> None:
+        chunk_position, x, y = self._locate(position)
+        position = (int(position[0]), int(position[1]))
+        chunk: np.ndarray | None = self.chunks.get(chunk_position)
+
+        if chunk is None:
+            chunk = np.zeros((self.CHUNK_SIZE, self.CHUNK_SIZE), dtype=np.int32)
+            self.chunks[chunk_position] = chunk
+            self.chunk_counts[chunk_position] = 0
+
+        index: int = int(chunk[x, y])
+        if index != 0:
+            self.table[index] = tile
+            return
+
+        if self.free_indices:
+            index = self.free_indices.pop()
+            self.table[index] = tile
+            self.positions[index] = position
+        else:
+            index = len(self.table)
+            self.table.append(tile)
+            self.positions.append(position)
+
+        chunk = self._writable_chunk(chunk_position)
+        chunk[x, y] = index
+        self.chunk_counts[chunk_position] += 1
+        self.count += 1
+        self.version += 1
+
+    # same as setting tiles one by one, later tiles win over earlier ones at the same position
+    def set_many(self, positions: np.ndarray, tiles: list[Tile]) -> None:
+        assert len(positions) == len(tiles)
+        if len(tiles) == 0:
+            return
+
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+
+        # last occurrence of each position, positions packed into one int64 as unique over rows is slow
+        keys: np.ndarray = positions[:, 0] * (1 << 32) + positions[:, 1]
+        _, last_reversed = np.unique(keys[::-1], return_index=True)
+        keep: np.ndarray = np.sort(len(positions) - 1 - last_reversed)
+        positions = positions[keep]
+        tiles = [tiles[i] for i in keep.tolist()]
+
+        # already filled cells only swap the tile, like __setitem__
+        found: np.ndarray = self.lookup(positions[:, 0], positions[:, 1])
+        new_tiles: list[Tile] = []
+        for tile, index in zip(tiles, found.tolist()):
+            if index != 0:
+                self.table[index] = tile
+            else:
+                new_tiles.append(tile)
+
+        positions = positions[found == 0]
+        if len(positions) == 0:
+            return
+
+        indices: np.ndarray = np.arange(len(self.table), len(self.table) + len(positions), dtype=np.int32)
+        self.table += new_tiles
+        self.positions += list(zip(positions[:, 0].tolist(), positions[:, 1].tolist()))
+
+        chunk_positions: np.ndarray = positions // self.CHUNK_SIZE
+        local_positions: np.ndarray = positions % self.CHUNK_SIZE
+
+        chunk_keys: np.ndarray = chunk_positions[:, 0] * (1 << 32) + chunk_positions[:, 1]
+        order: np.ndarray = np.argsort(chunk_keys, kind="stable")
+        starts: np.ndarray = np.flatnonzero(np.diff(chunk_keys[order], prepend=chunk_keys[order[0]] - 1))
+        bounds: list[int] = starts.tolist() + [len(order)]
+
+        for i, start in enumerate(starts.tolist()):
+            selected: np.ndarray = order[start:bounds[i + 1]]
+            chunk_x, chunk_y = chunk_positions[selected[0]].tolist()
+            if (chunk_x, chunk_y) in self.chunks:
+                chunk: np.ndarray = self._writable_chunk((chunk_x, chunk_y))
+            else:
+                chunk = np.zeros((self.CHUNK_SIZE, self.CHUNK_SIZE), dtype=np.int32)
+                self.chunks[(chunk_x, chunk_y)] = chunk
+                self.chunk_counts[(chunk_x, chunk_y)] = 0
+
+            chunk[local_positions[selected, 0], local_positions[selected, 1]] = indices[selected]
+            self.chunk_counts[(chunk_x, chunk_y)] += len(selected)
+
+        self.count += len(positions)
+        self.version += 1
+
+    def __delitem__(self, position: TilePosition) -> None:
+        chunk_position, x, y = self._locate(position)
+        chunk: np.ndarray | None = self.chunks.get(chunk_position)
+
+        index: int = 0 if chunk is None else int(chunk[x, y])
+        if index == 0:
+            raise KeyError(position)
+
+        chunk = self._writable_chunk(chunk_position)
+        chunk[x, y] = 0
+        self.table[index] = None
+        self.positions[index] = None
+        self.free_indices.append(index)
+        self.count -= 1
+        self.version += 1
+
+        self.chunk_counts[chunk_position] -= 1
+        if self.chunk_counts[chunk_position] == 0:
+            del self.chunks[chunk_position]
+            del self.chunk_counts[chunk_position]
+            self.shared_chunks.discard(chunk_position)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self) -> list[TilePosition]:
+        return [position for position in self.positions if position is not None]
+
+    def values(self) -> list[Tile]:
+        return [tile for tile in self.table if tile is not None]
+
+    def items(self) -> list[tuple[TilePosition, Tile]]:
+        return [(position, tile) for position, tile in zip(self.positions, self.table) if tile is not None]
+
+    def _chunks_in_range(self, x_range: IntRange, y_range: IntRange) -> list[ChunkPosition]:
+        chunk_x_range: IntRange = (x_range[0] // self.CHUNK_SIZE, (x_range[1] - 1) // self.CHUNK_SIZE + 1)
+        chunk_y_range: IntRange = (y_range[0] // self.CHUNK_SIZE, (y_range[1] - 1) // self.CHUNK_SIZE + 1)
+
+        area: int = (chunk_x_range[1] - chunk_x_range[0]) * (chunk_y_range[1] - chunk_y_range[0])
+
+        # zoomed out over a sparse map, walking the occupied chunks is cheaper than the covered ones
+        if area > len(self.chunks):
+            return [
+                chunk_position for chunk_position in self.chunks
+                if chunk_x_range[0] <= chunk_position[0] < chunk_x_range[1]
+                and chunk_y_range[0] <= chunk_position[1] < chunk_y_range[1]
+            ]
+
+        return [
+            (x, y)
+            for x in range(chunk_x_range[0], chunk_x_range[1])
+            for y in range(chunk_y_range[0], chunk_y_range[1])
+            if (x, y) in self.chunks
+        ]
+
+    # tiles with x_range[0] <= x < x_range[1] and the same for y, ordered by x and then y
+    def query(self, x_range: IntRange, y_range: IntRange) -> list[Tile]:
+        if x_range[0] >= x_range[1] or y_range[0] >= y_range[1]:
+            return []
+
+        xs: list[np.ndarray] = []
+        ys: list[np.ndarray] = []
+        indices: list[np.ndarray] = []
+
+        for chunk_position in self._chunks_in_range(x_range, y_range):
+            origin_x: int = chunk_position[0] * self.CHUNK_SIZE
+            origin_y: int = chunk_position[1] * self.CHUNK_SIZE
+
+            local_x: IntRange = (max(0, x_range[0] - origin_x), min(self.CHUNK_SIZE, x_range[1] - origin_x))
+            local_y: IntRange = (max(0, y_range[0] - origin_y), min(self.CHUNK_SIZE, y_range[1] - origin_y))
+
+            window: np.ndarray = self.chunks[chunk_position][local_x[0]:local_x[1], local_y[0]:local_y[1]]
+            window_xs, window_ys = np.nonzero(window)
+
+            if len(window_xs) == 0:
+                continue
+
+            xs.append(window_xs + origin_x + local_x[0])
+            ys.append(window_ys + origin_y + local_y[0])
+            indices.append(window[window_xs, window_ys])
+
+        if not indices:
+            return []
+
+        if len(indices) == 1:
+            found: np.ndarray = indices[0]
+        else:
+            found = np.concatenate(indices)[np.lexsort((np.concatenate(ys), np.concatenate(xs)))]
+
+        table: list[Tile | None] = self.table
+        return [table[index] for index in found.tolist()]
+
+    # chunks stacked into one array, with a chunk grid over their bounding box pointing into it (-1 is empty)
+    def _stack(self) -> None:
+        if self._stacked_version == self.version:
+            return
+
+        self._stacked_version = self.version
+
+        if not self.chunks:
+            self._stacked_origin = (0, 0)
+            self._stacked_slots = np.full((0, 0), -1, dtype=np.int32)
+            self._stacked_chunks = np.zeros((0, self.CHUNK_SIZE, self.CHUNK_SIZE), dtype=np.int32)
+            return
+
+        chunk_positions: list[ChunkPosition] = list(self.chunks)
+        min_x: int = min(position[0] for position in chunk_positions)
+        min_y: int = min(position[1] for position in chunk_positions)
+        max_x: int = max(position[0] for position in chunk_positions)
+        max_y: int = max(position[1] for position in chunk_positions)
+
+        self._stacked_origin = (min_x, min_y)
+        self._stacked_slots = np.full((max_x - min_x + 1, max_y - min_y + 1), -1, dtype=np.int32)
+        self._stacked_chunks = np.stack([self.chunks[position] for position in chunk_positions])
+
+        for slot, position in enumerate(chunk_positions):
+            self._stacked_slots[position[0] - min_x, position[1] - min_y] = slot
+
+    # cells (x0, y0), (x1, y1) with x0 <= x < x1 covering every stored tile, chunk aligned
+    @property
+    def bounds(self) -> tuple[TilePosition, TilePosition]:
+        self._stack()
+
+        origin_x: int = self._stacked_origin[0] * self.CHUNK_SIZE
+        origin_y: int = self._stacked_origin[1] * self.CHUNK_SIZE
+        return ((origin_x, origin_y),
+                (origin_x + self._stacked_slots.shape[0] * self.CHUNK_SIZE,
+                 origin_y + self._stacked_slots.shape[1] * self.CHUNK_SIZE))
+
+    # table indices at many cells at once, 0 where empty, xs and ys are integer arrays of the same shape
+    def lookup(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        self._stack()
+
+        found: np.ndarray = np.zeros(xs.shape, dtype=np.int32)
+        if len(self._stacked_chunks) == 0:
+            return found
+
+        chunk_xs: np.ndarray = xs // self.CHUNK_SIZE - self._stacked_origin[0]
+        chunk_ys: np.ndarray = ys // self.CHUNK_SIZE - self._stacked_origin[1]
+
+        inside: np.ndarray = ((chunk_xs >= 0) & (chunk_xs < self._stacked_slots.shape[0])
+                              & (chunk_ys >= 0) & (chunk_ys < self._stacked_slots.shape[1]))
+
+        slots: np.ndarray = np.full(xs.shape, -1, dtype=np.int32)
+        slots[inside] = self._stacked_slots[chunk_xs[inside], chunk_ys[inside]]
+
+        filled: np.ndarray = slots >= 0
+        found[filled] = self._stacked_chunks[slots[filled],
+                                             xs[filled] % self.CHUNK_SIZE,
+                                             ys[filled] % self.CHUNK_SIZE]
+        return found
@@ -1,48 +1,99 @@
+import numpy as np
 import pygame
 from pygame.math import Vector2
 
+from scripts.AssetClasses.Tilemap.binary_tilemap import BinaryTilemap, Region
+from scripts.AssetClasses.Tilemap.chunked_tile_storage import ChunkedTileStorage
 from scripts.AssetClasses.Tilemap.gridcaster import Gridcaster
+from scripts.AssetClasses.Tilemap.grid_chunk_cache import GridChunkCache
+from scripts.AssetClasses.Tilemap.resized_asset_cache import ResizedAssetCache, ResizeKey
 from scripts.AssetClasses.Tilemap.Tiles.tile import Tile
 from scripts.AssetClasses.Animation.animation import Animation
+from scripts.DataStructures.spatial_hash import SpatialHash
 from scripts.GameTypes import TilePosition, Resolution, GridPosition, WorldPosition, Percentage, \
-    DisplayPosition, FocusedVector, TileHitInfo, WorldRay, GridRay, IntRange, GridRect
+    DisplayPosition, DisplayVector, FocusedVector, WorldVector, TileHitInfo, WorldRay, GridRay, IntRange, GridRect
 
 
 class Grid:
+    OFFGRID_CELL_TILES: int = 8  # spatial hash cell side in tiles
+
     def __init__(self, tilemap: 'Tilemap', name: str, tile_size: int, layer: int,
                  active: bool, depth: float, use_depth: bool, invisible: bool,
                  physical: bool, alpha: Percentage, ongrid_padding: int):
         self.game: 'Game' = tilemap.game
         self.tilemap: 'Tilemap' = tilemap
         self.name: str = name
-        self.tile_size: int = tile_size
         self._alpha = alpha
         self.layer: int = layer
         self.active: bool = active
 
+        # bumped when tile_size, depth or use_depth change, tiles cache their rects against it
+        self.geometry_version: int = 0
+
+        # display and world offsets, made again only when what they are made from changes, see _update_offsets
+        self._offsets_key: tuple | None = None
+        self._display_offset: DisplayVector = Vector2()
+        self._world_offset: WorldVector = Vector2()
+
+        self._tile_size: int = tile_size
         self._depth: float = depth
         self.depth_from_grid: float = 2 ** -depth  # depth to grid is just inverse (1/depth from grid)
-        self.use_depth: bool = use_depth
+        self._use_depth: bool = use_depth
 
         self.invisible: bool = invisible
         self.physical: bool = physical
         self.ongrid_padding: int = ongrid_padding
 
-        self.tiles: dict[TilePosition, Tile] = {}
+        self.tiles: ChunkedTileStorage = ChunkedTileStorage()
 
         self.offgrid_background: set[Tile] = set()
         self.offgrid_foreground: set[Tile] = set()
 
+        # mirror the offgrid sets by grid rect, kept up to date by add_tile, remove_tile and update_offgrid_tile
+        self.offgrid_background_hash: SpatialHash = SpatialHash(self.OFFGRID_CELL_TILES * self.tile_size)
+        self.offgrid_foreground_hash: SpatialHash = SpatialHash(self.OFFGRID_CELL_TILES * self.tile_size)
+
+        self.chunk_cache: GridChunkCache | None = None
+
+        # binary regions changed since the last save, only those get encoded again, see TilemapSaver
+        self.dirty_regions: set[Region] = set()
+
     @property
     def tile_count(self) -> int:
         return len(self.tiles) + len(self.offgrid_foreground) + len(self.offgrid_background)
 
     @property
     def clone(self) -> 'Grid':
-        return self.game.utilities.load_grid(self.as_json, self.tilemap)
+        return self.clone_into(self.tilemap)
+
+    # copy of the grid for tilemap, tiles are copied as they are (no json, image lookups or rescaling),
+    # ongrid chunk arrays are shared until written to, see ChunkedTileStorage.copy
+    def clone_into(self, tilemap: 'Tilemap', animations: dict[Animation, Animation] | None=None) -> 'Grid':
+        grid: Grid = Grid(tilemap, self.name, self.tile_size, self.layer, self.active, self.depth, self.use_depth,
+                          self.invisible, False, self._alpha, self.ongrid_padding)
 
+        grid.tiles = self.tiles.copy(lambda tile: tile.copy_to(grid, animations))
+        grid.physical = self.physical
+
+        for offgrid_hash, grid_hash, grid_set in ((self.offgrid_background_hash, grid.offgrid_background_hash,
+                                                   grid.offgrid_background),
+                                                  (self.offgrid_foreground_hash, grid.offgrid_foreground_hash,
+                                                   grid.offgrid_foreground)):
+            for tile in sorted(offgrid_hash, key=offgrid_hash.serials.__getitem__):
+                copied: Tile = tile.copy_to(grid, animations)
+
+                grid_set.add(copied)
+                grid_hash.insert(copied, offgrid_hash.rects[tile])
+
+        for tile in grid.tiles.values() + list(grid.offgrid_background) + list(grid.offgrid_foreground):
+            for group in tile.groups:
+                tilemap.tile_groups.setdefault(group, set()).add(tile)
+
+        return grid
+
+    # everything but the tiles
     @property
-    def as_json(self) -> dict:
+    def settings_json(self) -> dict:
         return {
             "name": self.name,
             "tile size": self.tile_size,
@@ -53,7 +104,12 @@ class Grid:
             "use depth": self.use_depth,
             "invisible": self.invisible,
             "physical": self.physical,
-            "ongrid padding": self.ongrid_padding,
+            "ongrid padding": self.ongrid_padding
+        }
+
+    @property
+    def as_json(self) -> dict:
+        return self.settings_json | {
             "tiles": [tile.as_json for tile in self.tiles.values()],
             "offgrid background": [tile.as_json for tile in self.offgrid_background],
             "offgrid foreground": [tile.as_json for tile in self.offgrid_foreground]
@@ -79,6 +135,15 @@ class Grid:
     def __str__(self):
         return self.as_string
 
+    @property
+    def tile_size(self) -> int:
+        return self._tile_size
+
+    @tile_size.setter
+    def tile_size(self, tile_size: int) -> None:
+        self._tile_size = tile_size
+        self.geometry_version += 1
+
     @property
     def depth(self) -> float:
         return self._depth
@@ -87,6 +152,62 @@ class Grid:
     def depth(self, depth: float) -> None:
         self._depth = depth
         self.depth_from_grid = 2 ** -self._depth
+        self.geometry_version += 1
+
+    @property
+    def use_depth(self) -> bool:
+        return self._use_depth
+
+    @use_depth.setter
+    def use_depth(self, use_depth: bool) -> None:
+        self._use_depth = use_depth
+        self.geometry_version += 1
+
+    # bakes ongrid tiles into chunk surfaces, worth it for big grids that rarely change
+    @property
+    def chunk_cached(self) -> bool:
+        return self.chunk_cache is not None
+
+    @chunk_cached.setter
+    def chunk_cached(self, chunk_cached: bool) -> None:
+        if chunk_cached == self.chunk_cached:
+            return
+
+        if chunk_cached:
+            self.chunk_cache = GridChunkCache(self)
+        else:
+            self.chunk_cache.release()
+            self.chunk_cache = None
+
+    # call when something changes about a tile (how it looks, alpha, groups...), grid edits invalidate on their own
+    def invalidate_tile(self, tile: Tile) -> None:
+        tile.forget_geometry()
+        self.mark_dirty(tile.position, tile.offgrid)
+
+        if self.chunk_cache is None or tile.offgrid:
+            return
+
+        self.chunk_cache.invalidate(tile.position)
+
+    def mark_dirty(self, position: TilePosition | GridPosition, offgrid: bool) -> None:
+        self.dirty_regions.add(BinaryTilemap.region_of(position, "offgrid background" if offgrid else "tiles",
+                                                       self.tile_size))
+
+    # call when an offgrid tile moves or changes size after being added
+    def update_offgrid_tile(self, tile: Tile) -> None:
+        tile.forget_geometry()
+        self.mark_dirty(tile.position, True)
+
+        # hash still has the rect from before the move
+        for offgrid_hash in (self.offgrid_background_hash, self.offgrid_foreground_hash):
+            if tile in offgrid_hash:
+                self.mark_dirty(offgrid_hash.rects[tile].topleft, True)
+
+        if tile in self.offgrid_background:
+            self.offgrid_background_hash.update(tile, tile.grid_rect)
+
+        if tile in self.offgrid_foreground:
+            self.offgrid_foreground_hash.update(tile, tile.grid_rect)
 
     @property
     def alpha(self) -> Percentage:
@@ -96,33 +217,57 @@ class Grid:
     def alpha(self, alpha: Percentage) -> None:
         self._alpha = alpha
 
-    def position_grid_to_display(self, position: GridPosition) -> DisplayPosition:
-        if self.use_depth:
-            display_vec: FocusedVector = self.tilemap.focused_position * self.depth_from_grid
+    # camera, display center, tilemap position and grid geometry are all the offsets depend on,
+    # so they are made once per frame at most instead of for every tile
+    def _update_offsets(self) -> None:
+        camera: list[int] = self.game.camera.render_cameraPos
+        center: DisplayPosition = self.game.window.display_center
+        key: tuple = (camera[0], camera[1], center[0], center[1],
+                      self.tilemap.position_version, self.geometry_version)
 
-            return position + display_vec + self.game.window.display_center
-        else:
-            return position + self.tilemap.display_position
+        if key == self._offsets_key:
+            return
+
+        position: WorldPosition = self.tilemap.position
 
-    def position_display_to_grid(self, position: DisplayPosition) -> GridPosition:
         if self.use_depth:
-            display_vec: FocusedVector = self.tilemap.focused_position * self.depth_from_grid
+            display_x: float = (position[0] - camera[0] - center[0]) * self.depth_from_grid + center[0]
+            display_y: float = (position[1] - camera[1] - center[1]) * self.depth_from_grid + center[1]
 
-            return position - display_vec - self.game.window.display_center
+            self._world_offset = Vector2(display_x + camera[0], display_y + camera[1])
         else:
-            return position - self.tilemap.display_position
+            display_x: float = position[0] - camera[0]
+            display_y: float = position[1] - camera[1]
+
+            self._world_offset = Vector2(position[0], position[1])
+
+        self._display_offset = Vector2(display_x, display_y)
+        self._offsets_key = key
+
+    # where the grid origin is on display, grid positions map to display by adding it
+    # offsets are shared, copy them before changing them
+    @property
+    def display_offset(self) -> DisplayVector:
+        self._update_offsets()
+        return self._display_offset
+
+    # where the grid origin is in the world, moves with the camera for depth grids
+    @property
+    def world_offset(self) -> WorldVector:
+        self._update_offsets()
+        return self._world_offset
+
+    def position_grid_to_display(self, position: GridPosition) -> DisplayPosition:
+        return position + self.display_offset
+
+    def position_display_to_grid(self, position: DisplayPosition) -> GridPosition:
+        return position - self.display_offset
 
     def position_world_to_grid(self, position: WorldPosition) -> GridPosition:
-        if self.use_depth:
-            return self.position_display_to_grid(self.game.camera.position_world_to_display(position))
-        else:
-            return position - self.tilemap.position
+        return position - self.world_offset
 
     def position_grid_to_world(self, position: GridPosition) -> WorldPosition:
-        if self.use_depth:
-            return self.game.camera.position_display_to_world(self.position_grid_to_display(position))
-        else:
-            return position + self.tilemap.position
+        return position + self.world_offset
 
     def position_grid_to_tile(self, position: GridPosition) -> TilePosition:
         return (
@@ -166,7 +311,8 @@ class Grid:
         if original.get_size() == new_resolution:
             return True
 
-        resized_image: pygame.Surface = pygame.transform.scale(original, new_resolution)
+        resized_image: pygame.Surface = self.tilemap.acquire_resized(ResizedAssetCache.key("image", image_name,
+                                                                                         self.tile_size))[0]
 
         self.tilemap.tilemap_resized_images[self.tile_size][image_name] = resized_image
         self.tilemap.resized_image_names[self.tile_size][resized_image] = image_name
@@ -201,13 +347,19 @@ class Grid:
             return True
 
         original: Animation = self.tilemap.game.assets.animations[animation_name]
-        original_frames: list[pygame.Surface] = original.frames
-        new_resolution: Resolution = (self.tile_size, self.tile_size)
+        keys: list[ResizeKey] = self.game.assets.resized_cache.keys_of("animation", animation_name, self.tile_size)
+
+        # frames are shared with other tilemaps, the animation with its play state is the tilemap's own
+        resized_animation: Animation = Animation(self.game, list(self.tilemap.acquire_resized(keys[0])), original.name,
+                                                 list(original.frame_durations), original.loop, original.pong,
+                                                 original.reversed, original.flip_x, original.flip_y,
+                                                 original.flipped_generated)
 
-        original.frames = [
-            pygame.transform.scale(frame, new_resolution) for frame in original.frames_clone]
-        resized_animation: Animation = original.hard_clone
-        original.frames = original_frames
+        if original.flipped_generated:
+            resized_animation.flipped_frames = [list(self.tilemap.acquire_resized(key)) for key in keys[1:]]
+
+        if self.tilemap.animation_clock is not None:
+            resized_animation.use_clock(self.tilemap.animation_clock)
 
         self.tilemap.tilemap_resized_animations[self.tile_size][animation_name] = resized_animation
         self.tilemap.resized_animation_names[self.tile_size][resized_animation] = animation_name
@@ -238,23 +390,8 @@ class Grid:
         grid_ray: GridRay = ray.clone
         grid_ray.position = self.position_world_to_grid(grid_ray.position)
 
-        best_hit: TileHitInfo = known_hit
-
-        for tile in self.offgrid_background:
-            time = grid_ray.cast_against_rect(tile.grid_rect)
-
-            hit: bool = time >= 0
-            better_option: bool = time < best_hit[0] or best_hit[0] < 0
-            if hit and better_option:
-                best_hit = (time, tile)
-
-        for tile in self.offgrid_foreground:
-            time = grid_ray.cast_against_rect(tile.grid_rect)
-
-            hit: bool = time >= 0
-            better_option: bool = time < best_hit[0] or best_hit[0] < 0
-            if hit and better_option:
-                best_hit = (time, tile)
+        best_hit: TileHitInfo = self.offgrid_background_hash.raycast(grid_ray, known_hit)
+        best_hit = self.offgrid_foreground_hash.raycast(grid_ray, best_hit)
 
         return best_hit
 
@@ -265,42 +402,109 @@ class Grid:
 
         return gridcaster.best_hit
 
+    # numpy dda of many rays at once over ongrid tiles, origins and directions are (n, 2) in world space
+    # returns hit distances (-1 for none), indices into self.tiles.table (0 for none) and hit normals,
+    # rays starting inside a tile hit at 0 with a zero normal
+    def raycast_many_ongrid(self, origins: np.ndarray, directions: np.ndarray,
+                            max_length: float=Gridcaster.MAX_CAST_LENGTH) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        count: int = len(origins)
+        distances: np.ndarray = np.full(count, -1.0)
+        indices: np.ndarray = np.zeros(count, dtype=np.int32)
+        normals: np.ndarray = np.zeros((count, 2))
+
+        if count == 0 or len(self.tiles) == 0:
+            return distances, indices, normals
+
+        # world to grid is a translation, everything below is in tiles
+        offset: GridPosition = self.position_world_to_grid(Vector2(0, 0))
+        positions: np.ndarray = (np.asarray(origins, dtype=np.float64) + (offset.x, offset.y)) / self.tile_size
+
+        directions = np.array(directions, dtype=np.float64)
+        lengths: np.ndarray = np.linalg.norm(directions, axis=1)
+        assert np.all(lengths > 0), "ray directions can't be zero"
+        directions /= lengths[:, None]
+        directions[directions == 0] = 0.000_000_01  # same as Ray
+        inverse: np.ndarray = 1 / directions
+        max_time: float = max_length / self.tile_size
+
+        # rays skip ahead to where they enter the bounds of stored tiles
+        low, high = self.tiles.bounds
+        low_times: np.ndarray = (np.array(low) - positions) * inverse
+        high_times: np.ndarray = (np.array(high) - positions) * inverse
+        near_times: np.ndarray = np.minimum(low_times, high_times)
+        far_times: np.ndarray = np.maximum(low_times, high_times)
+
+        times: np.ndarray = np.maximum(near_times.max(axis=1), 0)
+        alive: np.ndarray = (times <= far_times.min(axis=1)) & (times <= max_time)
+
+        # axis of the last crossed cell border, -1 while still in the starting cell
+        axes: np.ndarray = np.where(times > 0, near_times.argmax(axis=1), -1)
+
+        cells: np.ndarray = np.floor(positions + directions * times[:, None]).astype(np.int64)
+        cells = np.clip(cells, low, np.array(high) - 1)
+
+        steps: np.ndarray = np.where(directions > 0, 1, -1)
+        next_times: np.ndarray = (cells + (steps > 0) - positions) * inverse
+        delta_times: np.ndarray = np.abs(inverse)
+
+        active: np.ndarray = np.nonzero(alive)[0]
+        while len(active):
+            found: np.ndarray = self.tiles.lookup(cells[active, 0], cells[active, 1])
+            hit: np.ndarray = found != 0
+
+            hit_rays: np.ndarray = active[hit]
+            distances[hit_rays] = times[hit_rays] * self.tile_size
+            indices[hit_rays] = found[hit]
+
+            hit_axes: np.ndarray = axes[hit_rays]
+            crossed: np.ndarray = hit_axes >= 0
+            normals[hit_rays[crossed], hit_axes[crossed]] = -steps[hit_rays[crossed], hit_axes[crossed]]
+
+            active = active[~hit]
+            step_axes: np.ndarray = (next_times[active, 1] < next_times[active, 0]).astype(np.int64)
+
+            times[active] = next_times[active, step_axes]
+            axes[active] = step_axes
+            cells[active, step_axes] += steps[active, step_axes]
+            next_times[active, step_axes] += delta_times[active, step_axes]
+
+            # bounds are convex, a ray that left them won't come back
+            inside: np.ndarray = ((cells[active, 0] >= low[0]) & (cells[active, 0] < high[0])
+                                  & (cells[active, 1] >= low[1]) & (cells[active, 1] < high[1]))
+            active = active[inside & (times[active] <= max_time)]
+
+        return distances, indices, normals
+
     def get_gridcaster(self, ray: WorldRay, known_hit=(-1, None)) -> Gridcaster:
         grid_ray: GridRay = ray.clone
         grid_ray.position = self.position_world_to_grid(grid_ray.position)
 
         return Gridcaster(self.game, self, grid_ray, known_hit)
 
+    @property
+    def camera_rect(self) -> GridRect:
+        camera_position: WorldPosition = self.game.camera.position
+        offset: WorldVector = self.world_offset
+
+        return pygame.FRect(camera_position[0] - offset.x, camera_position[1] - offset.y,
+                            *self.game.window.display_size)
+
     def get_onscreen_tiles(self) -> list[Tile]:
         if not self.active:
             return []
 
-        camera_pos: GridPosition = self.position_world_to_grid(self.tilemap.game.camera.position)
-        camera_tile_pos: TilePosition = self.position_grid_to_tile(camera_pos)
-        camera_bound_tile_pos: TilePosition = self.position_grid_to_tile(camera_pos + Vector2(*self.game.window.display_size))
-        camera_rect: GridRect = pygame.FRect(*camera_pos, *self.game.window.display_size)
-
-        tiles: list[Tile] = []
+        camera_rect: GridRect = self.camera_rect
+        tile_size: int = self.tile_size
 
-        for tile in self.offgrid_background:
-            if camera_rect.colliderect(tile.grid_rect):
-                tiles.append(tile)
+        tiles: list[Tile] = self.offgrid_background_hash.query_rect(camera_rect)
 
-        x_range: IntRange = (camera_tile_pos[0] - self.ongrid_padding,
-                             1 + camera_bound_tile_pos[0] + self.ongrid_padding)
-        y_range: IntRange = (camera_tile_pos[1] - self.ongrid_padding,
-                             1 + camera_bound_tile_pos[1] + self.ongrid_padding)
+        x_range: IntRange = (int(camera_rect.left // tile_size) - self.ongrid_padding,
+                             1 + int(camera_rect.right // tile_size) + self.ongrid_padding)
+        y_range: IntRange = (int(camera_rect.top // tile_size) - self.ongrid_padding,
+                             1 + int(camera_rect.bottom // tile_size) + self.ongrid_padding)
 
-        for x in range(x_range[0], x_range[1]):
-            for y in range(y_range[0], y_range[1]):
-                check_position: TilePosition = (x, y)
-
-                if check_position in self.tiles:
-                    tiles.append(self.tiles[check_position])
-
-        for tile in self.offgrid_foreground:
-            if camera_rect.colliderect(tile.grid_rect):
-                tiles.append(tile)
+        tiles += self.tiles.query(x_range, y_range)
+        tiles += self.offgrid_foreground_hash.query_rect(camera_rect)
 
         return tiles
 
@@ -314,28 +518,16 @@ class Grid:
         pos_rect: GridRect = pygame.FRect(*fixed_pos, size, size)
         tile_pos: TilePosition = self.position_grid_to_tile(grid_pos)
 
-        tiles: list[Tile] = []
+        tiles: list[Tile] = self.offgrid_background_hash.query_rect(pos_rect)
         scan_size: int = int(size // self.tile_size) + 1
 
-        for tile in self.offgrid_background:
-            if pos_rect.colliderect(tile.grid_rect):
-                tiles.append(tile)
-
         x_range: IntRange = (tile_pos[0] - scan_size - self.ongrid_padding,
                              tile_pos[0] + scan_size + 1 + self.ongrid_padding)
         y_range: IntRange = (tile_pos[1] - scan_size - self.ongrid_padding,
                              tile_pos[1] + scan_size + 1 + self.ongrid_padding)
 
-        for x in range(x_range[0], x_range[1]):
-            for y in range(y_range[0], y_range[1]):
-                check_position: TilePosition = (x, y)
-
-                if check_position in self.tiles:
-                    tiles.append(self.tiles[check_position])
-
-        for tile in self.offgrid_foreground:
-            if pos_rect.colliderect(tile.grid_rect):
-                tiles.append(tile)
+        tiles += self.tiles.query(x_range, y_range)
+        tiles += self.offgrid_foreground_hash.query_rect(pos_rect)
 
         return tiles
 
@@ -348,17 +540,18 @@ class Grid:
         return tiles
 
     def get_ongrid_tile(self, tile_position: TilePosition) -> Tile | None:
-        if tile_position not in self.tiles:
-            return None
-
-        return self.tiles[tile_position]
+        return self.tiles.get(tile_position)
 
     def remove_ongrid_at(self, tile_position: TilePosition) -> Tile|None:
-        if tile_position not in self.tiles:
+        tile: Tile | None = self.tiles.get(tile_position)
+        if tile is None:
             return None
 
-        tile = self.tiles[tile_position]
         del self.tiles[tile_position]
+        self.mark_dirty(tile_position, False)
+
+        if self.chunk_cache is not None:
+            self.chunk_cache.invalidate(tile_position)
 
         return tile
 
@@ -378,23 +571,46 @@ class Grid:
     def add_tile(self, tile: Tile, overwrite: bool=False, offgrid_background: bool=True) -> bool:
         no_overlap: bool = True
 
+        if tile.offgrid:
+            self.mark_dirty(tile.position, True)
+
         if tile.offgrid and offgrid_background:
             self.offgrid_background.add(tile)
+            self.offgrid_background_hash.insert(tile, tile.grid_rect)
 
         elif tile.offgrid and not offgrid_background:
             self.offgrid_foreground.add(tile)
+            self.offgrid_foreground_hash.insert(tile, tile.grid_rect)
 
         else:
-            assert type(tile.position) == TilePosition
+            assert type(tile.position) == tuple
 
             if tile.position in self.tiles:
                 no_overlap = False
 
             if no_overlap or overwrite:
                 self.tiles[tile.position] = tile
+                self.mark_dirty(tile.position, False)
+
+                if self.chunk_cache is not None:
+                    self.chunk_cache.invalidate(tile.position)
 
         return no_overlap
 
+    # add_tile(tile, overwrite=True) for many ongrid tiles at once, used by loading
+    def add_ongrid_tiles(self, tiles: list[Tile]) -> None:
+        assert all(not tile.offgrid for tile in tiles)
+
+        positions: np.ndarray = np.array([tile.position for tile in tiles], dtype=np.int64).reshape(-1, 2)
+        self.tiles.set_many(positions, tiles)
+
+        for tile in tiles:
+            self.mark_dirty(tile.position, False)
+
+        if self.chunk_cache is not None:
+            for tile in tiles:
+                self.chunk_cache.invalidate(tile.position)
+
     # returns True if said tile was found and removed else False
     def remove_tile(self, tile: Tile, remove_from_tile_groups: bool=False) -> bool:
         found_and_removed: bool = False
@@ -402,35 +618,82 @@ class Grid:
         if tile.offgrid:
             if tile in self.offgrid_background:
                 self.offgrid_background.remove(tile)
+                self.offgrid_background_hash.remove(tile)
                 found_and_removed = True
             if tile in self.offgrid_foreground:
                 self.offgrid_foreground.remove(tile)
+                self.offgrid_foreground_hash.remove(tile)
                 found_and_removed = True
+
+            if found_and_removed:
+                self.mark_dirty(tile.position, True)
         else:
-            assert type(tile.position) == TilePosition
+            assert type(tile.position) == tuple
 
             if tile.position in self.tiles and self.tiles[tile.position] == tile:
                 del self.tiles[tile.position]
+                self.mark_dirty(tile.position, False)
                 found_and_removed = True
 
+                if self.chunk_cache is not None:
+                    self.chunk_cache.invalidate(tile.position)
+
         if remove_from_tile_groups:
             found_and_removed = self.tilemap.remove_tile_from_tile_groups(tile) or found_and_removed
 
         return found_and_removed
 
+    @property
+    def gpu_rendered(self) -> bool:
+        return self.tilemap.gpu_rendering and self.game.window.opengl
+
     def blit(self) -> None:
         if self.invisible or not self.active:
             return
 
-        # self.game.window.display.fblits(
-        #     map(lambda x: x.blit_pair, self.get_onscreen_tiles())
-        # )
-        for tile in self.get_onscreen_tiles():
-            tile.blit()
+        if self.chunk_cache is not None:
+            self._blit_chunk_cached()
+            return
+
+        offset: DisplayVector = self.display_offset
+
+        if self.gpu_rendered:
+            self.game.graphics.tile_renderer.add_tiles(self.get_onscreen_tiles(), offset=offset)
+            return
+
+        self.game.window.display.fblits([
+            tile.blit_pair(offset) for tile in self.get_onscreen_tiles() if tile.renderable
+        ])
 
     def blit_faded(self) -> None:
         if self.invisible or not self.active:
             return
 
+        offset: DisplayVector = self.display_offset
+
+        if self.gpu_rendered:
+            self.game.graphics.tile_renderer.add_tiles(self.get_onscreen_tiles(), self.alpha, offset)
+            return
+
+        alpha: Percentage = self.alpha
         for tile in self.get_onscreen_tiles():
-            tile.blit_faded(self.alpha)
+            tile.blit_faded(alpha, offset)
+
+    def _blit_chunk_cached(self) -> None:
+        camera_rect: GridRect = self.camera_rect
+        background: list[Tile] = self.offgrid_background_hash.query_rect(camera_rect)
+        foreground: list[Tile] = self.offgrid_foreground_hash.query_rect(camera_rect)
+        offset: DisplayVector = self.display_offset
+
+        if self.gpu_rendered:
+            self.game.graphics.tile_renderer.add_tiles(background, offset=offset)
+            self.chunk_cache.blit()
+            self.game.graphics.tile_renderer.add_tiles(foreground, offset=offset)
+            return
+
+        display: pygame.Surface = self.game.window.display
+        display.fblits([tile.blit_pair(offset) for tile in background if tile.renderable])
+
+        self.chunk_cache.blit()
+
+        display.fblits([tile.blit_pair(offset) for tile in foreground if tile.renderable])
@@ -0,0 +1,190 @@
+import pygame
+from pygame.math import Vector2
+
+from scripts.AssetClasses.Tilemap.Tiles.tile import Tile
+from scripts.AssetClasses.Tilemap.Tiles.animated_tile import AnimatedTile
+from scripts.GameTypes import TilePosition, DisplayPosition, IntRange, GridPosition, Percentage
+
+ChunkPosition = tuple[int, int]
+
+
+class GridChunk:
+    def __init__(self, position: ChunkPosition):
+        self.position: ChunkPosition = position
+        self.surface: pygame.Surface | None = None
+        self.dirty: bool = True
+
+        # animated tiles baked into surface with the frame they were baked with
+        self.animated_tiles: dict[AnimatedTile, pygame.Surface] = {}
+
+        # grid geometry version and alpha surface was baked with
+        self.geometry_version: int = -1
+        self.alpha: Percentage = 1
+
+    @property
+    def animation_changed(self) -> bool:
+        for tile, image in self.animated_tiles.items():
+            if tile.image is not image:
+                return True
+
+        return False
+
+    def baked_with(self, grid: 'Grid') -> bool:
+        return self.geometry_version == grid.geometry_version and self.alpha == grid.alpha
+
+    @property
+    def as_string(self) -> str:
+        return (f"position: {self.position}, "
+                f"dirty: {self.dirty}, "
+                f"animated tiles: {len(self.animated_tiles)}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+
+# ongrid tiles of a grid baked into surfaces of CHUNK_SIZE x CHUNK_SIZE tiles, rebaked only when touched
+# or when the grid's geometry (tile size, depth) or alpha changed since
+class GridChunkCache:
+    CHUNK_SIZE: int = 16
+    COLORKEY: tuple[int, int, int] = (0, 0, 0)
+
+    def __init__(self, grid: 'Grid'):
+        self.game: 'Game' = grid.game
+        self.grid: 'Grid' = grid
+
+        self.chunks: dict[ChunkPosition, GridChunk] = {}
+        self.bakes: int = 0
+
+        for position in self.grid.tiles:
+            self.invalidate(position)
+
+    @property
+    def as_string(self) -> str:
+        return (f"grid: {self.grid.name}, "
+                f"chunk size: {self.CHUNK_SIZE}, "
+                f"chunks: {len(self.chunks)}, "
+                f"bakes: {self.bakes}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+    # tiles bigger than tile size spill over, the same way ongrid_padding accounts for it
+    @property
+    def margin(self) -> int:
+        return self.grid.ongrid_padding * self.grid.tile_size
+
+    def position_tile_to_chunk(self, position: TilePosition) -> ChunkPosition:
+        return position[0] // self.CHUNK_SIZE, position[1] // self.CHUNK_SIZE
+
+    def position_chunk_to_display(self, position: ChunkPosition) -> DisplayPosition:
+        origin: TilePosition = (position[0] * self.CHUNK_SIZE, position[1] * self.CHUNK_SIZE)
+        return self.grid.position_tile_to_display(origin) - Vector2(self.margin, self.margin)
+
+    def invalidate(self, position: TilePosition) -> None:
+        chunk_position: ChunkPosition = self.position_tile_to_chunk(position)
+
+        if chunk_position not in self.chunks:
+            self.chunks[chunk_position] = GridChunk(chunk_position)
+
+        self.forget_chunk_surface(self.chunks[chunk_position])
+        self.chunks[chunk_position].dirty = True
+
+    def invalidate_all(self) -> None:
+        for chunk in self.chunks.values():
+            self.forget_chunk_surface(chunk)
+            chunk.dirty = True
+
+    def forget_chunk_surface(self, chunk: GridChunk) -> None:
+        if chunk.surface is not None and self.grid.gpu_rendered:
+            self.game.graphics.tile_renderer.forget_surface(chunk.surface)
+
+    def _bake(self, chunk: GridChunk) -> None:
+        tile_size: int = self.grid.tile_size
+        side: int = self.CHUNK_SIZE * tile_size + 2 * self.margin
+
+        # tile images are colorkeyed, so the chunk is too, RLE blits of it are far cheaper than per pixel alpha
+        chunk.surface = pygame.Surface((side, side)).convert()
+        chunk.surface.fill(self.COLORKEY)
+        chunk.animated_tiles = {}
+        chunk.geometry_version = self.grid.geometry_version
+        chunk.alpha = self.grid.alpha
+        chunk.dirty = False
+        self.bakes += 1
+
+        origin: DisplayPosition = self.position_chunk_to_display(chunk.position)
+        tiles: list[Tile] = self.grid.tiles.query(
+            (chunk.position[0] * self.CHUNK_SIZE, (chunk.position[0] + 1) * self.CHUNK_SIZE),
+            (chunk.position[1] * self.CHUNK_SIZE, (chunk.position[1] + 1) * self.CHUNK_SIZE)
+        )
+
+        for tile in tiles:
+            if not tile.renderable:
+                continue
+
+            image: pygame.Surface = tile.blit_image_function(tile)
+            local_position: Vector2 = tile.blit_position_function(tile) - origin
+            chunk.surface.blit(image, (round(local_position.x), round(local_position.y)))
+
+            if isinstance(tile, AnimatedTile):
+                chunk.animated_tiles[tile] = tile.image
+
+        chunk.surface.set_colorkey(self.COLORKEY, pygame.RLEACCEL)
+
+        if not tiles:
+            del self.chunks[chunk.position]
+
+    def get_onscreen_chunks(self) -> list[GridChunk]:
+        camera_pos: GridPosition = self.grid.position_world_to_grid(self.game.camera.position)
+        camera_bound: GridPosition = camera_pos + Vector2(*self.game.window.display_size)
+
+        chunk_pixels: int = self.CHUNK_SIZE * self.grid.tile_size
+        x_range: IntRange = (int((camera_pos[0] - self.margin) // chunk_pixels),
+                             1 + int((camera_bound[0] + self.margin) // chunk_pixels))
+        y_range: IntRange = (int((camera_pos[1] - self.margin) // chunk_pixels),
+                             1 + int((camera_bound[1] + self.margin) // chunk_pixels))
+
+        chunks: list[GridChunk] = []
+
+        for x in range(x_range[0], x_range[1]):
+            for y in range(y_range[0], y_range[1]):
+                chunk: GridChunk | None = self.chunks.get((x, y))
+
+                if chunk is None:
+                    continue
+
+                if not chunk.dirty and (chunk.animation_changed or not chunk.baked_with(self.grid)):
+                    self.forget_chunk_surface(chunk)
+                    chunk.dirty = True
+
+                if chunk.dirty:
+                    self._bake(chunk)
+
+                    if chunk.position not in self.chunks:
+                        continue
+
+                chunks.append(chunk)
+
+        return chunks
+
+    def blit(self) -> None:
+        if self.grid.gpu_rendered:
+            for chunk in self.get_onscreen_chunks():
+                self.game.graphics.tile_renderer.add(chunk.surface, self.position_chunk_to_display(chunk.position))
+        else:
+            # floored, pygame truncates and chunks often start left of or above the display
+            self.game.window.display.fblits([
+                (chunk.surface, self.position_chunk_to_display(chunk.position) // 1)
+                for chunk in self.get_onscreen_chunks()
+            ])
+
+    def release(self) -> None:
+        for chunk in self.chunks.values():
+            self.forget_chunk_surface(chunk)
+
+        self.chunks = {}
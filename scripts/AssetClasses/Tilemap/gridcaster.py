@@ -14,6 +14,7 @@ class Gridcaster:
                 best_hit: TileHitInfo=(-1, None)) -> None:
         self.game: 'Game' = game
         self.grid: 'Grid' = grid
+        self.tiles: 'ChunkedTileStorage' = grid.tiles
 
         self.ray: NormalizedGridRay = ray.clone
         self.ray.position = self.ray.position / self.grid.tile_size
@@ -103,21 +104,17 @@ class Gridcaster:
 
     @property
     def x_ray_hit(self) -> Tile | None:
-        tile_pos: TilePosition = (
-            self.ray_tile_position[0] + self.x_steps * self.step_directions[0],
-            self.ray_x.position.y // 1
-        )
-
-        return self.grid.get_ongrid_tile(tile_pos)
+        return self.tile_at(self.ray_tile_position[0] + self.x_steps * self.step_directions[0],
+                            self.ray_x.position.y // 1)
 
     @property
     def y_ray_hit(self) -> Tile | None:
-        tile_pos: TilePosition = (
-            self.ray_y.position.x // 1,
-            self.ray_tile_position[1] + self.y_steps * self.step_directions[1]
-        )
+        return self.tile_at(self.ray_y.position.x // 1,
+                            self.ray_tile_position[1] + self.y_steps * self.step_directions[1])
 
-        return self.grid.get_ongrid_tile(tile_pos)
+    # most probes land on empty cells, the storage's index arrays rule those out before any tile lookup
+    def tile_at(self, x: float, y: float) -> Tile | None:
+        return self.tiles.get((x, y))
 
     @staticmethod
     def ray_tile(ray: NormalizedGridRay) -> TilePosition:
@@ -150,7 +147,7 @@ class Gridcaster:
             self.best_hit_local = new_hit
 
     def init(self, blit_rays: bool=False) -> None:
-        intersecting_tile: Tile | None = self.grid.get_ongrid_tile(self.ray_tile_position)
+        intersecting_tile: Tile | None = self.tile_at(*self.ray_tile_position)
         if intersecting_tile is not None:
             self.x_done = True
             self.y_done = True
@@ -0,0 +1,268 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+from scripts.GameTypes import Resolution
+from scripts.Utilities.Graphics.texture_atlas import TextureAtlas
+
+FlipState = tuple[bool, bool]
+ResizeKey = tuple[str, str, int, FlipState]  # "image" or "animation", asset name, tile size, flip x and y
+
+NO_FLIP: FlipState = (False, False)
+
+
+# rescaled images and animation frames shared by every tilemap, so maps using the same tileset hold it once
+# tilemaps acquire what their grids use and release it when they are dropped, entries no tilemap holds
+# are kept for later as long as they fit in max_bytes, the least recently released going first
+# prebake() scales what a tilemap is going to ask for on a thread while its tiles are being built
+class ResizedAssetCache:
+    DEFAULT_MAX_BYTES: int = 64 * 1024 * 1024  # for entries no tilemap holds
+    FLIPS: tuple[FlipState, ...] = ((True, False), (False, True), (True, True))  # order of Animation.flipped_frames
+
+    def __init__(self, game: 'Game', max_bytes: int=DEFAULT_MAX_BYTES, smooth: bool=False, prebaking: bool=False):
+        self.game: 'Game' = game
+        self.max_bytes: int = max_bytes
+
+        # set before tilemaps load, smooth uses smoothscale instead of scale,
+        # prebaking has tilemaps loaded from files prebake what their grids use
+        self.smooth: bool = smooth
+        self.prebaking: bool = prebaking
+
+        self.entries: dict[ResizeKey, list[pygame.Surface]] = {}
+        self.references: dict[ResizeKey, int] = {}
+        self.entry_bytes: dict[ResizeKey, int] = {}
+
+        # entries with no references, least recently released first
+        self.idle: OrderedDict[ResizeKey, None] = OrderedDict()
+        self.idle_bytes: int = 0
+
+        # guards entries and the prebake queue, acquire waits on it for keys the thread is scaling
+        self.condition: threading.Condition = threading.Condition()
+        self.queued: dict[ResizeKey, None] = {}
+        self.baking: set[ResizeKey] = set()
+        self.thread: threading.Thread | None = None
+
+        # surfaces of evicted entries, eviction may happen on the prebake thread,
+        # so the texture atlas lets go of them in update, on the main thread
+        self.evicted_surfaces: list[pygame.Surface] = []
+
+        self.scaled: int = 0
+        self.hits: int = 0
+        self.evicted: int = 0
+
+    @property
+    def as_string(self) -> str:
+        return (f"entries: {len(self.entries)}, "
+                f"idle: {len(self.idle)} ({self.idle_bytes} B), "
+                f"max bytes: {self.max_bytes}, "
+                f"scaled: {self.scaled}, "
+                f"hits: {self.hits}, "
+                f"evicted: {self.evicted}, "
+                f"queued: {len(self.queued)}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+    @staticmethod
+    def key(kind: str, name: str, tile_size: int, flip: FlipState=NO_FLIP) -> ResizeKey:
+        return kind, name, tile_size, flip
+
+    # the key of an asset and, for animations with flipped frames, the keys of those
+    def keys_of(self, kind: str, name: str, tile_size: int) -> list[ResizeKey]:
+        keys: list[ResizeKey] = [self.key(kind, name, tile_size)]
+
+        if kind == "animation" and self.game.assets.animations[name].flipped_generated:
+            keys += [self.key(kind, name, tile_size, flip) for flip in self.FLIPS]
+
+        return keys
+
+    # surfaces of key, for images a list of one, to be given back with release
+    def acquire(self, key: ResizeKey) -> list[pygame.Surface]:
+        with self.condition:
+            self.queued.pop(key, None)
+
+            while key in self.baking:
+                self.condition.wait()
+
+            surfaces: list[pygame.Surface] | None = self.entries.get(key)
+
+        if surfaces is None:
+            surfaces = self._scale(key)
+        else:
+            self.hits += 1
+
+        with self.condition:
+            if key not in self.entries:
+                self._store(key, surfaces)
+
+            surfaces = self.entries[key]
+
+            if self.references[key] == 0 and key in self.idle:
+                del self.idle[key]
+                self.idle_bytes -= self.entry_bytes[key]
+
+            self.references[key] += 1
+
+        if self.game.assets.atlas_loaded:
+            self.game.graphics.atlas.add_many(self.atlas_surfaces(key))
+
+        return surfaces
+
+    def release(self, key: ResizeKey) -> None:
+        with self.condition:
+            assert self.references.get(key, 0) > 0, f"{key} released more than acquired"
+
+            self.references[key] -= 1
+            if self.references[key] == 0:
+                self._make_idle(key)
+
+    # scales on a thread what acquire is going to ask for, keys already there or queued are skipped
+    def prebake(self, keys: list[ResizeKey]) -> None:
+        with self.condition:
+            for key in keys:
+                if key not in self.entries and key not in self.baking:
+                    self.queued[key] = None
+
+            if self.queued and self.thread is None:
+                self.thread = threading.Thread(target=self._bake, daemon=True, name="resized asset prebake")
+                self.thread.start()
+
+    # keys of what ongrid tiles of tilemap_data use, tilemap_data as in a json file or as BinaryTilemap.decode gives
+    def prebake_tilemap_data(self, tilemap_data: dict) -> None:
+        keys: list[ResizeKey] = []
+
+        for grid_data in tilemap_data["grids"]:
+            if "sections" in grid_data:
+                name_indices: np.ndarray = np.unique(grid_data["sections"]["tiles"]["name indices"])
+                used: set[tuple[str, str]] = {tuple(tilemap_data["names"][index]) for index in name_indices.tolist()}
+            else:
+                used: set[tuple[str, str]] = {
+                    ("image", tile_data["image"]) if "image" in tile_data else ("animation", tile_data["animation"])
+                    for tile_data in grid_data["tiles"]
+                }
+
+            for kind, name in used:
+                if self._needs_scaling(kind, name, grid_data["tile size"]):
+                    keys += self.keys_of(kind, name, grid_data["tile size"])
+
+        self.prebake(keys)
+
+    def wait(self) -> None:
+        thread: threading.Thread | None = self.thread
+        if thread is not None:
+            thread.join()
+
+    def _bake(self) -> None:
+        while True:
+            with self.condition:
+                if not self.queued:
+                    self.thread = None
+                    return
+
+                key: ResizeKey = next(iter(self.queued))
+                del self.queued[key]
+                self.baking.add(key)
+
+            surfaces: list[pygame.Surface] = self._scale(key)
+
+            with self.condition:
+                self.baking.discard(key)
+
+                if key not in self.entries:
+                    self._store(key, surfaces)
+                    self._make_idle(key)
+
+                self.condition.notify_all()
+
+    def _needs_scaling(self, kind: str, name: str, tile_size: int) -> bool:
+        if kind == "image":
+            image: pygame.Surface | None = self.game.assets.images.get(name)
+            return image is not None and image.get_size() != (tile_size, tile_size)
+
+        return name in self.game.assets.animations
+
+    def _scale(self, key: ResizeKey) -> list[pygame.Surface]:
+        kind, name, tile_size, flip = key
+        resolution: Resolution = (tile_size, tile_size)
+
+        if kind == "image":
+            originals: list[pygame.Surface] = [self.game.assets.images[name]]
+        else:
+            originals: list[pygame.Surface] = self.game.assets.animations[name].frames
+
+        surfaces: list[pygame.Surface] = []
+        for original in originals:
+            # smoothscale takes only 24 and 32 bit surfaces
+            if self.smooth and original.get_bitsize() in (24, 32):
+                surface: pygame.Surface = pygame.transform.smoothscale(original, resolution)
+            else:
+                surface: pygame.Surface = pygame.transform.scale(original, resolution)
+
+            if flip != NO_FLIP:
+                surface = pygame.transform.flip(surface, *flip)
+
+            surfaces.append(surface)
+
+        self.scaled += 1
+        return surfaces
+
+    # with condition held
+    def _store(self, key: ResizeKey, surfaces: list[pygame.Surface]) -> None:
+        self.entries[key] = surfaces
+        self.references[key] = 0
+        self.entry_bytes[key] = sum(surface.get_width() * surface.get_height() * surface.get_bytesize()
+                                    for surface in surfaces)
+
+    # with condition held
+    def _make_idle(self, key: ResizeKey) -> None:
+        self.idle[key] = None
+        self.idle_bytes += self.entry_bytes[key]
+
+        while self.idle_bytes > self.max_bytes:
+            evicted_key, _ = self.idle.popitem(last=False)
+            self._evict(evicted_key)
+
+    # with condition held
+    def _evict(self, key: ResizeKey) -> None:
+        self.idle_bytes -= self.entry_bytes.pop(key)
+        self.evicted_surfaces += self.entries.pop(key)
+        del self.references[key]
+
+        self.evicted += 1
+
+    # main thread only, atlas regions of evicted entries are kept, acquiring them again binds the new surfaces to them
+    def update(self) -> None:
+        with self.condition:
+            evicted_surfaces: list[pygame.Surface] = self.evicted_surfaces
+            self.evicted_surfaces = []
+
+        if self.game.assets.atlas_loaded:
+            for surface in evicted_surfaces:
+                self.game.graphics.atlas.unbind_surface(surface)
+
+    # texture atlas names of the surfaces of key
+    def atlas_surfaces(self, key: ResizeKey) -> dict[str, pygame.Surface]:
+        kind, name, tile_size, flip = key
+        surfaces: list[pygame.Surface] = self.entries[key]
+
+        atlas_name: str = TextureAtlas.resized_image_name(tile_size, name, flip)
+        if kind == "image":
+            return {atlas_name: surfaces[0]}
+
+        return {TextureAtlas.animation_frame_name(atlas_name, i): frame for i, frame in enumerate(surfaces)}
+
+    # atlas surfaces of every entry some tilemap holds
+    def held_atlas_surfaces(self) -> dict[str, pygame.Surface]:
+        surfaces: dict[str, pygame.Surface] = {}
+
+        with self.condition:
+            for key, references in self.references.items():
+                if references > 0:
+                    surfaces |= self.atlas_surfaces(key)
+
+        return surfaces
@@ -1,10 +1,16 @@
 import json
 from heapq import heapify, heappush, heappop
+import numpy as np
 import pygame
+from scripts.AssetClasses.Tilemap.binary_tilemap import BinaryTilemap
 from scripts.AssetClasses.Tilemap.grid import Grid
 from scripts.AssetClasses.Tilemap.gridcaster import Gridcaster
+from scripts.AssetClasses.Tilemap.resized_asset_cache import ResizeKey
+from scripts.AssetClasses.Tilemap.tilemap_saver import TilemapSaver
 from scripts.AssetClasses.Tilemap.Tiles.tile import Tile
 from scripts.AssetClasses.Animation.animation import Animation
+from scripts.AssetClasses.Animation.animation_clock import AnimationClock
+from scripts.AssetClasses.Tilemap.Tiles.animated_tile import AnimatedTile
 from scripts.GameTypes import WorldPosition, Percentage, FocusedPosition, DisplayPosition, TileHitInfo, WorldRay, \
     TilePosition
 
@@ -16,9 +22,12 @@ class Tilemap:
         self.name: str = name
         self.filepath: str = filepath
         self.standard_tile_size: int = standard_tile_size
-        self.position: WorldPosition = position
         self.alpha: Percentage = alpha
 
+        # bumped when position gets assigned, tiles cache their world rects against it
+        self.position_version: int = 0
+        self._position: WorldPosition = position
+
         self.grids: dict[str, Grid] = {}
         self.grids_ordered: list[Grid] = []
 
@@ -28,11 +37,36 @@ class Tilemap:
         self.tilemap_resized_animations: dict[int, dict[str, Animation]] = {}
         self.resized_animation_names: dict[int, dict[Animation, str]] = {}
 
+        # what the resized images and animations above hold in assets.resized_cache, given back by release
+        self.resized_keys: list[ResizeKey] = []
+
         self.tilemap_cloned_animations: dict[str, Animation] = {}
         self.tilemap_cloned_names: dict[Animation, str] = {}
 
         self.tile_groups: dict[str, set[Tile]] = {}
 
+        # when set, animations read their frame off it and update_animations has nothing to do, see use_animation_clock
+        self.animation_clock: AnimationClock | None = None
+
+        # draw grids with graphics.tile_renderer, tiles then land over the pygame display (opengl only)
+        self.gpu_rendering: bool = False
+
+        # set when only the regions around the camera are loaded, see TilemapStreamer
+        self.streamer: 'TilemapStreamer | None' = None
+
+        # keeps encoded regions between binary saves
+        self.saver: TilemapSaver = TilemapSaver(self)
+
+    # assign to move the tilemap, changing x or y in place goes unnoticed by cached tile rects
+    @property
+    def position(self) -> WorldPosition:
+        return self._position
+
+    @position.setter
+    def position(self, position: WorldPosition) -> None:
+        self._position = position
+        self.position_version += 1
+
     @property
     def display_position(self) -> DisplayPosition:
         return self.game.camera.position_world_to_display(self.position)
@@ -55,6 +89,9 @@ class Tilemap:
             return True
 
         anim: Animation = self.game.assets.animations[animation_name].hard_clone
+        if self.animation_clock is not None:
+            anim.use_clock(self.animation_clock)
+
         self.tilemap_cloned_animations[animation_name] = anim
         self.tilemap_cloned_names[anim] = animation_name
 
@@ -137,17 +174,69 @@ class Tilemap:
 
         return found_and_removed
 
+    # resized images are shared, animations get their own play state over the same frames
     @property
     def clone(self) -> 'Tilemap':
-        return self.game.utilities.load_tilemap_from_data(self.as_json, self.filepath, self.game)
+        assert self.streamer is None, "streamed tilemap holds only the regions around the camera"
+
+        tilemap: Tilemap = Tilemap(self.game, self.name, self.filepath, self.standard_tile_size,
+                                   pygame.Vector2(self.position), self.alpha)
+
+        for key in self.resized_keys:
+            tilemap.acquire_resized(key)
 
+        for tile_size, resized_images in self.tilemap_resized_images.items():
+            tilemap.tilemap_resized_images[tile_size] = dict(resized_images)
+            tilemap.resized_image_names[tile_size] = dict(self.resized_image_names[tile_size])
+
+        tilemap.animation_clock = self.animation_clock
+
+        animations: dict[Animation, Animation] = {}
+        for tile_size, resized_animations in self.tilemap_resized_animations.items():
+            tilemap.tilemap_resized_animations[tile_size] = {}
+            tilemap.resized_animation_names[tile_size] = {}
+
+            for animation_name, animation in resized_animations.items():
+                animations[animation] = animation.clone
+                tilemap.tilemap_resized_animations[tile_size][animation_name] = animations[animation]
+                tilemap.resized_animation_names[tile_size][animations[animation]] = animation_name
+
+        for animation_name, animation in self.tilemap_cloned_animations.items():
+            animations[animation] = animation.clone
+            tilemap.tilemap_cloned_animations[animation_name] = animations[animation]
+            tilemap.tilemap_cloned_names[animations[animation]] = animation_name
+
+        for grid in self.grids.values():
+            tilemap.add_grid(grid.clone_into(tilemap, animations))
+
+        return tilemap
+
+    def acquire_resized(self, key: ResizeKey) -> list[pygame.Surface]:
+        self.resized_keys.append(key)
+        return self.game.assets.resized_cache.acquire(key)
+
+    # gives back the resized images and animations, for when the tilemap is dropped
+    def release(self) -> None:
+        self.saver.wait()
+
+        for key in self.resized_keys:
+            self.game.assets.resized_cache.release(key)
+
+        self.resized_keys = []
+
+    # everything but the grids
     @property
-    def as_json(self) -> dict:
+    def settings_json(self) -> dict:
         return {
             "name": self.name,
             "standard tile size": self.standard_tile_size,
             "alpha": self.alpha,
-            "position": list(self.position),
+            "position": list(self.position)
+        }
+
+    @property
+    def as_json(self) -> dict:
+        return self.settings_json | {
             "grids": [grid.as_json for grid in self.grids.values()]
         }
 
@@ -167,7 +256,15 @@ class Tilemap:
     def __str__(self):
         return self.as_string
 
+    # format follows the file extension, compact only matters for json
+    # binary saves encode only changed regions and return while the file is still being written, see TilemapSaver
     def save(self, compact: bool=True) -> None:
+        assert self.streamer is None, "streamed tilemap holds only the regions around the camera"
+
+        if BinaryTilemap.is_binary_path(self.filepath):
+            self.saver.save()
+            return
+
         with open(self.filepath, "w") as f:
             if compact:
                 json.dump(self.as_json, f, separators=(',', ':'), indent=None)
@@ -237,6 +334,38 @@ class Tilemap:
 
         return best_hit
 
+    # raycast_ongrid for many rays at once, see Grid.raycast_many_ongrid, offgrid tiles are not considered
+    # hit indices are -1 for no hit, tiles_from_raycast turns them into tiles while the grids are unchanged
+    def raycast_many(self, origins: np.ndarray, directions: np.ndarray,
+                     max_length: float=Gridcaster.MAX_CAST_LENGTH,
+                     physical_only: bool=True) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        count: int = len(origins)
+        distances: np.ndarray = np.full(count, -1.0)
+        indices: np.ndarray = np.full(count, -1, dtype=np.int64)
+        normals: np.ndarray = np.zeros((count, 2))
+
+        grid_count: int = len(self.grids_ordered)
+        for grid_index, grid in enumerate(self.grids_ordered):
+            if physical_only and not grid.physical:
+                continue
+
+            grid_distances, grid_indices, grid_normals = grid.raycast_many_ongrid(origins, directions, max_length)
+
+            better: np.ndarray = (grid_distances >= 0) & ((grid_distances < distances) | (distances < 0))
+            distances[better] = grid_distances[better]
+            indices[better] = grid_indices[better].astype(np.int64) * grid_count + grid_index
+            normals[better] = grid_normals[better]
+
+        return distances, indices, normals
+
+    def tiles_from_raycast(self, indices: np.ndarray) -> list[Tile | None]:
+        grid_count: int = len(self.grids_ordered)
+
+        return [
+            None if index < 0 else self.grids_ordered[index % grid_count].tiles.table[index // grid_count]
+            for index in np.asarray(indices).tolist()
+        ]
+
     def get_gridcasters(self, ray: WorldRay, known_hit: TileHitInfo=(-1, None),
                         physical_only: bool=True) -> list[Gridcaster]:
         gridcasters: list[Gridcaster] = [
@@ -286,7 +415,26 @@ class Tilemap:
 
             grid.blit_faded()
 
+    # tiles that clone their animation keep only a phase on the shared one while on a clock
+    def use_animation_clock(self, use_clock: bool=True) -> None:
+        self.animation_clock = self.game.assets.animation_clock if use_clock else None
+
+        for resized_animations in self.tilemap_resized_animations.values():
+            for animation in resized_animations.values():
+                animation.use_clock(self.animation_clock)
+
+        for animation in self.tilemap_cloned_animations.values():
+            animation.use_clock(self.animation_clock)
+
+        for grid in self.grids_ordered:
+            for tile in grid.tiles.values() + list(grid.offgrid_background) + list(grid.offgrid_foreground):
+                if isinstance(tile, AnimatedTile) and tile.animation_cloned:
+                    tile.bind_animation()
+
     def update_animations(self, advance_by_time: bool=True) -> None:
+        if self.animation_clock is not None:
+            return
+
         for tile_size in self.tilemap_resized_animations.keys():
             for animation in self.tilemap_resized_animations[tile_size].values():
                 if advance_by_time:
@@ -301,6 +449,9 @@ class Tilemap:
                 animation.advance_frame()
 
     def update_animation(self, animation_name: str, advance_by_time: bool=True) -> None:
+        if self.animation_clock is not None:
+            return
+
         for tile_size in self.tilemap_resized_animations.keys():
             if animation_name in self.tilemap_resized_animations[tile_size]:
                 if advance_by_time:
@@ -0,0 +1,153 @@
+import io
+import os
+import threading
+
+import pygame
+
+from scripts.AssetClasses.Tilemap.binary_tilemap import BinaryTilemap, Region
+from scripts.AssetClasses.Tilemap.Tiles.tile import Tile
+
+
+# saves a tilemap as .mtm by encoding again only the regions its grids marked dirty since the last save,
+# the other regions keep their encoded blocks, the file is written on a thread from bytes made on the main thread
+class TilemapSaver:
+    def __init__(self, tilemap: 'Tilemap'):
+        self.tilemap: 'Tilemap' = tilemap
+
+        # grows only, blocks index into it
+        self.names: list[list[str]] = []
+        self.name_indices: dict[tuple[str, str], int] = {}
+
+        self.blocks: dict['Grid', dict[Region, bytes]] = {}
+        self.tile_sizes: dict['Grid', int] = {}  # offgrid regions depend on it
+
+        self.thread: threading.Thread | None = None
+
+        self.saves: int = 0
+        self.encoded: int = 0
+
+    @property
+    def as_string(self) -> str:
+        return (f"tilemap: {self.tilemap.name}, "
+                f"cached regions: {sum(len(blocks) for blocks in self.blocks.values())}, "
+                f"saves: {self.saves}, "
+                f"encoded: {self.encoded}, "
+                f"writing: {self.writing}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+    @property
+    def writing(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    # takes the blocks of a file the tilemap was just loaded from as they are, instead of encoding them on first save
+    def seed(self, data: bytes) -> None:
+        version, flags = BinaryTilemap.read_version(data)
+        if version != BinaryTilemap.VERSION or not flags & BinaryTilemap.FLAG_ZLIB:
+            return
+
+        header, _, blocks_offset = BinaryTilemap.read_header(io.BytesIO(data))
+        self.names = header["names"]
+        self.name_indices = {(kind, name): index for index, (kind, name) in enumerate(self.names)}
+
+        for grid_data in header["grids"]:
+            grid: 'Grid' = self.tilemap.grids[grid_data["name"]]
+
+            self.blocks[grid] = {
+                (region_x, region_y): data[blocks_offset + offset:blocks_offset + offset + length]
+                for region_x, region_y, offset, length in grid_data["regions"]
+            }
+            self.tile_sizes[grid] = grid.tile_size
+            grid.dirty_regions = set()
+
+    def save(self) -> None:
+        self.wait()
+
+        grids: list['Grid'] = list(self.tilemap.grids.values())
+        self.blocks = {grid: self.blocks[grid] for grid in grids if grid in self.blocks}
+
+        for grid in grids:
+            if grid not in self.blocks or self.tile_sizes[grid] != grid.tile_size:
+                self.blocks[grid] = {}
+                regions: dict[Region, dict[str, list[Tile]]] = self.group_all(grid)
+            else:
+                regions: dict[Region, dict[str, list[Tile]]] = {
+                    region: self.tiles_in_region(grid, region) for region in grid.dirty_regions
+                }
+
+            for region, tiles in regions.items():
+                if not any(tiles.values()):
+                    self.blocks[grid].pop(region, None)
+                    continue
+
+                region_data: dict[str, list[dict]] = {
+                    section: [tile.as_json for tile in section_tiles] for section, section_tiles in tiles.items()
+                }
+                self.blocks[grid][region] = BinaryTilemap.encode_region(region_data, self.names, self.name_indices)
+                self.encoded += 1
+
+            self.tile_sizes[grid] = grid.tile_size
+            grid.dirty_regions = set()
+
+        header: dict = self.tilemap.settings_json | {"grids": [grid.settings_json for grid in grids]}
+
+        # bytes only from here, tiles can change while the thread writes
+        parts: list[bytes] = BinaryTilemap.pack(header, [self.blocks[grid] for grid in grids], list(self.names))
+
+        self.thread = threading.Thread(target=self._write, args=(self.tilemap.filepath, parts),
+                                       name=f"tilemap saver {self.tilemap.name}")
+        self.thread.start()
+        self.saves += 1
+
+    # written next to the file and swapped in, a save cut short leaves the old file whole
+    @staticmethod
+    def _write(path: str, parts: list[bytes]) -> None:
+        with open(f"{path}.tmp", "wb") as f:
+            f.writelines(parts)
+
+        os.replace(f"{path}.tmp", path)
+
+    def wait(self) -> None:
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    @staticmethod
+    def group_all(grid: 'Grid') -> dict[Region, dict[str, list[Tile]]]:
+        regions: dict[Region, dict[str, list[Tile]]] = {}
+        sections: zip = zip(BinaryTilemap.SECTIONS,
+                            (grid.tiles.values(), grid.offgrid_background, grid.offgrid_foreground))
+
+        for section, tiles in sections:
+            for tile in tiles:
+                region: Region = BinaryTilemap.region_of(tile.position, section, grid.tile_size)
+
+                if region not in regions:
+                    regions[region] = {name: [] for name in BinaryTilemap.SECTIONS}
+
+                regions[region][section].append(tile)
+
+        return regions
+
+    @staticmethod
+    def tiles_in_region(grid: 'Grid', region: Region) -> dict[str, list[Tile]]:
+        size: int = BinaryTilemap.REGION_SIZE
+        side: int = size * grid.tile_size
+        rect: pygame.FRect = pygame.FRect(region[0] * side, region[1] * side, side, side)
+
+        return {
+            "tiles": grid.tiles.query((region[0] * size, (region[0] + 1) * size),
+                                      (region[1] * size, (region[1] + 1) * size)),
+            "offgrid background": [
+                tile for tile in grid.offgrid_background_hash.query_rect(rect)
+                if BinaryTilemap.region_of(tile.position, "offgrid background", grid.tile_size) == region
+            ],
+            "offgrid foreground": [
+                tile for tile in grid.offgrid_foreground_hash.query_rect(rect)
+                if BinaryTilemap.region_of(tile.position, "offgrid foreground", grid.tile_size) == region
+            ]
+        }
@@ -0,0 +1,163 @@
+import queue
+import threading
+import time
+
+from scripts.AssetClasses.Tilemap.binary_tilemap import BinaryTilemap, Region
+from scripts.AssetClasses.Tilemap.grid import Grid
+from scripts.AssetClasses.Tilemap.tilemap import Tilemap
+from scripts.AssetClasses.Tilemap.Tiles.tile import Tile
+from scripts.GameTypes import GridRect
+
+RegionKey = tuple[int, Region]  # grid index in the file, region
+
+
+# keeps only the regions of a binary tilemap around the camera loaded
+# a background thread reads and decodes region blocks, update() builds them into tiles on the main thread
+# within budget and evicts regions that got further than evict_margin
+# tilemap has only part of its tiles at any time, so it can't be saved or cloned
+class TilemapStreamer:
+    DEFAULT_MARGIN: float = 512  # grid units around the display to have loaded
+    DEFAULT_EVICT_MARGIN: float = 1024  # grid units around the display after which regions get evicted
+    DEFAULT_BUDGET: float = 0.002  # seconds per frame spent building tiles, at least one region always gets built
+
+    def __init__(self, game: 'Game', path_to_file: str, margin: float=DEFAULT_MARGIN,
+                 evict_margin: float=DEFAULT_EVICT_MARGIN, budget: float=DEFAULT_BUDGET):
+        assert BinaryTilemap.is_binary_path(path_to_file), "only binary tilemaps can be streamed"
+        assert evict_margin >= margin
+
+        self.game: 'Game' = game
+        self.local_path: str = f"{game.utilities.DEFAULT_TILEMAP_PATH}/{path_to_file}"
+        self.margin: float = margin
+        self.evict_margin: float = evict_margin
+        self.budget: float = budget
+
+        with open(self.local_path, "rb") as f:
+            self.header, self.flags, self.blocks_offset = BinaryTilemap.read_header(f)
+
+        self.tilemap: Tilemap = game.utilities.load_empty_tilemap(self.header, self.local_path, game)
+        self.tilemap.streamer = self
+
+        self.grids: list[Grid] = []  # in file order
+        self.region_blocks: dict[RegionKey, tuple[int, int]] = {}
+
+        for grid_index, grid_data in enumerate(self.header["grids"]):
+            grid: Grid = game.utilities.load_empty_grid(grid_data, self.tilemap)
+            self.tilemap.add_grid(grid)
+            self.grids.append(grid)
+
+            for region_x, region_y, offset, length in grid_data["regions"]:
+                self.region_blocks[(grid_index, (region_x, region_y))] = (offset, length)
+
+        self.loaded: dict[RegionKey, list[Tile]] = {}
+        self.pending: set[RegionKey] = set()
+
+        self.requests: queue.Queue = queue.Queue()
+        self.results: queue.Queue = queue.Queue()
+        self.thread: threading.Thread = threading.Thread(target=self._read_regions, daemon=True,
+                                                         name=f"tilemap streamer {self.tilemap.name}")
+        self.thread.start()
+
+        self.built: int = 0
+        self.evicted: int = 0
+
+    @property
+    def as_string(self) -> str:
+        return (f"tilemap: {self.tilemap.name}, "
+                f"regions: {len(self.region_blocks)}, "
+                f"loaded: {len(self.loaded)}, "
+                f"pending: {len(self.pending)}, "
+                f"built: {self.built}, "
+                f"evicted: {self.evicted}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+    # runs on the streaming thread, file access and decoding only, tiles are made on the main thread
+    def _read_regions(self) -> None:
+        with open(self.local_path, "rb") as f:
+            while True:
+                key: RegionKey | None = self.requests.get()
+                if key is None:
+                    return
+
+                offset, length = self.region_blocks[key]
+                f.seek(self.blocks_offset + offset)
+                self.results.put((key, BinaryTilemap.decode_region(f.read(length), self.flags)))
+
+    def regions_around_camera(self, margin: float) -> set[RegionKey]:
+        regions: set[RegionKey] = set()
+
+        for grid_index, grid in enumerate(self.grids):
+            side: float = BinaryTilemap.REGION_SIZE * grid.tile_size
+            rect: GridRect = grid.camera_rect.inflate(2 * margin, 2 * margin)
+
+            for region_x in range(int(rect.left // side), int(rect.right // side) + 1):
+                for region_y in range(int(rect.top // side), int(rect.bottom // side) + 1):
+                    key: RegionKey = (grid_index, (region_x, region_y))
+
+                    if key in self.region_blocks:
+                        regions.add(key)
+
+        return regions
+
+    def update(self) -> None:
+        wanted: set[RegionKey] = self.regions_around_camera(self.margin)
+        kept: set[RegionKey] = self.regions_around_camera(self.evict_margin)
+
+        for key in wanted:
+            if key not in self.loaded and key not in self.pending:
+                self.pending.add(key)
+                self.requests.put(key)
+
+        for key in [key for key in self.loaded if key not in kept]:
+            self._evict(key)
+
+        start: float = time.perf_counter()
+        built_any: bool = False
+
+        while not built_any or time.perf_counter() - start < self.budget:
+            try:
+                key, sections = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            built_any = self._build(key, sections, kept) or built_any
+
+    # blocks until every region around the camera is built, for when a scene starts
+    def load_around_camera(self) -> None:
+        self.update()
+        kept: set[RegionKey] = self.regions_around_camera(self.evict_margin)
+
+        while self.pending:
+            key, sections = self.results.get()
+            self._build(key, sections, kept)
+
+    def _build(self, key: RegionKey, sections: dict[str, dict], kept: set[RegionKey]) -> bool:
+        self.pending.discard(key)
+
+        # camera moved away while it was being read
+        if key not in kept:
+            return False
+
+        grid: Grid = self.grids[key[0]]
+        self.loaded[key] = self.game.utilities.load_binary_sections(sections, self.header["names"], grid)
+        self.built += 1
+
+        return True
+
+    def _evict(self, key: RegionKey) -> None:
+        grid: Grid = self.grids[key[0]]
+
+        for tile in self.loaded.pop(key):
+            grid.remove_tile(tile, remove_from_tile_groups=True)
+
+        self.evicted += 1
+
+    def release(self) -> None:
+        self.requests.put(None)
+        self.thread.join()
+
+        self.tilemap.release()
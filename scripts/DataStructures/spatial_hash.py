@@ -0,0 +1,236 @@
+from typing import Iterator
+
+import pygame
+from pygame.math import Vector2
+
+from scripts.DataStructures.rays import Ray
+
+Cell = tuple[int, int]
+RayHit = tuple[float, object]
+
+
+# uniform grid over rects, every item is listed in each cell its rect touches
+# queries only look at items in the cells they cover, results come in insertion order
+class SpatialHash:
+    def __init__(self, cell_size: float):
+        assert cell_size > 0
+
+        self.cell_size: float = cell_size
+
+        self.cells: dict[Cell, set] = {}
+        self.rects: dict[object, pygame.FRect] = {}
+        self.item_cells: dict[object, list[Cell]] = {}
+        self.serials: dict[object, int] = {}
+        self._next_serial: int = 0
+
+        # only grows while anything is inside, bounds ray traversal
+        self.bounds: tuple[Cell, Cell] | None = None
+
+    @property
+    def as_string(self) -> str:
+        return (f"items: {len(self.rects)}, "
+                f"cells: {len(self.cells)}, "
+                f"cell size: {self.cell_size}, "
+                f"bounds: {self.bounds}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+    def __len__(self) -> int:
+        return len(self.rects)
+
+    def __contains__(self, item) -> bool:
+        return item in self.rects
+
+    def __iter__(self):
+        return iter(self.rects)
+
+    def _cell_range(self, left: float, top: float, right: float, bottom: float) -> tuple[Cell, Cell]:
+        return ((int(left // self.cell_size), int(top // self.cell_size)),
+                (int(right // self.cell_size), int(bottom // self.cell_size)))
+
+    def insert(self, item, rect: pygame.FRect) -> None:
+        if item in self.rects:
+            self.remove(item)
+
+        rect = pygame.FRect(rect)
+        (min_x, min_y), (max_x, max_y) = self._cell_range(rect.left, rect.top, rect.right, rect.bottom)
+
+        cells: list[Cell] = [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(item)
+
+        self.rects[item] = rect
+        self.item_cells[item] = cells
+        self.serials[item] = self._next_serial
+        self._next_serial += 1
+
+        if self.bounds is None:
+            self.bounds = ((min_x, min_y), (max_x, max_y))
+        else:
+            (bound_min_x, bound_min_y), (bound_max_x, bound_max_y) = self.bounds
+            self.bounds = ((min(min_x, bound_min_x), min(min_y, bound_min_y)),
+                           (max(max_x, bound_max_x), max(max_y, bound_max_y)))
+
+    def remove(self, item) -> bool:
+        if item not in self.rects:
+            return False
+
+        for cell in self.item_cells.pop(item):
+            items: set = self.cells[cell]
+            items.discard(item)
+
+            if not items:
+                del self.cells[cell]
+
+        del self.rects[item]
+        del self.serials[item]
+
+        if not self.rects:
+            self.bounds = None
+
+        return True
+
+    # call when an item moves or changes size
+    def update(self, item, rect: pygame.FRect) -> None:
+        serial: int = self.serials[item]
+        self.insert(item, rect)
+        self.serials[item] = serial
+
+    def clear(self) -> None:
+        self.cells = {}
+        self.rects = {}
+        self.item_cells = {}
+        self.serials = {}
+        self.bounds = None
+
+    def _candidates(self, cell_range: tuple[Cell, Cell]) -> set:
+        (min_x, min_y), (max_x, max_y) = cell_range
+        area: int = (max_x - min_x + 1) * (max_y - min_y + 1)
+        candidates: set = set()
+
+        # covering more cells than are occupied, walking the occupied ones is cheaper
+        if area > len(self.cells):
+            for (x, y), items in self.cells.items():
+                if min_x <= x <= max_x and min_y <= y <= max_y:
+                    candidates.update(items)
+
+            return candidates
+
+        for x in range(min_x, max_x + 1):
+            for y in range(min_y, max_y + 1):
+                items: set | None = self.cells.get((x, y))
+
+                if items is not None:
+                    candidates.update(items)
+
+        return candidates
+
+    def _ordered(self, items: list) -> list:
+        items.sort(key=self.serials.__getitem__)
+        return items
+
+    # items whose rect collides with rect, pygame colliderect rules
+    def query_rect(self, rect: pygame.FRect) -> list:
+        if not self.rects:
+            return []
+
+        rect = pygame.FRect(rect)
+        candidates: set = self._candidates(self._cell_range(rect.left, rect.top, rect.right, rect.bottom))
+
+        return self._ordered([item for item in candidates if rect.colliderect(self.rects[item])])
+
+    def query_circle(self, center: Vector2, radius: float) -> list:
+        if not self.rects:
+            return []
+
+        candidates: set = self._candidates(self._cell_range(center[0] - radius, center[1] - radius,
+                                                            center[0] + radius, center[1] + radius))
+        found: list = []
+
+        for item in candidates:
+            rect: pygame.FRect = self.rects[item]
+            nearest_x: float = min(max(center[0], rect.left), rect.right)
+            nearest_y: float = min(max(center[1], rect.top), rect.bottom)
+
+            if (nearest_x - center[0]) ** 2 + (nearest_y - center[1]) ** 2 <= radius ** 2:
+                found.append(item)
+
+        return self._ordered(found)
+
+    # cells the ray passes through in order, with the time the ray enters them, limited to bounds
+    def cells_along_ray(self, ray: Ray) -> Iterator[tuple[float, Cell]]:
+        if self.bounds is None:
+            return
+
+        (min_x, min_y), (max_x, max_y) = self.bounds
+        size: float = self.cell_size
+        box: pygame.FRect = pygame.FRect(min_x * size, min_y * size,
+                                         (max_x - min_x + 1) * size, (max_y - min_y + 1) * size)
+
+        time: float = ray.cast_against_rect(box)
+        if time < 0:
+            return
+
+        entry_point: Vector2 = ray.travel(time)
+        x: int = min(max(int(entry_point.x // size), min_x), max_x)
+        y: int = min(max(int(entry_point.y // size), min_y), max_y)
+
+        step_x: int = 1 if ray.direction.x > 0 else -1
+        step_y: int = 1 if ray.direction.y > 0 else -1
+
+        next_x_time: float = ((x + (step_x > 0)) * size - ray.position.x) * ray.inverse_direction.x
+        next_y_time: float = ((y + (step_y > 0)) * size - ray.position.y) * ray.inverse_direction.y
+        delta_x_time: float = size * abs(ray.inverse_direction.x)
+        delta_y_time: float = size * abs(ray.inverse_direction.y)
+
+        while min_x <= x <= max_x and min_y <= y <= max_y:
+            yield time, (x, y)
+
+            if next_x_time < next_y_time:
+                time = next_x_time
+                next_x_time += delta_x_time
+                x += step_x
+            else:
+                time = next_y_time
+                next_y_time += delta_y_time
+                y += step_y
+
+    # nearest item hit by the ray, known_hit is kept unless something is strictly closer
+    def raycast(self, ray: Ray, known_hit: RayHit=(-1, None)) -> RayHit:
+        best_hit: RayHit = known_hit
+        tested: set = set()
+        visited_cells: int = 0
+
+        for entry_time, cell in self.cells_along_ray(ray):
+            if 0 <= best_hit[0] < entry_time:
+                return best_hit
+
+            # long rays through sparse bounds, testing the rest directly is cheaper than stepping on
+            visited_cells += 1
+            if visited_cells > len(self.rects):
+                return self._raycast_items([item for item in self.rects if item not in tested], ray, best_hit)
+
+            items: set | None = self.cells.get(cell)
+            if items is None:
+                continue
+
+            untested: list = [item for item in items if item not in tested]
+            tested.update(untested)
+            best_hit = self._raycast_items(self._ordered(untested), ray, best_hit)
+
+        return best_hit
+
+    def _raycast_items(self, items: list, ray: Ray, best_hit: RayHit) -> RayHit:
+        for item in items:
+            time: float = ray.cast_against_rect(self.rects[item])
+
+            hit: bool = time >= 0
+            better_option: bool = time < best_hit[0] or best_hit[0] < 0
+            if hit and better_option:
+                best_hit = (time, item)
+
+        return best_hit
@@ -96,6 +96,7 @@ class CommandType(Enum):
     EFFECT=0
     DISPLAY_BLIT=1
     FRAG=2
+    TILES=3
 
 Viewport = tuple[float, float, float, float]
 ShaderAttributes = dict[str, tuple|Texture|list|Vector2|Vector3|Matrix2D|Matrix3D|Framebuffer]
@@ -51,5 +51,5 @@ class DoubleFramebuffer:
 
     @viewport.setter
     def viewport(self, new_viewport: Viewport) -> None:
-        self._fbo_front.viewport = new_viewport
-        self._fbo_back.viewport = new_viewport
+        self.graphics.gl_state.set_viewport(self._fbo_front, new_viewport)
+        self.graphics.gl_state.set_viewport(self._fbo_back, new_viewport)
@@ -7,20 +7,35 @@ from pygame import Vector2, Vector3
 from scripts.DataStructures.matrices import Matrix2D, Matrix3D
 from scripts.GameTypes import Viewport, ShaderAttributes
 from scripts.Utilities.Graphics.double_framebuffer import DoubleFramebuffer
+from scripts.Utilities.Graphics.gl_state import BlendFunc
 
 
 class Frag:
+    # attribute setters by value type, subclasses are resolved once and cached in SETTERS too
+    SETTERS: dict[type, str] = {
+        Texture: "_set_texture",
+        Framebuffer: "_set_framebuffer",
+        DoubleFramebuffer: "_set_double_framebuffer",
+        tuple: "_set_sequence",
+        list: "_set_sequence",
+        Vector2: "_set_vector2",
+        Vector3: "_set_vector3"
+    }
+
     def __init__(self, game: 'Game', program: Program):
         self.game: 'Game' = game
         self.graphics: 'Graphics' = self.game.graphics
         self.ctx: Context = self.game.graphics.ctx
         self.program: Program = program
+        self.gl_state: 'GLState' = self.graphics.gl_state
         self.attributes: ShaderAttributes = {}
+        self._texture_id: int = 0
 
         self.target: DoubleFramebuffer = self.graphics.double_fbo
         self.viewport: Viewport | None = self.graphics.default_viewport
         self.flip_fbo: bool = True
         self.blend: bool = True
+        self.blend_funcs: BlendFunc = (moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA)
 
         self.vao: VertexArray = self.ctx.vertex_array(self.program, [
             (self.graphics.quad_vertices, '2f', 'position'),
@@ -31,46 +46,58 @@ class Frag:
         self.vao.release()
 
     def _update_attributes(self) -> None:
-        texture_id: int = 0
+        self._texture_id = 0
 
         for key, value in self.attributes.items():
-            if type(value) == Texture:
-                value.use(texture_id)
-                self.program[key] = texture_id
-                texture_id += 1
+            setter: str | None = Frag.SETTERS.get(type(value))
+            if setter is None:
+                setter = self._resolve_setter(type(value))
+
+            getattr(self, setter)(key, value)
+
+    @staticmethod
+    def _resolve_setter(value_type: type) -> str:
+        if issubclass(value_type, Matrix2D) or issubclass(value_type, Matrix3D):
+            setter = "_set_matrix"
+        else:
+            setter = "_set_value"
+
+        Frag.SETTERS[value_type] = setter
+        return setter
+
+    def _set_texture(self, key: str, texture: Texture) -> None:
+        self.gl_state.use_texture(texture, self._texture_id)
+        self.gl_state.set_uniform(self.program, key, self._texture_id)
+        self._texture_id += 1
+
+    def _set_framebuffer(self, key: str, framebuffer: Framebuffer) -> None:
+        self._set_texture(key, framebuffer.color_attachments[0])
 
-            elif type(value) == Framebuffer:
-                value.color_attachments[0].use(texture_id)
-                self.program[key] = texture_id
-                texture_id += 1
+    def _set_double_framebuffer(self, key: str, double_fbo: DoubleFramebuffer) -> None:
+        self._set_texture(key, double_fbo.front)
 
-            elif type(value) == DoubleFramebuffer:
-                value.front.use(texture_id)
-                self.program[key] = texture_id
-                texture_id += 1
+    def _set_sequence(self, key: str, value: tuple | list) -> None:
+        if len(value) == 0:
+            return
 
-            elif type(value) in {tuple, list}:
-                if len(value) == 0:
-                    continue
+        self.gl_state.set_uniform(self.program, key, tuple(value))
 
-                self.program[key] = value
+    def _set_vector2(self, key: str, value: Vector2) -> None:
+        self.gl_state.set_uniform(self.program, key, (value.x, value.y))
 
-            elif type(value) == Vector2:
-                self.program[key] = value.x, value.y
-            elif type(value) == Vector3:
-                self.program[key] = value.x, value.y, value.z
+    def _set_vector3(self, key: str, value: Vector3) -> None:
+        self.gl_state.set_uniform(self.program, key, (value.x, value.y, value.z))
 
-            elif issubclass(type(value), Matrix2D) or issubclass(type(value), Matrix3D):
-                self.program[key].write(data=value.as_array)
+    def _set_matrix(self, key: str, value: Matrix2D | Matrix3D) -> None:
+        self.gl_state.set_uniform_bytes(self.program, key, bytes(value.as_array))
 
-            else:
-                self.program[key] = value
+    def _set_value(self, key: str, value) -> None:
+        self.gl_state.set_uniform(self.program, key, value)
 
     def execute(self, reset_attributes: bool=True):
         self._update_attributes()
 
-        if self.blend:
-            self.ctx.enable(moderngl.BLEND)
+        self.gl_state.set_blend(self.blend, funcs=self.blend_funcs)
         if self.viewport is not None:
             self.target.viewport = self.viewport
 
@@ -79,7 +106,6 @@ class Frag:
         self.target.use()
         self.vao.render(moderngl.TRIANGLE_STRIP)
 
-        self.ctx.disable(moderngl.BLEND)
         self.graphics.double_fbo.viewport = self.graphics.default_viewport
 
         if reset_attributes:
@@ -87,6 +113,7 @@ class Frag:
 
     def reset_attributes(self) -> None:
         self.blend = True
+        self.blend_funcs = (moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA)
         self.flip_fbo = True
         self.viewport = self.graphics.default_viewport
         self.target = self.graphics.double_fbo
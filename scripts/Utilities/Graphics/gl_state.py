@@ -0,0 +1,155 @@
+import moderngl
+from moderngl import Context, Program, Texture, Framebuffer, Uniform
+
+from scripts.GameTypes import Viewport
+
+BlendFunc = tuple[int, int] | tuple[int, int, int, int]
+
+
+# remembers what was last sent to the context and skips changes that would not change anything
+# everything drawing through graphics should go through this, direct ctx calls make the cache stale,
+# in which case call invalidate()
+class GLState:
+    def __init__(self, ctx: Context):
+        self.ctx: Context = ctx
+
+        # moderngl binds textures to default_texture_unit when creating and writing them,
+        # moving that to the last unit keeps it away from units tracked here
+        self.scratch_texture_unit: int = self.ctx.max_texture_units - 1
+        self.ctx.default_texture_unit = self.scratch_texture_unit
+
+        self.blend: bool = False
+        self.blend_equation: int = moderngl.FUNC_ADD
+        self.blend_func: BlendFunc = (moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA)
+
+        self.textures: list[Texture | None] = [None] * self.scratch_texture_unit
+        self.uniforms: dict[Program, dict[str, Uniform]] = {}
+        self.uniform_values: dict[Program, dict[str, object]] = {}
+
+        self.skipped: int = 0
+        self.applied: int = 0
+
+        self.invalidate()
+
+    @property
+    def as_string(self) -> str:
+        return (f"blend: {self.blend}, "
+                f"bound textures: {sum(texture is not None for texture in self.textures)}, "
+                f"programs tracked: {len(self.uniform_values)}, "
+                f"applied: {self.applied}, "
+                f"skipped: {self.skipped}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+    # forgets tracked state and puts the context into the tracked defaults
+    def invalidate(self) -> None:
+        self.ctx.disable(moderngl.BLEND)
+        self.ctx.blend_equation = moderngl.FUNC_ADD
+        self.ctx.blend_func = moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA
+
+        self.blend = False
+        self.blend_equation = moderngl.FUNC_ADD
+        self.blend_func = (moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA)
+
+        self.textures = [None] * self.scratch_texture_unit
+        self.uniform_values = {}
+
+    def set_blend(self, blend: bool, equation: int=moderngl.FUNC_ADD,
+                  funcs: BlendFunc=(moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA)) -> None:
+        if blend != self.blend:
+            if blend:
+                self.ctx.enable(moderngl.BLEND)
+            else:
+                self.ctx.disable(moderngl.BLEND)
+
+            self.blend = blend
+            self.applied += 1
+        else:
+            self.skipped += 1
+
+        # equation and funcs only matter while blending, they are set lazily
+        if not blend:
+            return
+
+        if equation != self.blend_equation:
+            self.ctx.blend_equation = equation
+            self.blend_equation = equation
+
+        funcs = tuple(funcs)
+        if funcs != self.blend_func:
+            self.ctx.blend_func = funcs
+            self.blend_func = funcs
+
+    def use_texture(self, texture: Texture, unit: int) -> None:
+        assert unit < self.scratch_texture_unit
+
+        if self.textures[unit] is texture:
+            self.skipped += 1
+            return
+
+        texture.use(unit)
+        self.textures[unit] = texture
+        self.applied += 1
+
+    def forget_texture(self, texture: Texture) -> None:
+        for i, bound in enumerate(self.textures):
+            if bound is texture:
+                self.textures[i] = None
+
+    def get_uniform(self, program: Program, key: str) -> Uniform:
+        members: dict[str, Uniform] | None = self.uniforms.get(program)
+        if members is None:
+            members = {}
+            self.uniforms[program] = members
+
+        uniform: Uniform | None = members.get(key)
+        if uniform is None:
+            uniform = program[key]
+            members[key] = uniform
+
+        return uniform
+
+    # value has to be immutable (numbers, tuples) for the comparison to mean anything
+    def set_uniform(self, program: Program, key: str, value) -> None:
+        values: dict[str, object] | None = self.uniform_values.get(program)
+        if values is None:
+            values = {}
+            self.uniform_values[program] = values
+
+        if key in values and values[key] == value:
+            self.skipped += 1
+            return
+
+        self.get_uniform(program, key).value = value
+        values[key] = value
+        self.applied += 1
+
+    def set_uniform_bytes(self, program: Program, key: str, data: bytes) -> None:
+        values: dict[str, object] | None = self.uniform_values.get(program)
+        if values is None:
+            values = {}
+            self.uniform_values[program] = values
+
+        if key in values and values[key] == data:
+            self.skipped += 1
+            return
+
+        self.get_uniform(program, key).write(data)
+        values[key] = data
+        self.applied += 1
+
+    def forget_program(self, program: Program) -> None:
+        self.uniforms.pop(program, None)
+        self.uniform_values.pop(program, None)
+
+    def set_viewport(self, framebuffer: Framebuffer, viewport: Viewport) -> None:
+        if framebuffer.viewport == tuple(viewport):
+            self.skipped += 1
+            return
+
+        framebuffer.viewport = viewport
+        self.applied += 1
@@ -1,3 +1,4 @@
+import pygame
 from pygame import Vector2
 
 from scenes.SPECIAL.Effects.Effect import Effect
@@ -7,7 +8,8 @@ from scripts.Utilities.Graphics.frag import Frag
 
 class GraphicsCommand:
     def __init__(self, game: 'Game', order: float, command_type: CommandType, effect: Effect | None=None,
-                 frag: Frag | None=None, display: str= "", alpha: float=1, offset: DisplayVector=None):
+                 frag: Frag | None=None, display: str= "", alpha: float=1, offset: DisplayVector=None,
+                 tile_renderer: 'TileRenderer'=None, dirty_rects: list[pygame.Rect] | None=None):
         if offset is None:
             offset = Vector2(0, 0)
 
@@ -20,6 +22,8 @@ class GraphicsCommand:
         self.display: str = display
         self.alpha: float = alpha
         self.offset: DisplayVector = offset
+        self.tile_renderer: 'TileRenderer' = tile_renderer
+        self.dirty_rects: list[pygame.Rect] | None = dirty_rects  # can be replaced every frame by the owner
 
         if command_type == CommandType.EFFECT:
             assert self.effect is not None
@@ -27,14 +31,19 @@ class GraphicsCommand:
             assert self.display != ""
         elif command_type == CommandType.FRAG:
             assert self.frag is not None
+        elif command_type == CommandType.TILES:
+            assert self.tile_renderer is not None
 
     def execute(self):
         if self.command_type == CommandType.EFFECT:
             self.effect.execute()
         elif self.command_type == CommandType.DISPLAY_BLIT:
-            self.game.window.blit_display(self.display, alpha=self.alpha, offset=self.offset)
+            self.game.window.blit_display(self.display, alpha=self.alpha, offset=self.offset,
+                                          dirty_rects=self.dirty_rects)
         elif self.command_type == CommandType.FRAG:
             self.frag.execute()
+        elif self.command_type == CommandType.TILES:
+            self.tile_renderer.execute()
 
     @property
     def as_string(self) -> str:
@@ -1,17 +1,44 @@
-import math
-
+import moderngl
+import numpy as np
 import pygame
 from moderngl import Context, Texture
-from pygame import Surface, Vector3, Vector2
+from pygame import Surface, Vector3
 
 from scripts.GameTypes import PixelPos, Color, Resolution, Byte, SignedByte, VectorColor
 
 
+# kernel approximated as a sum of rank outer products x_weights[i] (x) y_weights[i], per color channel
+class KernelDecomposition:
+    def __init__(self, x_weights: np.ndarray, y_weights: np.ndarray, error: float):
+        self.x_weights: np.ndarray = x_weights  # (rank, width, 3)
+        self.y_weights: np.ndarray = y_weights  # (rank, height, 3)
+        self.error: float = error  # relative frobenius error of the approximation, worst channel
+
+    @property
+    def rank(self) -> int:
+        return self.x_weights.shape[0]
+
+    @property
+    def as_string(self) -> str:
+        return (f"rank: {self.rank}, "
+                f"width: {self.x_weights.shape[1]}, "
+                f"height: {self.y_weights.shape[1]}, "
+                f"error: {self.error}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+
 class Kernel:
     ZERO_MULTIPLIER: float = 127/255
     POSITIVE_N: Byte = 128
     NEGATIVE_N: Byte = 127
 
+    DECOMPOSITION_TOLERANCE: float = 0.01
+
     ZERO: Byte = 127
     ZERO_TUPLE: tuple[Byte, Byte, Byte] = (127, 127, 127)
     ONE_TUPLE: tuple[Byte, Byte, Byte] = (128, 128, 128)
@@ -22,15 +49,55 @@ class Kernel:
         self.graphics: 'Graphics' = game.graphics
         self.ctx: Context = self.graphics.ctx
 
-        self.color_range = color_range
+        self._color_range: float = color_range
+        self._texture: Texture | None = None
 
-        self.kernel: Surface = Surface((1, 1))
-        self.kernel.fill(self.ONE_TUPLE)
+        # weights indexed [x, y, channel], the texture is only an encoding of them
+        self._weights: np.ndarray = np.ones((1, 1, 3))
 
         self.make_red: bool = True
         self.make_green: bool = True
         self.make_blue: bool = True
 
+    @property
+    def weights(self) -> np.ndarray:
+        return self._weights
+
+    # assign instead of writing into the array, or the texture won't know it changed
+    @weights.setter
+    def weights(self, weights: np.ndarray) -> None:
+        assert weights.ndim == 3 and weights.shape[2] == 3
+
+        self._weights = weights.astype(np.float64)
+        self._texture = None
+
+    @property
+    def color_range(self) -> float:
+        return self._color_range
+
+    @color_range.setter
+    def color_range(self, color_range: float) -> None:
+        self._color_range = color_range
+        self._texture = None
+
+    @property
+    def size(self) -> Resolution:
+        return self._weights.shape[0], self._weights.shape[1]
+
+    @property
+    def channels(self) -> list[int]:
+        return [channel for channel, make in enumerate((self.make_red, self.make_green, self.make_blue)) if make]
+
+    # weights as bytes the convolution shader decodes, (byte - ZERO) * color_range / 255
+    @property
+    def kernel(self) -> Surface:
+        encoded: np.ndarray = np.rint(self._weights * 255 * self.color_range_inverse) + self.ZERO
+        return pygame.surfarray.make_surface(np.clip(encoded, 0, 255).astype(np.uint8))
+
+    @kernel.setter
+    def kernel(self, kernel: Surface) -> None:
+        self.weights = (pygame.surfarray.array3d(kernel).astype(np.float64) - self.ZERO) * self.color_range / 255
+
     @property
     def color_range_zero(self) -> Vector3:
         return Vector3(Kernel.ZERO_MULTIPLIER * self.color_range)
@@ -45,17 +112,12 @@ class Kernel:
     def save(self) -> None:
         pygame.image.save(self.kernel, "kernel.png")
 
-    def set_intensity(self, x_y: tuple[int, int], value: Byte):
-        r, g, b, _ = self.kernel.get_at(x_y)
-
-        if self.make_red:
-            r = value
-        if self.make_green:
-            g = value
-        if self.make_blue:
-            b = value
+    def set_weight(self, x_y: tuple[int, int], value: float) -> None:
+        self._weights[x_y[0], x_y[1], self.channels] = value
+        self._texture = None
 
-        self.kernel.set_at(x_y, (r, g, b))
+    def set_intensity(self, x_y: tuple[int, int], value: Byte):
+        self.set_weight(x_y, self.unsigned_byte_to_float(value))
 
     def unsign_n(self, n: SignedByte) -> Byte:
         return n + self.ZERO
@@ -67,197 +129,188 @@ class Kernel:
         return n + self.ZERO, n + self.ZERO, n + self.ZERO
 
     def float_to_signed_byte(self, n: float) -> SignedByte:
-        return max(-127, min(128, round(n / math.ceil(self.color_range * 0.5) * 128)))
+        return max(-127, min(128, round(n * 255 * self.color_range_inverse)))
 
     def float_to_unsigned_byte(self, n: float) -> SignedByte:
         return self.unsign_n(self.float_to_signed_byte(n))
 
     def unsigned_byte_to_float(self, n: Byte) -> float:
-        n -= self.ZERO
-        n /= 128
-        n *= math.ceil(self.color_range * 0.5)
-        return n
+        return self.signed_byte_to_float(self.sign_n(n))
 
     def signed_byte_to_float(self, n: SignedByte) -> float:
-        n /= 128
-        n *= math.ceil(self.color_range * 0.5)
-        return n
+        return n * self.color_range / 255
 
     def become_clear(self, size: Resolution):
-        self.kernel = Surface(size)
-        self.kernel.fill(self.ZERO_TUPLE)
-
-        one: SignedByte = self.float_to_signed_byte(1)
-        self.kernel.set_at((
-            size[0] // 2, size[1] // 2
-        ), self.unsign_tuple(one))
+        self.weights = np.zeros((size[0], size[1], 3))
+        self._weights[size[0] // 2, size[1] // 2] = 1
 
     def become_laplacian(self) -> None:
         self.color_range = 10
         self.become_clear((3, 3))
-        self.set_intensity((1, 1), self.float_to_unsigned_byte(-4))
-        self.set_intensity((0, 1), self.float_to_unsigned_byte(1))
-        self.set_intensity((1, 0), self.float_to_unsigned_byte(1))
-        self.set_intensity((1, 2), self.float_to_unsigned_byte(1))
-        self.set_intensity((2, 1), self.float_to_unsigned_byte(1))
+        self.set_weight((1, 1), -4)
+        self.set_weight((0, 1), 1)
+        self.set_weight((1, 0), 1)
+        self.set_weight((1, 2), 1)
+        self.set_weight((2, 1), 1)
 
     def become_sharpen(self) -> None:
         self.color_range = 10
         self.become_clear((3, 3))
-        self.set_intensity((1, 1), self.float_to_unsigned_byte(5))
-        self.set_intensity((0, 1), self.float_to_unsigned_byte(-1))
-        self.set_intensity((1, 0), self.float_to_unsigned_byte(-1))
-        self.set_intensity((1, 2), self.float_to_unsigned_byte(-1))
-        self.set_intensity((2, 1), self.float_to_unsigned_byte(-1))
+        self.set_weight((1, 1), 5)
+        self.set_weight((0, 1), -1)
+        self.set_weight((1, 0), -1)
+        self.set_weight((1, 2), -1)
+        self.set_weight((2, 1), -1)
 
     def become_gauss(self, size: int=3, standard_deviation: float=1) -> None:
         self.color_range = 2
         self.become_clear((size, size))
 
-        gauss_func: callable = lambda x, y: math.e ** (-((x*x + y*y) / (2 * standard_deviation)))
-
-        calculations = [[0. for _ in range(size)] for _ in range(size)]
-        mid: Vector2 = Vector2(size) * 0.5
-        total_fill: float = 0
-
-        for x in range(size):
-            for y in range(size):
-                pos: Vector2 = Vector2(x, y) + Vector2(0.5, 0.5) - mid
-                gauss: float = gauss_func(*pos)
+        offsets: np.ndarray = np.arange(size) + 0.5 - size * 0.5
+        gauss: np.ndarray = np.exp(-(offsets[:, None] ** 2 + offsets[None, :] ** 2) / (2 * standard_deviation))
+        gauss /= np.sum(gauss)
 
-                total_fill += gauss
-                calculations[x][y] = gauss
-
-        fill_norm: float = 1. / total_fill
-        for x in range(size):
-            for y in range(size):
-                gauss: float = calculations[x][y] * fill_norm
-                final_value: SignedByte = int(gauss * Kernel.POSITIVE_N)
-                self.set_intensity((x, y), self.unsign_n(final_value))
+        self._weights[:, :, self.channels] = gauss[:, :, None]
 
     def become_sobel_x(self, clear_mid: bool=True):
         self.color_range = 5
         self.become_clear((3, 3))
 
         if clear_mid:
-            self.set_intensity((1, 1), self.ZERO)
+            self.set_weight((1, 1), 0)
 
-        self.set_intensity((0, 0), self.float_to_unsigned_byte(-1))
-        self.set_intensity((0, 1), self.float_to_unsigned_byte(-2))
-        self.set_intensity((0, 2), self.float_to_unsigned_byte(-1))
+        self.set_weight((0, 0), -1)
+        self.set_weight((0, 1), -2)
+        self.set_weight((0, 2), -1)
 
-        self.set_intensity((2, 0), self.float_to_unsigned_byte(1))
-        self.set_intensity((2, 1), self.float_to_unsigned_byte(2))
-        self.set_intensity((2, 2), self.float_to_unsigned_byte(1))
+        self.set_weight((2, 0), 1)
+        self.set_weight((2, 1), 2)
+        self.set_weight((2, 2), 1)
 
     def become_sobel_y(self, clear_mid: bool=True):
         self.color_range = 5
         self.become_clear((3, 3))
 
         if clear_mid:
-            self.set_intensity((1, 1), self.ZERO)
+            self.set_weight((1, 1), 0)
 
-        self.set_intensity((0, 0), self.float_to_unsigned_byte(-1))
-        self.set_intensity((1, 0), self.float_to_unsigned_byte(-2))
-        self.set_intensity((2, 0), self.float_to_unsigned_byte(-1))
+        self.set_weight((0, 0), -1)
+        self.set_weight((1, 0), -2)
+        self.set_weight((2, 0), -1)
 
-        self.set_intensity((0, 2), self.float_to_unsigned_byte(1))
-        self.set_intensity((1, 2), self.float_to_unsigned_byte(2))
-        self.set_intensity((2, 2), self.float_to_unsigned_byte(1))
+        self.set_weight((0, 2), 1)
+        self.set_weight((1, 2), 2)
+        self.set_weight((2, 2), 1)
 
     def become_sobel_u(self, clear_mid: bool=True):
         self.color_range = 5
         self.become_clear((3, 3))
 
         if clear_mid:
-            self.set_intensity((1, 1), self.ZERO)
+            self.set_weight((1, 1), 0)
 
-        self.set_intensity((1, 0), self.float_to_unsigned_byte(-1))
-        self.set_intensity((0, 0), self.float_to_unsigned_byte(-2))
-        self.set_intensity((0, 1), self.float_to_unsigned_byte(-1))
+        self.set_weight((1, 0), -1)
+        self.set_weight((0, 0), -2)
+        self.set_weight((0, 1), -1)
 
-        self.set_intensity((1, 2), self.float_to_unsigned_byte(1))
-        self.set_intensity((2, 2), self.float_to_unsigned_byte(2))
-        self.set_intensity((2, 1), self.float_to_unsigned_byte(1))
+        self.set_weight((1, 2), 1)
+        self.set_weight((2, 2), 2)
+        self.set_weight((2, 1), 1)
 
     def become_sobel_v(self, clear_mid: bool=True):
         self.color_range = 5
         self.become_clear((3, 3))
 
         if clear_mid:
-            self.set_intensity((1, 1), self.ZERO)
+            self.set_weight((1, 1), 0)
 
-        self.set_intensity((0, 1), self.float_to_unsigned_byte(-1))
-        self.set_intensity((0, 2), self.float_to_unsigned_byte(-2))
-        self.set_intensity((1, 2), self.float_to_unsigned_byte(-1))
+        self.set_weight((0, 1), -1)
+        self.set_weight((0, 2), -2)
+        self.set_weight((1, 2), -1)
 
-        self.set_intensity((1, 0), self.float_to_unsigned_byte(1))
-        self.set_intensity((2, 0), self.float_to_unsigned_byte(2))
-        self.set_intensity((2, 1), self.float_to_unsigned_byte(1))
+        self.set_weight((1, 0), 1)
+        self.set_weight((2, 0), 2)
+        self.set_weight((2, 1), 1)
 
     def is_valid_position(self, position: PixelPos) -> bool:
         if len(position) != 2:
             return False
 
-        if position[0] < 0 or position[0] >= self.kernel.width:
+        if position[0] < 0 or position[0] >= self.size[0]:
             return False
 
-        if position[1] < 0 or position[1] >= self.kernel.height:
+        if position[1] < 0 or position[1] >= self.size[1]:
             return False
 
         return True
 
+    # None if no rank up to max_rank gets the error under tolerance
+    def decompose(self, tolerance: float=DECOMPOSITION_TOLERANCE, max_rank: int=3) -> KernelDecomposition | None:
+        weights: np.ndarray = self.weights
+        width, height, channels = weights.shape
+
+        decompositions: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        rank: int = 1
+        for channel in range(channels):
+            u, s, vh = np.linalg.svd(weights[:, :, channel])
+            decompositions.append((u, s, vh))
+
+            total: float = float(np.sum(s * s))
+            if total == 0:
+                continue
+
+            # error of keeping the first r singular values
+            errors: np.ndarray = np.sqrt(np.maximum(0, total - np.cumsum(s * s)) / total)
+            channel_rank: int = int(np.argmax(errors <= tolerance)) + 1 if np.any(errors <= tolerance) else len(s) + 1
+            rank = max(rank, channel_rank)
+
+        if rank > min(max_rank, width, height):
+            return None
+
+        x_weights: np.ndarray = np.zeros((rank, width, channels))
+        y_weights: np.ndarray = np.zeros((rank, height, channels))
+        error: float = 0
+
+        for channel, (u, s, vh) in enumerate(decompositions):
+            total: float = float(np.sum(s * s))
+            if total == 0:
+                continue
+
+            root_s: np.ndarray = np.sqrt(s[:rank])
+            x_weights[:, :, channel] = (u[:, :rank] * root_s).T
+            y_weights[:, :, channel] = vh[:rank, :] * root_s[:, None]
+
+            error = max(error, float(np.sqrt(max(0., total - float(np.sum(s[:rank] ** 2))) / total)))
+
+        return KernelDecomposition(x_weights, y_weights, error)
+
+    # encoded once per change of weights or color range, textures handed out before stay with whoever took them
     @property
     def texture(self) -> Texture:
-        return self.graphics.surface_to_texture(self.kernel, repeat=True)
+        if self._texture is None or isinstance(self._texture.mglo, moderngl.InvalidObject):
+            self._texture = self.graphics.surface_to_texture(self.kernel, repeat=True)
+
+        return self._texture
 
+    # full 2d convolution of the weights, one shifted multiply-add per weight of the smaller kernel
     def __matmul__(self, other: 'Kernel') -> 'Kernel':
         new_kernel: Kernel = Kernel(self.game)
-
-        new_width: int = self.kernel.width + other.kernel.width - 1
-        new_height: int = self.kernel.height + other.kernel.height - 1
-
-        new_kernel.kernel = Surface((new_width, new_height))
         new_kernel.color_range = self.color_range * other.color_range
 
-        for i in range(new_width):
-            for j in range(new_height):
-                color: VectorColor = Vector3()
-
-                for x in range(other.kernel.width):
-                    for y in range(other.kernel.height):
-                        sample_position: PixelPos = [i - x, j - y]
-                        if not self.is_valid_position(sample_position):
-                            continue
-
-                        r0, g0, b0, _ = self.kernel.get_at((i - x, j - y))
-                        r1, g1, b1, _ = other.kernel.get_at((x, y))
-
-                        my_color: VectorColor = Vector3(
-                            self.unsigned_byte_to_float(r0),
-                            self.unsigned_byte_to_float(g0),
-                            self.unsigned_byte_to_float(b0))
-                        other_color: VectorColor = Vector3(
-                            other.unsigned_byte_to_float(r1),
-                            other.unsigned_byte_to_float(g1),
-                            other.unsigned_byte_to_float(b1))
-
-                        color += Vector3(
-                            my_color.x * other_color.x,
-                            my_color.y * other_color.y,
-                            my_color.z * other_color.z
-                        )
-
-                red: SignedByte = new_kernel.float_to_unsigned_byte(color.x)
-                green: SignedByte = new_kernel.float_to_unsigned_byte(color.y)
-                blue: SignedByte = new_kernel.float_to_unsigned_byte(color.z)
-                new_kernel.kernel.set_at((i, j), (red, green, blue))
+        big, small = (self, other) if self.size[0] * self.size[1] >= other.size[0] * other.size[1] else (other, self)
+        big_width, big_height = big.size
+
+        weights: np.ndarray = np.zeros((self.size[0] + other.size[0] - 1, self.size[1] + other.size[1] - 1, 3))
+        for x in range(small.size[0]):
+            for y in range(small.size[1]):
+                weights[x:x + big_width, y:y + big_height] += big.weights * small.weights[x, y]
 
+        new_kernel.weights = weights
         return new_kernel
 
     @property
     def as_string(self) -> str:
-        return (f"kernel: {self.kernel.get_size()}, "
+        return (f"kernel: {self.size}, "
                 f"color range: {self.color_range}, "
                 f"make red: {self.make_red}, "
                 f"make green: {self.make_green}, "
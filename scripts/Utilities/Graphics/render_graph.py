@@ -0,0 +1,48 @@
+from scripts.Utilities.Graphics.double_framebuffer import DoubleFramebuffer
+from scripts.Utilities.Graphics.graphics_command import GraphicsCommand
+
+
+# runs the command queue in an order compiled once per set of commands instead of sorted every frame,
+# and lends composite effects their intermediate framebuffers out of the texture pool
+class RenderGraph:
+    def __init__(self, game: 'Game'):
+        self.game: 'Game' = game
+        self.graphics: 'Graphics' = game.graphics
+
+        self._compiled_key: tuple = ()
+        self._compiled: list[GraphicsCommand] = []
+        self.compiles: int = 0
+
+    @property
+    def as_string(self) -> str:
+        return (f"compiled passes: {len(self._compiled)}, "
+                f"compiles: {self.compiles}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+    # display sized framebuffers come from the texture pool, so calculation targets
+    # borrowed by effects that don't run at the same time end up on the same memory
+    def acquire_target(self, use_floats: bool=False) -> DoubleFramebuffer:
+        return self.graphics.texture_pool.get_double_framebuffer(self.game.window.display_size, use_floats)
+
+    def release_target(self, target: DoubleFramebuffer) -> None:
+        self.graphics.texture_pool.give_back(target)
+
+    def execute(self, commands: list[GraphicsCommand]) -> None:
+        # commands compare by identity, changing their order recompiles as well
+        key: tuple = tuple((command, command.order) for command in commands)
+        if key != self._compiled_key:
+            self._compiled = sorted(commands, key=lambda x: x.order)
+            self._compiled_key = key
+            self.compiles += 1
+
+        for command in self._compiled:
+            command.execute()
+
+    def release(self) -> None:
+        self._compiled = []
+        self._compiled_key = ()
@@ -0,0 +1,74 @@
+import moderngl
+import pygame
+from moderngl import Context, Texture, Buffer
+from pygame import Surface
+
+from scripts.GameTypes import Resolution
+
+
+# persistent texture a surface gets streamed into every frame, uploads go through an orphaned pixel buffer
+# so the driver never waits for the previous frame to finish reading it
+class StreamingTexture:
+    FULL_UPLOAD_RATIO: float = 0.5  # past this part of the surface being dirty, one full upload is cheaper
+
+    def __init__(self, ctx: Context, size: Resolution):
+        self.ctx: Context = ctx
+        self.size: Resolution = size
+
+        self.texture: Texture = ctx.texture(size, 4)
+        self.texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+        self.texture.swizzle = 'BGRA'
+
+        self.pixel_buffer: Buffer = ctx.buffer(reserve=size[0] * size[1] * 4, dynamic=True)
+
+        self.uploads: int = 0
+        self.uploaded_bytes: int = 0
+
+    @property
+    def as_string(self) -> str:
+        return (f"size: {self.size}, "
+                f"uploads: {self.uploads}, "
+                f"uploaded bytes: {self.uploaded_bytes}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+    # dirty_rects None means the whole surface changed, an empty list means nothing did
+    def upload(self, surface: Surface, dirty_rects: list[pygame.Rect] | None=None) -> None:
+        assert surface.get_size() == self.size
+
+        if dirty_rects is None:
+            self._upload_full(surface)
+            return
+
+        surface_rect: pygame.Rect = surface.get_rect()
+        clipped: list[pygame.Rect] = [surface_rect.clip(rect) for rect in dirty_rects]
+        clipped = [rect for rect in clipped if rect.w > 0 and rect.h > 0]
+
+        dirty_area: int = sum(rect.w * rect.h for rect in clipped)
+        if dirty_area > self.FULL_UPLOAD_RATIO * self.size[0] * self.size[1]:
+            self._upload_full(surface)
+            return
+
+        for rect in clipped:
+            # memory order of display surfaces is BGRA, texture swizzle turns it back
+            data: bytes = pygame.image.tobytes(surface.subsurface(rect), "BGRA")
+            self.texture.write(data, viewport=(rect.x, rect.y, rect.w, rect.h))
+
+            self.uploads += 1
+            self.uploaded_bytes += len(data)
+
+    def _upload_full(self, surface: Surface) -> None:
+        self.pixel_buffer.orphan()
+        self.pixel_buffer.write(surface.get_view('1'))
+        self.texture.write(self.pixel_buffer)
+
+        self.uploads += 1
+        self.uploaded_bytes += self.pixel_buffer.size
+
+    def release(self) -> None:
+        self.texture.release()
+        self.pixel_buffer.release()
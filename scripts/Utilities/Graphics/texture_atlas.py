@@ -0,0 +1,247 @@
+import moderngl
+import pygame
+from moderngl import Context, Texture
+from pygame import Surface
+
+from scripts.GameTypes import Resolution
+
+
+class AtlasRegion:
+    def __init__(self, page: 'AtlasPage', rect: pygame.Rect):
+        self.page: AtlasPage = page
+        self.rect: pygame.Rect = rect
+
+        page_width, page_height = page.size
+        self.uv_rect: tuple[float, float, float, float] = (
+            rect.x / page_width, rect.y / page_height,
+            rect.w / page_width, rect.h / page_height
+        )
+
+    @property
+    def texture(self) -> Texture:
+        return self.page.texture
+
+    @property
+    def as_string(self) -> str:
+        return (f"page: {self.page.index}, "
+                f"rect: {self.rect}, "
+                f"uv rect: {self.uv_rect}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+
+# one texture, filled with skyline bottom-left packing
+class AtlasPage:
+    def __init__(self, ctx: Context, index: int, size: Resolution):
+        self.index: int = index
+        self.size: Resolution = size
+
+        self.texture: Texture = ctx.texture(size, 4)
+        self.texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+        self.texture.write(bytes(size[0] * size[1] * 4))
+
+        # segments of the top edge of used space as [x, y, width], sorted by x and covering the whole width
+        self.skyline: list[list[int]] = [[0, 0, size[0]]]
+        self.used_area: int = 0
+
+    @property
+    def fill(self) -> float:
+        return self.used_area / (self.size[0] * self.size[1])
+
+    @property
+    def as_string(self) -> str:
+        return (f"index: {self.index}, "
+                f"size: {self.size}, "
+                f"fill: {round(self.fill * 100, 1)}%, "
+                f"skyline segments: {len(self.skyline)}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+    # returns y at which a rect of given width can sit when starting at segment index, -1 if it does not fit
+    def _fit(self, index: int, width: int, height: int) -> int:
+        x: int = self.skyline[index][0]
+        if x + width > self.size[0]:
+            return -1
+
+        y: int = 0
+        width_left: int = width
+        while width_left > 0:
+            y = max(y, self.skyline[index][1])
+            if y + height > self.size[1]:
+                return -1
+
+            width_left -= self.skyline[index][2]
+            index += 1
+
+        return y
+
+    def pack(self, size: Resolution) -> pygame.Rect | None:
+        width, height = size
+
+        best_index: int = -1
+        best_y: int = -1
+        best_bottom: int = self.size[1] + 1
+        best_width: int = self.size[0] + 1
+
+        for i, segment in enumerate(self.skyline):
+            y: int = self._fit(i, width, height)
+            if y < 0:
+                continue
+
+            better_bottom: bool = y + height < best_bottom
+            same_bottom_tighter: bool = y + height == best_bottom and segment[2] < best_width
+            if better_bottom or same_bottom_tighter:
+                best_index, best_y = i, y
+                best_bottom, best_width = y + height, segment[2]
+
+        if best_index < 0:
+            return None
+
+        rect: pygame.Rect = pygame.Rect(self.skyline[best_index][0], best_y, width, height)
+        self._add_segment(best_index, rect)
+        self.used_area += width * height
+
+        return rect
+
+    def _add_segment(self, index: int, rect: pygame.Rect) -> None:
+        self.skyline.insert(index, [rect.x, rect.bottom, rect.w])
+
+        # shrink or drop segments now hidden under the new one
+        i: int = index + 1
+        while i < len(self.skyline):
+            segment: list[int] = self.skyline[i]
+            overlap: int = rect.right - segment[0]
+            if overlap <= 0:
+                break
+
+            segment[0] += overlap
+            segment[2] -= overlap
+            if segment[2] > 0:
+                break
+
+            del self.skyline[i]
+
+        # merge neighbours of equal height
+        i = 0
+        while i < len(self.skyline) - 1:
+            if self.skyline[i][1] == self.skyline[i + 1][1]:
+                self.skyline[i][2] += self.skyline[i + 1][2]
+                del self.skyline[i + 1]
+            else:
+                i += 1
+
+    def write(self, rect: pygame.Rect, surface: Surface) -> None:
+        self.texture.write(pygame.image.tobytes(surface, "RGBA"), viewport=(rect.x, rect.y, rect.w, rect.h))
+
+    def release(self) -> None:
+        self.texture.release()
+
+
+# packs many small surfaces into a few large textures, regions are looked up by asset name or by surface
+class TextureAtlas:
+    PAGE_SIZE: int = 2048
+    PADDING: int = 1
+
+    def __init__(self, game: 'Game'):
+        self.game: 'Game' = game
+        self.graphics: 'Graphics' = game.graphics
+        self.ctx: Context = self.graphics.ctx
+
+        page_side: int = min(self.PAGE_SIZE, self.ctx.info["GL_MAX_TEXTURE_SIZE"])
+        self.page_size: Resolution = (page_side, page_side)
+
+        self.pages: list[AtlasPage] = []
+        self.regions: dict[str, AtlasRegion] = {}
+        self.surface_regions: dict[Surface, AtlasRegion] = {}
+
+    @property
+    def as_string(self) -> str:
+        return (f"pages: {len(self.pages)}, "
+                f"regions: {len(self.regions)}, "
+                f"page size: {self.page_size}, "
+                f"fill: {[round(page.fill * 100, 1) for page in self.pages]}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+    @staticmethod
+    def animation_frame_name(animation_name: str, frame: int) -> str:
+        return f"{animation_name}:{frame}"
+
+    # resized images are shared by tilemaps, see ResizedAssetCache
+    @staticmethod
+    def resized_image_name(tile_size: int, image_name: str, flip: tuple[bool, bool]=(False, False)) -> str:
+        return f"{tile_size}:{image_name}:{int(flip[0])}{int(flip[1])}"
+
+    def get_region(self, name: str) -> AtlasRegion | None:
+        return self.regions.get(name)
+
+    def get_surface_region(self, surface: Surface) -> AtlasRegion | None:
+        return self.surface_regions.get(surface)
+
+    # returns None if surface is too large for a page
+    # a surface added under a name that already has a region is drawn from that region,
+    # so an asset rescaled again after unbind_surface takes no new page space
+    def add(self, name: str, surface: Surface) -> AtlasRegion | None:
+        if name in self.regions:
+            self.surface_regions.setdefault(surface, self.regions[name])
+            return self.regions[name]
+
+        if surface in self.surface_regions:
+            self.regions[name] = self.surface_regions[surface]
+            return self.regions[name]
+
+        padded_size: Resolution = (surface.get_width() + 2 * self.PADDING, surface.get_height() + 2 * self.PADDING)
+        if padded_size[0] > self.page_size[0] or padded_size[1] > self.page_size[1]:
+            return None
+
+        packed: tuple[AtlasPage, pygame.Rect] | None = None
+        for page in self.pages:
+            rect: pygame.Rect | None = page.pack(padded_size)
+            if rect is not None:
+                packed = (page, rect)
+                break
+
+        if packed is None:
+            page: AtlasPage = AtlasPage(self.ctx, len(self.pages), self.page_size)
+            self.pages.append(page)
+            packed = (page, page.pack(padded_size))
+
+        page, rect = packed
+        rect = rect.inflate(-2 * self.PADDING, -2 * self.PADDING)
+        page.write(rect, self.graphics.colorkey_to_alpha(surface))
+
+        region: AtlasRegion = AtlasRegion(page, rect)
+        self.regions[name] = region
+        self.surface_regions[surface] = region
+
+        return region
+
+    # drops the reference to surface, its region stays under its name for whatever is added with it next
+    def unbind_surface(self, surface: Surface) -> None:
+        self.surface_regions.pop(surface, None)
+
+    # tallest first packs noticeably tighter than load order
+    def add_many(self, surfaces: dict[str, Surface]) -> None:
+        for name, surface in sorted(surfaces.items(), key=lambda x: -x[1].get_height()):
+            if self.add(name, surface) is None:
+                print(f"[LOG] image too large for texture atlas, skipping: {name}")
+
+    def release(self) -> None:
+        for page in self.pages:
+            page.release()
+
+        self.pages = []
+        self.regions = {}
+        self.surface_regions = {}
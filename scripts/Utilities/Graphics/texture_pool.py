@@ -0,0 +1,169 @@
+from collections import OrderedDict
+
+import moderngl
+from moderngl import Context, Texture
+
+from scripts.GameTypes import Resolution
+from scripts.Utilities.Graphics.double_framebuffer import DoubleFramebuffer
+
+# (kind, size, components, dtype, repeat)
+PoolKey = tuple[str, Resolution, int, str, bool]
+PoolEntry = Texture | DoubleFramebuffer
+
+
+# hands out textures and double framebuffers and takes them back for reuse instead of releasing them,
+# idle entries past the vram budget get released, least recently used first
+class TexturePool:
+    DEFAULT_BUDGET: int = 256 * 1024 * 1024  # bytes
+    DTYPE_SIZES: dict[str, int] = {
+        'f1': 1, 'f2': 2, 'f4': 4,
+        'u1': 1, 'u2': 2, 'u4': 4,
+        'i1': 1, 'i2': 2, 'i4': 4
+    }
+
+    TEXTURE: str = "texture"
+    DOUBLE_FRAMEBUFFER: str = "double framebuffer"
+
+    def __init__(self, game: 'Game', budget: int=DEFAULT_BUDGET):
+        self.game: 'Game' = game
+        self.graphics: 'Graphics' = game.graphics
+        self.ctx: Context = self.graphics.ctx
+
+        self._budget: int = budget
+        self.vram: int = 0
+
+        self.in_use: dict[PoolEntry, PoolKey] = {}
+        self.idle: OrderedDict[PoolEntry, PoolKey] = OrderedDict()  # oldest first
+        self.idle_by_key: dict[PoolKey, list[PoolEntry]] = {}
+
+        self.created: int = 0
+        self.reused: int = 0
+        self.evicted: int = 0
+
+    @property
+    def budget(self) -> int:
+        return self._budget
+
+    @budget.setter
+    def budget(self, budget: int) -> None:
+        self._budget = budget
+        self._evict()
+
+    @property
+    def as_string(self) -> str:
+        return (f"vram: {round(self.vram / 1024**2, 2)}MB / {round(self.budget / 1024**2, 2)}MB, "
+                f"in use: {len(self.in_use)}, "
+                f"idle: {len(self.idle)}, "
+                f"created: {self.created}, "
+                f"reused: {self.reused}, "
+                f"evicted: {self.evicted}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+    def entry_size(self, key: PoolKey) -> int:
+        kind, size, components, dtype, _ = key
+
+        texture_size: int = size[0] * size[1] * components * self.DTYPE_SIZES[dtype]
+        return 2 * texture_size if kind == self.DOUBLE_FRAMEBUFFER else texture_size
+
+    def get_texture(self, size: Resolution, components: int=4, dtype: str='f1', repeat: bool=False) -> Texture:
+        key: PoolKey = (self.TEXTURE, tuple(size), components, dtype, repeat)
+        texture: Texture | None = self._take(key)
+
+        if texture is None:
+            texture = self._create_texture(key)
+            self._add(texture, key)
+
+        return texture
+
+    def get_double_framebuffer(self, size: Resolution, use_floats: bool=False,
+                               repeat: bool=True) -> DoubleFramebuffer:
+        key: PoolKey = (self.DOUBLE_FRAMEBUFFER, tuple(size), 4, 'f2' if use_floats else 'f1', repeat)
+        double_framebuffer: DoubleFramebuffer | None = self._take(key)
+
+        if double_framebuffer is None:
+            texture_key: PoolKey = (self.TEXTURE, *key[1:])
+            double_framebuffer = DoubleFramebuffer(self.game,
+                                                   self._create_texture(texture_key),
+                                                   self._create_texture(texture_key))
+            self._add(double_framebuffer, key)
+
+        return double_framebuffer
+
+    def give_back(self, entry: PoolEntry) -> None:
+        assert entry in self.in_use, "entry was not handed out by this pool"
+
+        key: PoolKey = self.in_use.pop(entry)
+        self.idle[entry] = key
+        self.idle_by_key.setdefault(key, []).append(entry)
+
+        self._evict()
+
+    def is_pooled(self, entry: PoolEntry) -> bool:
+        return entry in self.in_use or entry in self.idle
+
+    # releases every idle entry, no matter the budget
+    def trim(self) -> None:
+        while self.idle:
+            self._evict_oldest()
+
+    def release(self) -> None:
+        self.trim()
+
+        for entry, key in self.in_use.items():
+            self._release_entry(entry, key)
+
+        self.in_use = {}
+
+    def _create_texture(self, key: PoolKey) -> Texture:
+        _, size, components, dtype, repeat = key
+
+        texture: Texture = self.ctx.texture(size, components, dtype=dtype)
+        texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+        texture.repeat_x = repeat
+        texture.repeat_y = repeat
+        return texture
+
+    def _add(self, entry: PoolEntry, key: PoolKey) -> None:
+        self.in_use[entry] = key
+        self.vram += self.entry_size(key)
+        self.created += 1
+
+        self._evict()
+
+    def _take(self, key: PoolKey) -> PoolEntry | None:
+        entries: list[PoolEntry] | None = self.idle_by_key.get(key)
+        if not entries:
+            return None
+
+        entry: PoolEntry = entries.pop()
+        del self.idle[entry]
+        self.in_use[entry] = key
+        self.reused += 1
+
+        return entry
+
+    def _evict(self) -> None:
+        while self.vram > self.budget and self.idle:
+            self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        entry, key = self.idle.popitem(last=False)
+        self.idle_by_key[key].remove(entry)
+
+        self._release_entry(entry, key)
+        self.evicted += 1
+
+    def _release_entry(self, entry: PoolEntry, key: PoolKey) -> None:
+        if isinstance(entry, DoubleFramebuffer):
+            self.graphics.gl_state.forget_texture(entry.front)
+            self.graphics.gl_state.forget_texture(entry.back)
+        else:
+            self.graphics.gl_state.forget_texture(entry)
+
+        entry.release()
+        self.vram -= self.entry_size(key)
@@ -0,0 +1,145 @@
+from array import array
+
+import moderngl
+from moderngl import Context, Program, Buffer, VertexArray, Texture
+from pygame import Surface
+
+from scripts.GameTypes import CommandType, Percentage, DisplayVector
+from scripts.Utilities.Graphics.graphics_command import GraphicsCommand
+from scripts.Utilities.Graphics.texture_atlas import AtlasRegion
+
+
+# draws tiles straight into graphics.double_fbo, one instanced draw per run of tiles sharing a texture
+# surfaces packed in graphics.atlas share their page texture, the rest get a texture of their own
+class TileRenderer:
+    FULL_UV_RECT: tuple[float, float, float, float] = (0., 0., 1., 1.)
+
+    RENDER_ORDER: float = -50  # after the pygame display blit (-100), before effects
+    INSTANCE_FLOATS: int = 9  # rect (x, y, w, h), uv rect (u, v, w, h), alpha
+    INITIAL_CAPACITY: int = 4096
+
+    def __init__(self, game: 'Game'):
+        self.game: 'Game' = game
+        self.graphics: 'Graphics' = game.graphics
+        self.ctx: Context = self.graphics.ctx
+        self.program: Program = self.graphics.programs["tiles"]
+
+        self.textures: dict[Surface, Texture] = {}
+
+        # consecutive tiles with the same texture share a batch, so painter's order is kept
+        self.batches: list[tuple[Texture, array]] = []
+        self.instance_count: int = 0
+
+        self.capacity: int = self.INITIAL_CAPACITY
+        self.instance_buffer: Buffer = self.ctx.buffer(reserve=self.capacity * self.INSTANCE_FLOATS * 4,
+                                                       dynamic=True)
+        self.vao: VertexArray = self.ctx.vertex_array(self.program, [
+            (self.graphics.blit_uvs, '2f', 'corner'),
+            (self.instance_buffer, '4f 4f 1f/i', 'rect', 'uv_rect', 'alpha')
+        ])
+
+        self.command: GraphicsCommand = GraphicsCommand(self.game, self.RENDER_ORDER, CommandType.TILES,
+                                                        tile_renderer=self)
+
+    @property
+    def as_string(self) -> str:
+        return (f"cached textures: {len(self.textures)}, "
+                f"batches: {len(self.batches)}, "
+                f"instances: {self.instance_count}, "
+                f"capacity: {self.capacity}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+    def get_texture(self, surface: Surface) -> tuple[Texture, tuple[float, float, float, float]]:
+        region: AtlasRegion | None = self.graphics.atlas.get_surface_region(surface)
+        if region is not None:
+            return region.texture, region.uv_rect
+
+        texture: Texture | None = self.textures.get(surface)
+
+        if texture is None:
+            texture = self.graphics.surface_to_texture(self.graphics.colorkey_to_alpha(surface))
+            self.textures[surface] = texture
+
+        return texture, self.FULL_UV_RECT
+
+    # call when pixels of an already drawn surface change
+    def forget_surface(self, surface: Surface) -> None:
+        if surface not in self.textures:
+            return
+
+        self.graphics.gl_state.forget_texture(self.textures[surface])
+        self.textures[surface].release()
+        del self.textures[surface]
+
+    def add(self, image: Surface, position: 'DisplayPosition', alpha: Percentage=1) -> None:
+        texture, uv_rect = self.get_texture(image)
+
+        if not self.batches:
+            self.graphics.command_queue.append(self.command)
+
+        if not self.batches or self.batches[-1][0] is not texture:
+            self.batches.append((texture, array('f')))
+
+        self.batches[-1][1].extend((
+            position[0], position[1], image.get_width(), image.get_height(),
+            *uv_rect,
+            alpha
+        ))
+        self.instance_count += 1
+
+    # offset is the display offset of the grid the tiles are from, see Tile.blit_position_at
+    def add_tiles(self, tiles: list['Tile'], alpha: Percentage | None=None, offset: DisplayVector | None=None) -> None:
+        for tile in tiles:
+            if not tile.renderable:
+                continue
+
+            tile_alpha: Percentage = 1 if alpha is None else alpha * tile.alpha
+            self.add(tile.blit_image_function(tile), tile.blit_position_at(offset), tile_alpha)
+
+    def _reserve(self, instance_count: int) -> None:
+        if instance_count <= self.capacity:
+            return
+
+        while self.capacity < instance_count:
+            self.capacity *= 2
+
+        self.instance_buffer.orphan(self.capacity * self.INSTANCE_FLOATS * 4)
+
+    def execute(self) -> None:
+        if not self.batches:
+            return
+
+        gl_state: 'GLState' = self.graphics.gl_state
+        gl_state.set_blend(True)
+
+        gl_state.set_uniform(self.program, "tex", 0)
+        gl_state.set_uniform(self.program, "display_size", tuple(self.game.window.display_size))
+        self.graphics.double_fbo.use()
+
+        for texture, instances in self.batches:
+            batch_size: int = len(instances) // self.INSTANCE_FLOATS
+            self._reserve(batch_size)
+
+            self.instance_buffer.orphan()
+            self.instance_buffer.write(instances)
+
+            gl_state.use_texture(texture, 0)
+            self.vao.render(moderngl.TRIANGLE_STRIP, vertices=4, instances=batch_size)
+
+        gl_state.set_blend(False)
+
+        self.batches = []
+        self.instance_count = 0
+
+    def release(self) -> None:
+        for texture in self.textures.values():
+            texture.release()
+
+        self.textures = {}
+        self.vao.release()
+        self.instance_buffer.release()
@@ -1,3 +1,5 @@
+import math
+
 import pygame.draw
 from pygame import Vector2, FRect
 from scripts.DataStructures.sorted_array import SortedArray
@@ -7,8 +9,12 @@ from scripts.Utilities.Flow.timeline import Timeline
 
 
 class PhysicsEntity:
+    SWEEP_ITERATIONS: int = 4  # hits resolved per update in swept mode, motion left after them is dropped
+    SWEEP_EPSILON: float = 1e-6
+
     def __init__(self, game: 'Game', name: str, position: WorldPosition, size: Resolution,
-                 use_basic_behaviour: bool = True, max_move_size: float = 15, timeline: Timeline = None):
+                 use_basic_behaviour: bool = True, max_move_size: float = 15, timeline: Timeline = None,
+                 swept: bool = False):
         self.game: 'Game' = game
         self.name: name = name
         self.last_frame_position: WorldPosition = position
@@ -16,7 +22,26 @@ class PhysicsEntity:
         self.size: Resolution = size
         self.obstacles: set[object] = set()
 
+        # set by PhysicsWorld.add, the world's obstacles are collided with too
+        self.world: 'PhysicsWorld | None' = None
+
+        # what the world steps the entity with, burst is used up by the step
+        self.movement: WorldVector = Vector2()
+        self.burst: WorldVector = Vector2()
+
+        # other entities in a world collide when each has a layer the other collides with
+        self.collision_layers: int = 1
+        self.collides_with: int = -1
+
+        # obstacle objects the entity got stuck in or collided with during the last update
+        self.frame_collisions: list[object] = []
+
         self.max_move_size: float = max_move_size
+
+        # moves to the exact time of impact and slides along instead of max_move_size substeps,
+        # costs the same at any speed and nothing passes through thin obstacles
+        self.swept: bool = swept
+
         self.timeline = timeline if timeline is not None else Timeline.blank(game)
 
         # HOW OBSTACLES WORK
@@ -39,6 +64,7 @@ class PhysicsEntity:
         self.invoke_on_movement: SortedArray = SortedArray(SortableFunction, key=SF_key)
 
         # these pass in (self, [collided objects])
+        self.invoke_on_collide_entity: SortedArray = SortedArray(SortableFunction, key=SF_key)
         self.invoke_on_stuck: SortedArray = SortedArray(SortableFunction, key=SF_key)
         self.invoke_on_collide_left: SortedArray = SortedArray(SortableFunction, key=SF_key)
         self.invoke_on_collide_right: SortedArray = SortedArray(SortableFunction, key=SF_key)
@@ -58,7 +84,7 @@ class PhysicsEntity:
     def FromJson(cls, game: 'Game', json_data: dict) -> 'PhysicsEntity':
         entity: PhysicsEntity = PhysicsEntity(
             game, json_data["name"], json_data["position"], json_data["size"],
-            json_data["use_basic_behaviour"], json_data["max_move_size"]
+            json_data["use_basic_behaviour"], json_data["max_move_size"], swept=json_data.get("swept", False)
         )
 
         entity.velocity = json_data["velocity"]
@@ -136,7 +162,8 @@ class PhysicsEntity:
             "decay": self.decay,
             "is_stuck": self.is_stuck,
             "use_basic_behaviour": self.use_basic_behaviour,
-            "max_move_size": self.max_move_size
+            "max_move_size": self.max_move_size,
+            "swept": self.swept
         }
 
     @property
@@ -212,6 +239,7 @@ class PhysicsEntity:
     def _update_movement(self, blit_site: bool = False) -> None:
         self.last_frame_position = Vector2(*self.position)
         self.is_stuck: bool = False
+        self.frame_collisions = []
 
         frame_movement: WorldVector = self.frame_velocity * self.timeline.dt
         move_site: Subspace = Vector2(self.size[0] + abs(frame_movement.x), self.size[1] + abs(frame_movement.y))
@@ -223,8 +251,9 @@ class PhysicsEntity:
         center: WorldPosition = self.center
         center_moved: WorldPosition = center + frame_movement * 0.5  # IF BUG ITS PROBABLY HERE, DO IN 2 steps
 
+        obstacles: set[object] = self.obstacles if self.world is None else self.obstacles | self.world.obstacles
         objects_to_check: list[object] = [
-            obj for obstacle in self.obstacles for obj in obstacle.physical_objects_around(center_moved, biggest_side)
+            obj for obstacle in obstacles for obj in obstacle.physical_objects_around(center_moved, biggest_side)
         ]
         rects_to_check: list[FRect] = [
             obj.rect for obj in objects_to_check
@@ -242,6 +271,12 @@ class PhysicsEntity:
 
         self.is_stuck = self._handle_stucking(center, objects_to_check, rects_to_check)
 
+        if self.swept:
+            if not self.is_stuck:
+                self._update_swept_movement(frame_movement, objects_to_check, rects_to_check, site_rect)
+
+            movement_length = 0
+
         while movement_length > 0:
             instant_movement: WorldVector = unit_movement if movement_length > self.max_move_size else frame_movement
 
@@ -259,6 +294,117 @@ class PhysicsEntity:
             blit_rect: FRect = FRect(*self.game.camera.position_world_to_display(site_position), *move_site)
             pygame.draw.rect(self.game.window.display, (255, 255, 0), blit_rect)
 
+    # the hit stops the motion along its axis, the rest slides along the other one
+    def _update_swept_movement(self, frame_movement: WorldVector, objects_to_check: list[object],
+                               rects_to_check: list[FRect], site_rect: FRect) -> None:
+        remaining: WorldVector = Vector2(frame_movement)
+
+        # a sweep can't see rects the entity starts in, substeps push it out of those the way substep mode does
+        while remaining.length_squared() != 0 and self.world_rect.collidelist(rects_to_check) != -1:
+            instant_movement: WorldVector = Vector2(remaining)
+            if remaining.length() > self.max_move_size:
+                instant_movement.scale_to_length(self.max_move_size)
+
+            self.game.utilities.call_functions(
+                self.invoke_on_movement, args=(self, instant_movement, objects_to_check, rects_to_check, site_rect))
+
+            self._handle_x_movement(instant_movement, objects_to_check, rects_to_check)
+            self._handle_y_movement(instant_movement, objects_to_check, rects_to_check)
+
+            remaining -= instant_movement
+
+        for _ in range(self.SWEEP_ITERATIONS):
+            if remaining.x == 0 and remaining.y == 0:
+                return
+
+            self.game.utilities.call_functions(
+                self.invoke_on_movement, args=(self, remaining, objects_to_check, rects_to_check, site_rect))
+
+            time, axis, hits = self._sweep(remaining, rects_to_check)
+
+            if not hits:
+                self.position.x += remaining.x
+                self.position.y += remaining.y
+                return
+
+            self.position.x += remaining.x * time
+            self.position.y += remaining.y * time
+
+            collided: list[object] = [objects_to_check[i] for i in hits]
+            self.frame_collisions += collided
+
+            # placed on the edge exactly, so the next sweep doesn't start inside what was hit
+            if axis == 0:
+                if remaining.x > 0:
+                    self.position.x = min(rects_to_check[i].left for i in hits) - self.size[0]
+                    functions: SortedArray = self.invoke_on_collide_right
+                else:
+                    self.position.x = max(rects_to_check[i].right for i in hits)
+                    functions: SortedArray = self.invoke_on_collide_left
+
+                remaining = Vector2(0, remaining.y * (1 - time))
+            else:
+                if remaining.y > 0:
+                    self.position.y = min(rects_to_check[i].top for i in hits) - self.size[1]
+                    functions: SortedArray = self.invoke_on_collide_bottom
+                else:
+                    self.position.y = max(rects_to_check[i].bottom for i in hits)
+                    functions: SortedArray = self.invoke_on_collide_top
+
+                remaining = Vector2(remaining.x * (1 - time), 0)
+
+            self.game.utilities.call_functions(functions, args=(self, collided))
+
+    # earliest time in [0, 1) the world rect moving by movement hits one of rects, pygame colliderect rules,
+    # returns it with the axis of the hit (0 x, 1 y) and indices of all rects hit then on that axis
+    def _sweep(self, movement: WorldVector, rects: list[FRect]) -> tuple[float, int, list[int]]:
+        x, y = self.position
+        width, height = self.size
+        dx, dy = movement
+
+        best_time: float = 1
+        best_axis: int = 0
+        hits: list[int] = []
+
+        for i, rect in enumerate(rects):
+            if dx > 0:
+                x_entry: float = (rect.left - x - width) / dx
+                x_exit: float = (rect.right - x) / dx
+            elif dx < 0:
+                x_entry: float = (rect.right - x) / dx
+                x_exit: float = (rect.left - x - width) / dx
+            elif x + width <= rect.left or x >= rect.right:
+                continue
+            else:
+                x_entry, x_exit = -math.inf, math.inf
+
+            if dy > 0:
+                y_entry: float = (rect.top - y - height) / dy
+                y_exit: float = (rect.bottom - y) / dy
+            elif dy < 0:
+                y_entry: float = (rect.bottom - y) / dy
+                y_exit: float = (rect.top - y - height) / dy
+            elif y + height <= rect.top or y >= rect.bottom:
+                continue
+            else:
+                y_entry, y_exit = -math.inf, math.inf
+
+            entry: float = max(x_entry, y_entry)
+
+            # already inside is left to stucking, touching edges and corners don't collide
+            if entry >= min(x_exit, y_exit) or entry < -self.SWEEP_EPSILON or entry > best_time + self.SWEEP_EPSILON:
+                continue
+
+            axis: int = 0 if x_entry > y_entry else 1
+            entry = max(entry, 0)
+
+            if entry < best_time - self.SWEEP_EPSILON:
+                best_time, best_axis, hits = entry, axis, [i]
+            elif axis == best_axis and hits:
+                hits.append(i)
+
+        return best_time, best_axis, hits
+
     def _handle_stucking(self, center: Vector2, objects_to_check: list[object],
                          rects_to_check: list[FRect]) -> Detected:
         stuck_causes: list[object] = []
@@ -268,6 +414,7 @@ class PhysicsEntity:
                 stuck_causes.append(obj)
 
         if stuck_causes:
+            self.frame_collisions += stuck_causes
             self.game.utilities.call_functions(
                 self.invoke_on_stuck, args=(self, stuck_causes))
 
@@ -289,6 +436,8 @@ class PhysicsEntity:
                 elif instant_movement.x < 0:
                     collide_left.append(obj)
 
+        self.frame_collisions += collide_right + collide_left
+
         if collide_right:
             self.game.utilities.call_functions(
                 self.invoke_on_collide_right, args=(self, collide_right))
@@ -313,6 +462,8 @@ class PhysicsEntity:
                 elif instant_movement.y < 0:
                     collide_top.append(obj)
 
+        self.frame_collisions += collide_bottom + collide_top
+
         if collide_bottom:
             self.game.utilities.call_functions(
                 self.invoke_on_collide_bottom, args=(self, collide_bottom))
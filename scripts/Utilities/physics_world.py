@@ -0,0 +1,143 @@
+import pygame
+from pygame import FRect
+
+from scripts.DataStructures.sorted_array import SortedArray
+from scripts.DataStructures.spatial_hash import SpatialHash
+from scripts.GameTypes import SortableFunction, SF_key, Success
+from scripts.Utilities.physics_entity import PhysicsEntity
+
+EntityPair = tuple[PhysicsEntity, PhysicsEntity]
+TilePair = tuple[PhysicsEntity, object]
+
+
+# steps many PhysicsEntity together and finds which of them touch each other or the obstacles
+# entities are kept in a spatial hash by rect, so an entity is only tested against the ones in its cells
+# obstacles (tilemaps, grids) are collided with by every entity on top of its own, through their own lookups
+# a step moves every entity first, then makes the pair lists, then dispatches callbacks from them
+class PhysicsWorld:
+    DEFAULT_CELL_SIZE: float = 128  # around a few entity sizes
+
+    def __init__(self, game: 'Game', cell_size: float=DEFAULT_CELL_SIZE):
+        self.game: 'Game' = game
+
+        self.entities: list[PhysicsEntity] = []
+        self.obstacles: set[object] = set()
+        self.entity_hash: SpatialHash = SpatialHash(cell_size)
+
+        # pairs of the last step, entity pairs in the order entities were added
+        self.entity_pairs: list[EntityPair] = []
+        self.tile_pairs: list[TilePair] = []
+
+        # these pass in (self, entity, other entity)
+        self.invoke_on_entity_collide: SortedArray = SortedArray(SortableFunction, key=SF_key)
+
+        # these pass in (self, entity, obstacle object)
+        self.invoke_on_tile_collide: SortedArray = SortedArray(SortableFunction, key=SF_key)
+
+    @property
+    def as_string(self) -> str:
+        return (f"entities: {len(self.entities)}, "
+                f"obstacles: {len(self.obstacles)}, "
+                f"entity pairs: {len(self.entity_pairs)}, "
+                f"tile pairs: {len(self.tile_pairs)}, "
+                f"cell size: {self.entity_hash.cell_size}")
+
+    def __repr__(self):
+        return self.as_string
+
+    def __str__(self):
+        return self.as_string
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def __contains__(self, entity: PhysicsEntity) -> bool:
+        return entity.world is self
+
+    def add(self, entity: PhysicsEntity) -> Success:
+        if entity.world is not None:
+            return False
+
+        entity.world = self
+        self.entities.append(entity)
+        self.entity_hash.insert(entity, entity.world_rect)
+
+        return True
+
+    # safe to call from collision callbacks, the entity is left out of the rest of the step
+    def remove(self, entity: PhysicsEntity) -> Success:
+        if entity.world is not self:
+            return False
+
+        entity.world = None
+        self.entities.remove(entity)
+        self.entity_hash.remove(entity)
+
+        return True
+
+    def update(self, blit_sites: bool=False) -> None:
+        self.tile_pairs = []
+
+        for entity in list(self.entities):
+            if entity.world is not self:
+                continue
+
+            entity.update(entity.movement, entity.burst, blit_sites)
+            entity.burst = pygame.Vector2()
+
+            self.tile_pairs += [(entity, obj) for obj in dict.fromkeys(entity.frame_collisions)]
+
+            if entity.world is self:
+                self.entity_hash.update(entity, entity.world_rect)
+
+        self.entity_pairs = self.find_entity_pairs()
+        self._dispatch()
+
+    # overlapping entities whose layers collide, each pair once with the earlier added entity first
+    def find_entity_pairs(self) -> list[EntityPair]:
+        pairs: list[EntityPair] = []
+        serials: dict[object, int] = self.entity_hash.serials
+
+        for entity in self.entities:
+            serial: int = serials[entity]
+
+            for other in self.entity_hash.query_rect(self.entity_hash.rects[entity]):
+                if serials[other] <= serial:
+                    continue
+
+                if entity.collides_with & other.collision_layers and other.collides_with & entity.collision_layers:
+                    pairs.append((entity, other))
+
+        return pairs
+
+    def _dispatch(self) -> None:
+        call_functions: callable = self.game.utilities.call_functions
+
+        for entity, obj in self.tile_pairs:
+            if entity.world is self:
+                call_functions(self.invoke_on_tile_collide, args=(self, entity, obj))
+
+        touching: dict[PhysicsEntity, list[PhysicsEntity]] = {}
+
+        for entity, other in self.entity_pairs:
+            if entity.world is not self or other.world is not self:
+                continue
+
+            call_functions(self.invoke_on_entity_collide, args=(self, entity, other))
+
+            touching.setdefault(entity, []).append(other)
+            touching.setdefault(other, []).append(entity)
+
+        for entity, others in touching.items():
+            others = [other for other in others if other.world is self]
+
+            if entity.world is self and others:
+                call_functions(entity.invoke_on_collide_entity, args=(entity, others))
+
+    # entities in rect, world space
+    def entities_in_rect(self, rect: FRect) -> list[PhysicsEntity]:
+        return self.entity_hash.query_rect(rect)
+
+    def render(self) -> None:
+        for entity in self.entities:
+            entity.render()
@@ -3,7 +3,11 @@ import os
 
 from scripts.AssetClasses.UI.ui_sheet import UI_Sheet
 from scripts.AssetClasses.Animation.animation import Animation
+from scripts.AssetClasses.Animation.animation_clock import AnimationClock
+from scripts.AssetClasses.Tilemap.binary_tilemap import BinaryTilemap
+from scripts.AssetClasses.Tilemap.resized_asset_cache import ResizedAssetCache
 from scripts.AssetClasses.Tilemap.tilemap import Tilemap
+from scripts.AssetClasses.Tilemap.tilemap_streamer import TilemapStreamer
 from scripts.GameTypes import Success
 from scripts.Utilities.component import Component
 
@@ -28,10 +32,17 @@ class Assets:
         self.animation_names: dict[Animation, str] = {}
         self.component_names: dict[type(Component), str] = {}
 
+        # shared time of animations on a clock, see Tilemap.use_animation_clock
+        self.animation_clock: AnimationClock = AnimationClock(game)
+
+        # resized images and animation frames tilemaps share
+        self.resized_cache: ResizedAssetCache = ResizedAssetCache(game)
+
         self.tilemaps: dict[str, Tilemap] = {}
         self.ui_sheets: dict[str, UI_Sheet] = {}
 
         self.tilemap_names: dict[Tilemap, str] = {}
+        self.tilemap_streamers: list[TilemapStreamer] = []
         self.ui_sheet_names: dict[UI_Sheet, str] = {}
 
         self.images_loaded: bool = False
@@ -42,6 +53,7 @@ class Assets:
 
         self.tilemaps_loaded: bool = False
         self.ui_sheets_loaded: bool = False
+        self.atlas_loaded: bool = False
 
         self.default_volume: float = default_volume
         self.load_assets: bool = load_assets
@@ -59,12 +71,18 @@ class Assets:
         if self.load_assets:
             self._load_tilemaps()
             self._load_ui_sheets()
+            self._load_atlas()
 
     def update(self) -> None:
-        pass
+        self.animation_clock.update()
+        self.resized_cache.update()
+
+        for streamer in self.tilemap_streamers:
+            streamer.update()
 
     def end(self) -> None:
-        pass
+        for streamer in self.tilemap_streamers:
+            streamer.release()
 
     @property
     def as_string(self) -> str:
@@ -161,11 +179,42 @@ class Assets:
         tilemap: Tilemap = self.game.utilities.load_tilemap(path_to_folder, self.game)
 
         if tilemap.name in self.tilemaps:
+            tilemap.release()
             return False
 
         self.tilemaps[tilemap.name] = tilemap
         return True
 
+    # drops the tilemap, what it resized stays in resized_cache while it fits
+    def unload_tilemap(self, name: str) -> Success:
+        if name not in self.tilemaps:
+            return False
+
+        tilemap: Tilemap = self.tilemaps.pop(name)
+        self.tilemap_names.pop(tilemap, None)
+
+        if tilemap.streamer is not None:
+            self.tilemap_streamers.remove(tilemap.streamer)
+            tilemap.streamer.release()
+        else:
+            tilemap.release()
+
+        return True
+
+    # tilemap that only keeps regions around the camera loaded, updated every frame by assets
+    def stream_tilemap(self, path_to_file: str, margin: float=TilemapStreamer.DEFAULT_MARGIN,
+                       evict_margin: float=TilemapStreamer.DEFAULT_EVICT_MARGIN,
+                       budget: float=TilemapStreamer.DEFAULT_BUDGET) -> Success:
+        streamer: TilemapStreamer = TilemapStreamer(self.game, path_to_file, margin, evict_margin, budget)
+
+        if streamer.tilemap.name in self.tilemaps:
+            streamer.release()
+            return False
+
+        self.tilemaps[streamer.tilemap.name] = streamer.tilemap
+        self.tilemap_streamers.append(streamer)
+        return True
+
     def load_ui_sheet(self, path_to_folder: str) -> Success:
         sheet: UI_Sheet = self.game.utilities.load_ui_sheet(path_to_folder, self.game)
 
@@ -197,6 +246,9 @@ class Assets:
         if not self.ui_sheets_loaded:
             self._load_ui_sheets()
 
+        if not self.atlas_loaded:
+            self._load_atlas()
+
     def _load_images(self) -> None:
         dirs_to_do: set[str] = set()
 
@@ -416,11 +468,12 @@ class Assets:
 
         dirs_to_do: set[str] = set()
 
-        for file in os.listdir(self.game.utilities.DEFAULT_TILEMAP_PATH):
+        files: list[str] = os.listdir(self.game.utilities.DEFAULT_TILEMAP_PATH)
+        for file in files:
             if "__" in file:
                 continue
 
-            if file[-5:] == ".json":
+            if self._is_tilemap_file(file, files):
                 self.load_tilemap(file)
             elif "." in file:
                 continue
@@ -433,12 +486,15 @@ class Assets:
             to_clear += dirs_to_do
 
             for dir_ in dirs_to_do:
-                for file in os.listdir(f"{self.game.utilities.DEFAULT_TILEMAP_PATH}/{dir_}"):
+                files = os.listdir(f"{self.game.utilities.DEFAULT_TILEMAP_PATH}/{dir_}")
+                for file in files:
                     if "__" in file:
                         continue
 
-                    if file[-5:] == ".json":
+                    if self._is_tilemap_file(file, files):
                         self.load_tilemap(f"{dir_}/{file}")
+                    elif "." in file:
+                        continue
                     else:
                         to_add.append(f"{dir_}/{file}")
 
@@ -453,6 +509,14 @@ class Assets:
 
         self.tilemaps_loaded = True
 
+    # json or binary tilemap, json is skipped when converted to binary next to it
+    @staticmethod
+    def _is_tilemap_file(file: str, files_next_to_it: list[str]) -> bool:
+        if BinaryTilemap.is_binary_path(file):
+            return True
+
+        return file[-5:] == ".json" and file[:-5] + BinaryTilemap.EXTENSION not in files_next_to_it
+
     def _load_ui_sheets(self) -> None:
         assert self.images_loaded
 
@@ -494,3 +558,26 @@ class Assets:
             to_add = []
 
         self.ui_sheets_loaded = True
+
+    # packs images, animation frames and grid resized images into graphics.atlas
+    def _load_atlas(self) -> None:
+        assert self.images_loaded
+        assert self.animations_loaded
+        assert self.tilemaps_loaded
+
+        if not self.game.window.opengl:
+            return
+
+        atlas: 'TextureAtlas' = self.game.graphics.atlas
+        surfaces: dict[str, pygame.Surface] = dict(self.images)
+
+        for name, animation in self.animations.items():
+            for i, frame in enumerate(animation.frames):
+                surfaces[atlas.animation_frame_name(name, i)] = frame
+
+        surfaces |= self.resized_cache.held_atlas_surfaces()
+
+        atlas.add_many(surfaces)
+        print(f"[LOG] texture atlas packed, {atlas}")
+
+        self.atlas_loaded = True
@@ -3,6 +3,7 @@ import time
 from array import array
 
 import moderngl
+import pygame
 from moderngl import Texture, Program, Buffer, VertexArray, Framebuffer, Context
 from pygame import Surface, Vector2
 
@@ -13,8 +14,14 @@ from scripts.GameTypes import Success, ColorNormalized, UV_Position, DisplayPosi
 from scripts.Utilities.Graphics.double_framebuffer import DoubleFramebuffer
 
 from scripts.Utilities.Graphics.frag import Frag
+from scripts.Utilities.Graphics.gl_state import GLState
 from scripts.Utilities.Graphics.graphics_command import GraphicsCommand
 from scripts.Utilities.Graphics.kernel import Kernel
+from scripts.Utilities.Graphics.render_graph import RenderGraph
+from scripts.Utilities.Graphics.streaming_texture import StreamingTexture
+from scripts.Utilities.Graphics.texture_atlas import TextureAtlas
+from scripts.Utilities.Graphics.texture_pool import TexturePool
+from scripts.Utilities.Graphics.tile_renderer import TileRenderer
 
 
 class Graphics:
@@ -25,11 +32,14 @@ class Graphics:
             return
 
         self.ctx: Context = moderngl.create_context()
+        self.gl_state: GLState = GLState(self.ctx)
         self.double_fbo: DoubleFramebuffer = None
 
         self.programs: dict[str, Program] = {}
+        self.custom_vertex_programs: set[str] = set()
         self.textures: dict[str, Texture] = {}
         self.temp_textures: list[Texture] = []
+        self.streaming_textures: dict[str, StreamingTexture] = {}
         self.frags: dict[str, Frag] = {}
         self.effects: dict[str, Effect] = {}
         self.command_queue: list[GraphicsCommand] = []
@@ -74,11 +84,20 @@ class Graphics:
 
         self._load_black_white()
 
+        self.atlas: TextureAtlas = None
+        self.tile_renderer: TileRenderer = None
+        self.render_graph: RenderGraph = None
+        self.texture_pool: TexturePool = None
+
     def init(self) -> None:
         if not self.opengl:
             return
 
+        self.texture_pool = TexturePool(self.game)
         self.double_fbo = self.get_display_double_framebuffer()
+        self.render_graph = RenderGraph(self.game)
+        self.atlas = TextureAtlas(self.game)
+        self.tile_renderer = TileRenderer(self.game)
 
         self._load_frags()
         self._load_effects()
@@ -87,6 +106,7 @@ class Graphics:
         if not self.opengl:
             return
 
+        self.gl_state.invalidate()
         self._handle_command_queue()
         self._blit_fbo_to_display()
         self._release_temp_textures()
@@ -95,21 +115,30 @@ class Graphics:
         if not self.opengl:
             return
 
-    def _handle_command_queue(self) -> None:
-        self.command_queue.sort(key=lambda x: x.order)
+        self.tile_renderer.release()
+        self.atlas.release()
+        self.render_graph.release()
+        self._release_temp_textures()
+        self.texture_pool.release()
 
-        for command in self.command_queue:
-            command.execute()
+        for streaming_texture in self.streaming_textures.values():
+            streaming_texture.release()
 
+        self.streaming_textures = {}
+
+    # the graph only recompiles when the queued commands differ from last frame
+    def _handle_command_queue(self) -> None:
+        self.render_graph.execute(self.command_queue)
         self.command_queue = []
 
     def _blit_fbo_to_display(self) -> None:
         self.ctx.screen.use()
 
-        self.double_fbo.front.use(0)
-        self.programs["main"]["tex"] = 0
-        self.programs["main"]["position"] = 0, 0
-        self.programs["main"]["alpha"] = 1
+        self.gl_state.set_blend(False)
+        self.gl_state.use_texture(self.double_fbo.front, 0)
+        self.gl_state.set_uniform(self.programs["main"], "tex", 0)
+        self.gl_state.set_uniform(self.programs["main"], "position", (0, 0))
+        self.gl_state.set_uniform(self.programs["main"], "alpha", 1)
         self.ctx.screen.viewport = (*self.game.window.dp, *self.game.window.blit_size)
         self.effect_vao.render(moderngl.TRIANGLE_STRIP)
 
@@ -117,7 +146,11 @@ class Graphics:
 
     def _release_temp_textures(self) -> None:
         for texture in self.temp_textures:
-            texture.release()
+            if self.texture_pool.is_pooled(texture):
+                self.texture_pool.give_back(texture)
+            else:
+                self.gl_state.forget_texture(texture)
+                texture.release()
 
         self.temp_textures = []
 
@@ -155,7 +188,16 @@ class Graphics:
         with open(path) as f:
             fragment_shader: str = f.read()
 
-        program: Program = self.ctx.program(vertex_shader=self.vertex_shader,
+        # .frag with a .vert of the same name next to it uses its own vertex shader (instanced rendering)
+        vertex_shader: str = self.vertex_shader
+        vertex_path: str = f"{path[:-5]}.vert"
+        if filename != "main.frag" and os.path.isfile(vertex_path):
+            with open(vertex_path) as f:
+                vertex_shader = f.read()
+
+            self.custom_vertex_programs.add(name)
+
+        program: Program = self.ctx.program(vertex_shader=vertex_shader,
                                             fragment_shader=fragment_shader)
 
         self.programs[name] = program
@@ -199,6 +241,9 @@ class Graphics:
 
     def _load_frags(self) -> None:
         for name, program in self.programs.items():
+            if name in self.custom_vertex_programs:
+                continue
+
             self.frags[name] = Frag(self.game, program)
 
     def _load_effects(self) -> None:
@@ -233,6 +278,13 @@ class Graphics:
         texture.write(surface.get_view('1'))
         return texture
 
+    # colorkey becomes real transparency, pygame blits honour it but a texture upload does not
+    @staticmethod
+    def colorkey_to_alpha(surface: Surface) -> Surface:
+        alpha_surface: Surface = Surface(surface.get_size(), pygame.SRCALPHA)
+        alpha_surface.blit(surface, (0, 0))
+        return alpha_surface
+
     def get_texture(self, size: Resolution, repeat: bool=False, use_floats: bool=False):
         data_type: str = 'f2' if use_floats else 'f1'
         texture = self.ctx.texture(size, 4, dtype=data_type)
@@ -241,6 +293,12 @@ class Graphics:
         texture.repeat_y = repeat
         return texture
 
+    # pooled texture, taken back at the end of the frame
+    def get_temp_texture(self, size: Resolution, repeat: bool=False, use_floats: bool=False) -> Texture:
+        texture: Texture = self.texture_pool.get_texture(size, dtype='f2' if use_floats else 'f1', repeat=repeat)
+        self.temp_textures.append(texture)
+        return texture
+
     def clear(self, screen: bool=True, framebuffer: bool=True) -> None:
         clear_color: ColorNormalized = self.game.window.clear_color
         clear_color = (clear_color[0] / 255, clear_color[1] / 255, clear_color[2] / 255)
@@ -252,29 +310,47 @@ class Graphics:
 
     def blit_surface(self, position: UV_Position, surface: Surface, alpha: float=1, equation=moderngl.FUNC_ADD,
                      funcs=(moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA)) -> None:
-        texture: Texture = self.surface_to_texture(surface)
+        texture: Texture = self.texture_pool.get_texture(surface.get_size())
+        texture.swizzle = 'BGRA'
+        texture.write(surface.get_view('1'))
+
         self.blit_texture(position, texture, alpha, equation, funcs, True)
-        texture.release()
+
+        texture.swizzle = 'RGBA'
+        self.texture_pool.give_back(texture)
+
+    # like blit_surface, but the texture lives on under given name and is updated in place
+    def blit_streamed_surface(self, name: str, position: UV_Position, surface: Surface, alpha: float=1,
+                              dirty_rects: list[pygame.Rect] | None=None, equation=moderngl.FUNC_ADD,
+                              funcs=(moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA)) -> None:
+        streaming_texture: StreamingTexture | None = self.streaming_textures.get(name)
+
+        if streaming_texture is None or streaming_texture.size != surface.get_size():
+            if streaming_texture is not None:
+                streaming_texture.release()
+
+            streaming_texture = StreamingTexture(self.ctx, surface.get_size())
+            self.streaming_textures[name] = streaming_texture
+            dirty_rects = None
+
+        streaming_texture.upload(surface, dirty_rects)
+        self.blit_texture(position, streaming_texture.texture, alpha, equation, funcs, True)
 
     def blit_texture(self, position: UV_Position, texture: Texture, alpha: float=1, equation=moderngl.FUNC_ADD,
                      funcs=(moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA), use_blit_vao: bool=False) -> None:
-        self.ctx.enable(moderngl.BLEND)
-        self.ctx.blend_equation = equation
-        self.ctx.blend_func = funcs[0], funcs[1]
+        self.gl_state.set_blend(True, equation, funcs)
 
-        texture.use(0)
-        self.programs["main"]["tex"] = 0
-        self.programs["main"]["position"] = position.x, position.y
-        self.programs["main"]["alpha"] = alpha
+        self.gl_state.use_texture(texture, 0)
+        self.gl_state.set_uniform(self.programs["main"], "tex", 0)
+        self.gl_state.set_uniform(self.programs["main"], "position", (position.x, position.y))
+        self.gl_state.set_uniform(self.programs["main"], "alpha", alpha)
 
         if use_blit_vao:
             self.blit_vao.render(moderngl.TRIANGLE_STRIP)
         else:
             self.effect_vao.render(moderngl.TRIANGLE_STRIP)
 
-        self.ctx.disable(moderngl.BLEND)
-        self.ctx.blend_equation = moderngl.FUNC_ADD
-        self.ctx.blend_func = moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA
+        self.gl_state.set_blend(False)
 
     def position_display_to_uv(self, position: DisplayPosition) -> UV_Position:
         return Vector2(
@@ -322,6 +398,8 @@ class Graphics:
                 f"effects: {len(self.effects)}"
                 f"textures: {len(self.textures)}, "
                 f"temp textures: {len(self.temp_textures)}, "
+                f"streaming textures: {len(self.streaming_textures)}, "
+                f"texture pool: {self.texture_pool}, "
                 f"commands in queue: {len(self.command_queue)}")
 
     def __repr__(self):
@@ -0,0 +1,79 @@
+import os
+import random
+import sys
+
+# steps the same PhysicsEntity in substep and in swept mode over a tilemap and reports where they end up apart
+#
+# python -m scripts.swept_movement_check [tilemap]
+# walks and falls from random places around the map, then from places shallowly overlapping a tile,
+# which the sweep can't see and has to be pushed out of first
+
+TILEMAP: str = "Experiments/boilmap.json"
+RUNS: int = 60
+FRAMES: int = 60
+DT: float = 1 / 60
+TOLERANCE: float = 1  # px
+
+
+def simulate(game: 'Game', tilemap: 'Tilemap', swept: bool, start: 'Vector2', velocity: 'Vector2',
+             movement: 'Vector2', size: tuple[int, int]) -> tuple['Vector2', int]:
+    from pygame import Vector2
+    from scripts.Utilities.physics_entity import PhysicsEntity
+
+    entity: PhysicsEntity = PhysicsEntity(game, "entity", Vector2(start), size, True, 15, swept=swept)
+    entity.velocity = Vector2(velocity)
+    entity.obstacles.add(tilemap)
+
+    bottom_collisions: list[int] = [0]
+    entity.invoke_on_collide_bottom.add((1, "count", lambda *_: bottom_collisions.__setitem__(0, bottom_collisions[0] + 1)))
+
+    for _ in range(FRAMES):
+        game.flow.dt = DT
+        entity.update(movement)
+
+    return entity.position, bottom_collisions[0]
+
+
+def compare(game: 'Game', tilemap: 'Tilemap', name: str, starts: list['Vector2'], size: tuple[int, int]) -> None:
+    from pygame import Vector2
+
+    differ: int = 0
+    for start in starts:
+        velocity: Vector2 = Vector2(random.uniform(-200, 200), random.uniform(-100, 100))
+        movement: Vector2 = Vector2(random.choice((-120, 0, 120)), 0)
+
+        substep_position, substep_bottoms = simulate(game, tilemap, False, start, velocity, movement, size)
+        swept_position, swept_bottoms = simulate(game, tilemap, True, start, velocity, movement, size)
+
+        if (substep_position - swept_position).length() > TOLERANCE or (substep_bottoms > 0) != (swept_bottoms > 0):
+            differ += 1
+            print(f"[LOG] {name} start {start}, velocity {velocity}, movement {movement}: "
+                  f"substep {substep_position} ({substep_bottoms} bottom), swept {swept_position} ({swept_bottoms} bottom)")
+
+    print(f"[LOG] {name}: {differ} of {len(starts)} runs differ")
+
+
+if __name__ == '__main__':
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    from pygame import Vector2
+    from game import Game
+
+    game: Game = Game((320, 180), "swept movement", fullscreen=False, cursor_visible=False)
+    tilemap: 'Tilemap' = game.utilities.load_tilemap(sys.argv[1] if len(sys.argv) > 1 else TILEMAP, game)
+    size: tuple[int, int] = (20, 30)
+
+    random.seed(7)
+    rects: list['FRect'] = [tile.rect for grid in tilemap.grids_ordered if grid.physical for tile in grid.tiles.values()]
+
+    compare(game, tilemap, "free", [
+        Vector2(rect.x + random.uniform(-200, 200), rect.y - random.uniform(50, 200))
+        for rect in random.sample(rects, RUNS)
+    ], size)
+
+    # bottom a few px into the top of a tile
+    compare(game, tilemap, "overlapping", [
+        Vector2(rect.x + random.uniform(-size[0] + 5, rect.w - 5), rect.y - size[1] + random.uniform(1, 12))
+        for rect in random.sample(rects, RUNS)
+    ], size)
@@ -0,0 +1,74 @@
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+# bytes a Tile and an AnimatedTile take, measured with tracemalloc over many made at once
+#
+# python -m scripts.tile_memory_benchmark [revision ...]
+# measures the working tree, and every revision given exported into a temporary directory,
+# e.g. "python -m scripts.tile_memory_benchmark HEAD~1" for before and after of a change to tiles
+
+TILES: int = 100_000
+
+
+def measure(make: callable) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before: int = tracemalloc.get_traced_memory()[0]
+
+    tiles: list = [make(i) for i in range(TILES)]
+
+    after: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # the list holding them takes a pointer per tile
+    return (after - before) / len(tiles) - 8
+
+
+def measure_tree() -> None:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    import pygame
+    from game import Game
+    from scripts.AssetClasses.Tilemap.grid import Grid
+    from scripts.AssetClasses.Tilemap.tilemap import Tilemap
+    from scripts.AssetClasses.Tilemap.Tiles.tile import Tile
+    from scripts.AssetClasses.Tilemap.Tiles.animated_tile import AnimatedTile
+
+    game: Game = Game((320, 180), "tile memory", fullscreen=False, cursor_visible=False)
+    tilemap: Tilemap = Tilemap(game, "tile memory", "", 16, pygame.Vector2(), 1)
+    grid: Grid = Grid(tilemap, "grid", 16, 0, True, 0, False, False, False, 1, 0)
+
+    image: pygame.Surface = pygame.Surface((16, 16))
+    animation = next(iter(game.assets.animations.values()))
+
+    print(f"[LOG] Tile: {measure(lambda i: Tile(grid, image, (i, 0), False, 1)):.0f} B per tile")
+    print(f"[LOG] AnimatedTile: "
+          f"{measure(lambda i: AnimatedTile(grid, animation, (i, 0), False, False, 1)):.0f} B per tile")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 1:
+        measure_tree()
+        sys.exit()
+
+    root: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    print("[LOG] working tree")
+    subprocess.run([sys.executable, "-m", "scripts.tile_memory_benchmark"], cwd=root, check=True)
+
+    for revision in sys.argv[1:]:
+        with tempfile.TemporaryDirectory() as directory:
+            archive: bytes = subprocess.run(["git", "archive", revision], cwd=root, check=True,
+                                            capture_output=True).stdout
+            subprocess.run(["tar", "-x", "-C", directory], input=archive, check=True)
+
+            # the revision may predate this script
+            with open(__file__, "r") as source, open(f"{directory}/scripts/tile_memory_benchmark.py", "w") as copy:
+                copy.write(source.read())
+
+            print(f"[LOG] {revision}")
+            subprocess.run([sys.executable, "-m", "scripts.tile_memory_benchmark"], cwd=directory, check=True)
@@ -21,6 +21,7 @@ from scripts.AssetClasses.Animation.animation import Animation
 from scripts.AssetClasses.scene import Scene
 from scenes.scene_behaviour import SceneBehaviour
 from scripts.AssetClasses.Tilemap.tilemap import Tilemap
+from scripts.AssetClasses.Tilemap.binary_tilemap import BinaryTilemap
 from scripts.AssetClasses.Tilemap.grid import Grid
 from scripts.AssetClasses.Tilemap.Tiles.tile import Tile
 from scripts.DataStructures.sorted_array import SortedArray
@@ -308,6 +309,19 @@ class Utilities:
     def load_tilemap(path_to_file: str, game: 'Game') -> Tilemap:
         local_path: str = f"{Utilities.DEFAULT_TILEMAP_PATH}/{path_to_file}"
 
+        if BinaryTilemap.is_binary_path(local_path):
+            with open(local_path, 'rb') as f:
+                data: bytes = f.read()
+
+            tilemap_data: dict = BinaryTilemap.decode(data)
+            if game.assets.resized_cache.prebaking:
+                game.assets.resized_cache.prebake_tilemap_data(tilemap_data)
+
+            tilemap: Tilemap = game.utilities.load_tilemap_from_binary_data(tilemap_data, local_path, game)
+            tilemap.saver.seed(data)
+
+            return tilemap
+
         tilemap_data: dict = {}
         with open(local_path, 'r') as f:
             tilemap_data = json.load(f)
@@ -318,20 +332,42 @@ class Utilities:
             assert("position" in tilemap_data)
             assert("grids" in tilemap_data)
 
+        if game.assets.resized_cache.prebaking:
+            game.assets.resized_cache.prebake_tilemap_data(tilemap_data)
+
         return game.utilities.load_tilemap_from_data(tilemap_data, local_path, game)
 
     @staticmethod
     def load_tilemap_from_data(tilemap_data: dict, local_path: str, game: 'Game') -> Tilemap:
+        tilemap: Tilemap = Utilities.load_empty_tilemap(tilemap_data, local_path, game)
+
+        for grid_data in tilemap_data["grids"]:
+            new_grid: Grid = Utilities.load_grid(grid_data, tilemap)
+
+            tilemap.grids[new_grid.name] = new_grid
+            tilemap.grids_ordered.append(new_grid)
+
+        tilemap.grids_ordered.sort(key=lambda x: x.layer)
+        return tilemap
+
+    # tilemap with the settings of tilemap_data and no grids
+    @staticmethod
+    def load_empty_tilemap(tilemap_data: dict, local_path: str, game: 'Game') -> Tilemap:
         position: WorldPosition = pygame.math.Vector2(
             tilemap_data["position"][0],
             tilemap_data["position"][1]
         )
 
-        tilemap: Tilemap = Tilemap(game, tilemap_data["name"], local_path,
-                                   tilemap_data["standard tile size"], position, tilemap_data["alpha"])
+        return Tilemap(game, tilemap_data["name"], local_path,
+                       tilemap_data["standard tile size"], position, tilemap_data["alpha"])
+
+    # load_tilemap_from_data for what BinaryTilemap.decode gives
+    @staticmethod
+    def load_tilemap_from_binary_data(tilemap_data: dict, local_path: str, game: 'Game') -> Tilemap:
+        tilemap: Tilemap = Utilities.load_empty_tilemap(tilemap_data, local_path, game)
 
         for grid_data in tilemap_data["grids"]:
-            new_grid: Grid = Utilities.load_grid(grid_data, tilemap)
+            new_grid: Grid = Utilities.load_grid_from_binary_data(grid_data, tilemap_data["names"], tilemap)
 
             tilemap.grids[new_grid.name] = new_grid
             tilemap.grids_ordered.append(new_grid)
@@ -339,6 +375,75 @@ class Utilities:
         tilemap.grids_ordered.sort(key=lambda x: x.layer)
         return tilemap
 
+    @staticmethod
+    def load_grid_from_binary_data(grid_data: dict, names: list[list[str]], tilemap: Tilemap) -> Grid:
+        grid: Grid = Utilities.load_empty_grid(grid_data, tilemap)
+
+        Utilities.load_binary_sections(grid_data["sections"], names, grid)
+
+        return grid
+
+    # adds the tiles of decoded binary sections to grid, returns them
+    @staticmethod
+    def load_binary_sections(sections: dict[str, dict], names: list[list[str]], grid: Grid) -> list[Tile]:
+        ongrid: list[Tile] = Utilities._load_binary_tiles(sections["tiles"], names, grid, False)
+        background: list[Tile] = Utilities._load_binary_tiles(sections["offgrid background"], names, grid, True)
+        foreground: list[Tile] = Utilities._load_binary_tiles(sections["offgrid foreground"], names, grid, True)
+
+        grid.add_ongrid_tiles(ongrid)
+
+        for tile in background:
+            grid.add_tile(tile, offgrid_background=True)
+
+        for tile in foreground:
+            grid.add_tile(tile, offgrid_background=False)
+
+        return ongrid + background + foreground
+
+    # plain tiles are built straight from the arrays, images and animations resolved once per name,
+    # tiles with extras (alpha, groups, components...) go through load_tile
+    @staticmethod
+    def _load_binary_tiles(section_data: dict, names: list[list[str]], grid: Grid, is_offgrid: bool) -> list[Tile]:
+        extras: dict[str, dict] = section_data["extras"]
+        resolved: dict[int, pygame.Surface | Animation] = {}
+        tiles: list[Tile] = []
+
+        positions: list[list[float]] = section_data["positions"].tolist()
+        name_indices: list[int] = section_data["name indices"].tolist()
+
+        for row, (position, name_index) in enumerate(zip(positions, name_indices)):
+            kind, name = names[name_index]
+
+            if extras and str(row) in extras:
+                tile_data: dict = dict(extras[str(row)])
+                tile_data["position"] = f"{position[0]};{position[1]}"
+                tile_data[kind] = name
+
+                tiles.append(Utilities.load_tile(tile_data, grid, is_offgrid))
+                continue
+
+            if name_index not in resolved:
+                if kind == "image":
+                    resolved[name_index] = Utilities._load_tile_image({"image": name}, grid, is_offgrid)
+                else:
+                    resolved[name_index] = Utilities._load_tile_animation({"animation": name}, grid, is_offgrid)
+
+            if kind == "image":
+                tiles.append(Tile(grid, resolved[name_index], (position[0], position[1]), is_offgrid, 1))
+            else:
+                tiles.append(AnimatedTile(grid, resolved[name_index], (position[0], position[1]), is_offgrid, False, 1))
+
+        return tiles
+
+    # grid with the settings of grid_data and no tiles
+    @staticmethod
+    def load_empty_grid(grid_data: dict, tilemap: Tilemap) -> Grid:
+        return Grid(tilemap, grid_data["name"], grid_data["tile size"],
+                          grid_data["layer"], grid_data["active"],
+                          grid_data["depth"], grid_data["use depth"],
+                          grid_data["invisible"], grid_data["physical"],
+                          grid_data["alpha"], grid_data["ongrid padding"])
+
     @staticmethod
     def load_grid(grid_data: dict, tilemap: Tilemap) -> Grid:
         assert("name" in grid_data)
@@ -355,26 +460,19 @@ class Utilities:
         assert("alpha" in grid_data)
         assert("ongrid padding" in grid_data)
 
-        grid: Grid = Grid(tilemap, grid_data["name"], grid_data["tile size"],
-                          grid_data["layer"], grid_data["active"],
-                          grid_data["depth"], grid_data["use depth"],
-                          grid_data["invisible"], grid_data["physical"],
-                          grid_data["alpha"], grid_data["ongrid padding"])
-
-        for tile_data in grid_data["tiles"]:
-            new_tile: Tile = Utilities.load_tile(tile_data, grid, False)
+        grid: Grid = Utilities.load_empty_grid(grid_data, tilemap)
 
-            grid.tiles[new_tile.position] = new_tile
+        grid.add_ongrid_tiles([Utilities.load_tile(tile_data, grid, False) for tile_data in grid_data["tiles"]])
 
         for tile_data in grid_data["offgrid background"]:
             new_tile: Tile = Utilities.load_tile(tile_data, grid, True)
 
-            grid.offgrid_background.add(new_tile)
+            grid.add_tile(new_tile, offgrid_background=True)
 
         for tile_data in grid_data["offgrid foreground"]:
             new_tile: Tile = Utilities.load_tile(tile_data, grid, True)
 
-            grid.offgrid_foreground.add(new_tile)
+            grid.add_tile(new_tile, offgrid_background=False)
 
         return grid
 
@@ -408,7 +506,7 @@ class Utilities:
         else:
             position: TilePosition = (int(positionAsStrings[0]), int(positionAsStrings[1]))
 
-        tile_groups: set[str] = set(tile_data["groups"]) if "groups" in tile_data else set()
+        tile_groups: set[str] | None = set(tile_data["groups"]) if "groups" in tile_data else None
         components: list[TileComponent] = []
 
         if is_image_tile:
@@ -424,9 +522,10 @@ class Utilities:
                 component: TileComponent = game.assets.components[component_data["class_name"]].load(component_data, tile)
                 components.append(component)
 
-        tile.components = components
+        if components:
+            tile.components = components
 
-        for tile_group in tile_groups:
+        for tile_group in tile.groups:
             if tile_group not in tilemap.tile_groups:
                 tilemap.tile_groups[tile_group] = set()
 
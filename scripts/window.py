@@ -112,7 +112,9 @@ class Window:
     def __str__(self):
         return self.as_string
 
-    def blit_display(self, source_display: str, target_display: str="", offset: DisplayVector=None, alpha: float=1):
+    # dirty_rects only matter when blitting to opengl, None uploads the whole display
+    def blit_display(self, source_display: str, target_display: str="", offset: DisplayVector=None, alpha: float=1,
+                     dirty_rects: list[pygame.Rect] | None=None):
         if offset is None:
             offset = Vector2()
 
@@ -123,10 +125,12 @@ class Window:
 
         self.active_display = target_display
         if target_display == "" and self.opengl:
-            self.game.graphics.blit_surface(
+            self.game.graphics.blit_streamed_surface(
+                source_display,
                 self.game.graphics.position_display_to_uv(offset),
                 display_to_blit,
-                alpha
+                alpha,
+                dirty_rects
             )
         else:
             self.display.blit(display_to_blit, offset)
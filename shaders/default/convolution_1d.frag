@@ -0,0 +1,23 @@
+#version 330
+
+uniform sampler2D tex;
+uniform sampler2D kernel;  // float weights, one row per term of a decomposed kernel
+uniform int kernel_row;
+uniform ivec2 kernel_range;
+uniform vec2 pixel_step;
+
+in vec2 uv;
+out vec4 color;
+
+void main() {
+    vec3 accumulator = vec3(0, 0, 0);
+
+    for (int i = kernel_range.x; i < kernel_range.y; i++) {
+        vec4 image_color = texture(tex, uv + (float(i) * pixel_step));
+        vec3 weight = texelFetch(kernel, ivec2(i - kernel_range.x, kernel_row), 0).rgb;
+
+        accumulator += image_color.rgb * weight;
+    }
+
+    color = vec4(accumulator, texture(tex, uv).a);
+}
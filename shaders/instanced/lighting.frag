@@ -0,0 +1,38 @@
+#version 330
+
+in vec2 uvn;
+flat in vec2 light_center;
+flat in vec2 light_size;
+flat in vec4 light_area; // radius, falloff, falloff_inv, falloff_speed
+flat in float light_hill_of_peace;
+flat in vec3 light_light_color;
+
+out vec4 color;
+
+float sdf(vec2 v) {
+    v -= light_center;
+    v = abs(v);
+    v -= light_size;
+    v = max(vec2(0.0, 0.0), v);
+
+    float dist = max(0.0, length(v) - light_area.x);
+
+    if (dist == 0.0) {
+        return 0.0;
+    } else if (light_area.y == 0) {
+        return 1.0;
+    }
+
+    return pow(min(1.0, dist * light_area.z), light_area.w);
+}
+
+void main() {
+    float light = 1.0 - sdf(uvn);
+
+    if (light_hill_of_peace == 1.0) {
+        light = 1.0 - light;
+    }
+
+    // blended additively into the calculation target, alpha stays what it was cleared to
+    color = vec4(light_light_color * light, 0.0);
+}
@@ -0,0 +1,37 @@
+#version 330
+
+uniform vec2 display_size;
+uniform float aspect_ratio;
+
+in vec2 corner;
+in vec4 rect;
+in vec2 center;
+in vec2 size;
+in vec4 area;
+in float hill_of_peace;
+in vec3 light_color;
+
+out vec2 uvn;
+flat out vec2 light_center;
+flat out vec2 light_size;
+flat out vec4 light_area;
+flat out float light_hill_of_peace;
+flat out vec3 light_light_color;
+
+void main() {
+    vec2 display_position = rect.xy + (corner * rect.zw);
+    vec2 clip_position = ((display_position / display_size) * 2.0) - vec2(1.0, 1.0);
+
+    uvn = vec2(
+        ((display_position.x / display_size.x) - 0.5) * aspect_ratio,
+        0.5 - (display_position.y / display_size.y)
+    );
+
+    light_center = center;
+    light_size = size;
+    light_area = area;
+    light_hill_of_peace = hill_of_peace;
+    light_light_color = light_color;
+
+    gl_Position = vec4(clip_position.x, -clip_position.y, 0, 1);
+}
@@ -0,0 +1,18 @@
+#version 330
+
+uniform sampler2D tex;
+
+in vec2 uv;
+in float tile_alpha;
+out vec4 color;
+
+void main() {
+    vec4 sampled_color = texture(tex, uv);
+
+    // colorkey cutout
+    if (sampled_color.a == 0.0) {
+        discard;
+    }
+
+    color = vec4(sampled_color.rgb, sampled_color.a * tile_alpha);
+}
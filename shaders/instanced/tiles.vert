@@ -0,0 +1,20 @@
+#version 330
+
+uniform vec2 display_size;
+
+in vec2 corner;
+in vec4 rect;
+in vec4 uv_rect;
+in float alpha;
+
+out vec2 uv;
+out float tile_alpha;
+
+void main() {
+    vec2 display_position = rect.xy + (corner * rect.zw);
+    vec2 clip_position = ((display_position / display_size) * 2.0) - vec2(1.0, 1.0);
+
+    uv = uv_rect.xy + (corner * uv_rect.zw);
+    tile_alpha = alpha;
+    gl_Position = vec4(clip_position.x, -clip_position.y, 0, 1);
+}